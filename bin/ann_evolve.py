@@ -11,6 +11,8 @@ Usage:
     [--output OUTPUT_FILE] [--objective OBJECTIVE] [--repetitions REPETITIONS]
     [--turns TURNS] [--noise NOISE] [--nmoran NMORAN]
     [--features FEATURES] [--hidden HIDDEN] [--mu_distance DISTANCE]
+    [--racing]
+    [--checkpoint CHECKPOINT_FILE] [--checkpoint-interval INTERVAL] [--resume]
 
 Options:
     -h --help                   Show help
@@ -28,8 +30,13 @@ Options:
     --features FEATURES         Number of ANN features [default: 17]
     --hidden HIDDEN             Number of hidden nodes [default: 10]
     --mu_distance DISTANCE      Delta max for weights updates [default: 10]
+    --racing                    Stop adding repetitions once an individual is clearly in or out of the survivors
+    --checkpoint CHECKPOINT_FILE    File to save the state of the evolution to
+    --checkpoint-interval INTERVAL  Generations between checkpoints [default: 10]
+    --resume                    Continue from the checkpoint file if it exists
 """
 
+import os
 import random
 
 from docopt import docopt
@@ -144,6 +151,9 @@ if __name__ == '__main__':
     generations = int(arguments['--generations'])
     bottleneck = int(arguments['--bottleneck'])
     output_filename = arguments['--output']
+    racing = arguments['--racing']
+    checkpoint = arguments['--checkpoint']
+    checkpoint_interval = int(arguments['--checkpoint-interval'])
 
     # Objective
     name = str(arguments['--objective'])
@@ -164,5 +174,10 @@ if __name__ == '__main__':
     population = Population(ANNParams, param_kwargs, population, objective,
                             output_filename, bottleneck, 
                             mutation_probability,
-                            processes=processes)
-    population.run(generations)
+                            processes=processes, racing=racing,
+                            checkpoint=checkpoint,
+                            checkpoint_interval=checkpoint_interval)
+    if (checkpoint and arguments['--resume'] and
+            os.path.exists(checkpoint)):
+        population.resume(checkpoint)
+    population.run(generations - population.generation)
@@ -0,0 +1,33 @@
+"""
+Cluster worker: scores the tasks of a coordinator started with --cluster.
+
+Usage:
+    cluster_worker.py [-h] --authkey AUTHKEY [--processes PROCESSES] ADDRESS
+
+Options:
+    -h --help                   Show help
+    --authkey AUTHKEY           Key shared with the coordinator, as printed by it
+    --processes PROCESSES       Number of worker processes to run, 0 for one per CPU [default: 1]
+
+ADDRESS is the HOST:PORT of the coordinator.
+"""
+from multiprocessing import Process, cpu_count
+
+from docopt import docopt
+
+from axelrod_dojo.cluster import run_worker
+
+
+if __name__ == '__main__':
+    arguments = docopt(__doc__, version='Cluster Worker 0.1')
+    host, port = arguments['ADDRESS'].rsplit(":", 1)
+    address = (host, int(port))
+    authkey = arguments['--authkey'].encode()
+    processes = int(arguments['--processes']) or cpu_count()
+
+    workers = [Process(target=run_worker, args=(address, authkey))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
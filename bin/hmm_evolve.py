@@ -6,7 +6,14 @@ Usage:
     [--mu MUTATION_RATE] [--bottleneck BOTTLENECK] [--processes PROCESSORS]
     [--output OUTPUT_FILE] [--objective OBJECTIVE] [--repetitions REPETITIONS]
     [--turns TURNS] [--noise NOISE] [--nmoran NMORAN]
-    [--states NUM_STATES] [--algorithm ALGORITHM]
+    [--states NUM_STATES] [--algorithm ALGORITHM] [--exact]
+    [--cache CACHE_FILE] [--allow-stochastic-cache] [--warm WARM_FILE]
+    [--reevaluate REEVALUATE]
+    [--racing] [--crn] [--antithetic] [--chunk-time CHUNK_TIME]
+    [--cluster ADDRESS] [--authkey AUTHKEY]
+    [--shards DIRECTORY] [--shard-size SHARD_SIZE] [--steady-state]
+    [--breed-in-workers] [--immigrants IMMIGRANTS] [--batched]
+    [--checkpoint CHECKPOINT_FILE] [--checkpoint-interval INTERVAL] [--resume]
 
 Options:
     -h --help                   Show help
@@ -24,12 +31,38 @@ Options:
     --states NUM_STATES         Number of FSM states [default: 5]
     --algorithm ALGORITHM       Which algorithm to use (EA for evolutionary algorithm or PS for
                                 particle swarm algorithm) [default: EA]
+    --exact                     Compute exact expected scores instead of simulating matches
+    --cache CACHE_FILE          Fitness cache file shared across runs
+    --allow-stochastic-cache    Also cache scores of stochastic evaluations, which are then not re-evaluated
+    --warm WARM_FILE            Output file of a run with the same objective to pre-warm the cache from
+    --reevaluate REEVALUATE     Whether to rescore survivors: always, never or average [default: always]
+    --racing                    Stop adding repetitions once an individual is clearly in or out of the survivors
+    --crn                       Score every individual of a generation on the same random streams
+    --antithetic                Pair the repetitions of --crn with antithetic random streams
+    --chunk-time CHUNK_TIME     Split scoring into tasks against chunks of opponents taking about this many seconds
+    --cluster ADDRESS           Score on the workers of bin/cluster_worker.py connecting to this HOST:PORT
+    --authkey AUTHKEY           Key shared with the cluster workers, generated and printed if not given
+    --shards DIRECTORY          Write shards to DIRECTORY for bin/shard_worker.py jobs to score
+    --shard-size SHARD_SIZE     Number of scoring tasks per shard [default: 10]
+    --steady-state              Replace individuals as their scores arrive instead of by generations
+    --breed-in-workers          Send the survivors and breeding recipes to the worker processes instead of the offspring
+    --immigrants IMMIGRANTS     Number of random individuals scored ahead of each generation [default: 0]
+    --batched                   Select and breed the whole population with array operators
+    --checkpoint CHECKPOINT_FILE    File to save the state of the evolution to
+    --checkpoint-interval INTERVAL  Generations between checkpoints [default: 10]
+    --resume                    Continue from the checkpoint file if it exists (not with --steady-state)
 """
 
+import os
+import secrets
+
 from docopt import docopt
 
-from axelrod_dojo import HMMParams, Population, prepare_objective
+from axelrod_dojo import (FitnessCache, HMMParams, Population,
+                          prepare_objective)
 from axelrod_dojo.algorithms.particle_swarm_optimization import PSO
+from axelrod_dojo.cluster import ClusterBackend
+from axelrod_dojo.shards import ShardBackend
 
 
 if __name__ == '__main__':
@@ -43,6 +76,30 @@ if __name__ == '__main__':
     generations = int(arguments['--generations'])
     bottleneck = int(arguments['--bottleneck'])
     output_filename = arguments['--output']
+    reevaluate = arguments['--reevaluate']
+    racing = arguments['--racing']
+    crn = arguments['--crn']
+    antithetic = arguments['--antithetic']
+    breed_in_workers = arguments['--breed-in-workers']
+    immigrants = int(arguments['--immigrants'])
+    batched = arguments['--batched']
+    checkpoint = arguments['--checkpoint']
+    checkpoint_interval = int(arguments['--checkpoint-interval'])
+    chunk_time = None
+    if arguments['--chunk-time']:
+        chunk_time = float(arguments['--chunk-time'])
+    backend = None
+    if arguments['--cluster']:
+        host, port = arguments['--cluster'].rsplit(":", 1)
+        authkey = arguments['--authkey']
+        if authkey is None:
+            authkey = secrets.token_hex(16)
+            print("Start the cluster workers with --authkey {}".format(
+                authkey))
+        backend = ClusterBackend((host, int(port)), authkey.encode())
+    elif arguments['--shards']:
+        backend = ShardBackend(arguments['--shards'],
+                               int(arguments['--shard-size']))
 
     # Objective
     name = str(arguments['--objective'])
@@ -50,13 +107,22 @@ if __name__ == '__main__':
     turns = int(arguments['--turns'])
     noise = float(arguments['--noise'])
     nmoran = int(arguments['--nmoran'])
+    exact = arguments['--exact']
+
+    # Fitness cache
+    cache = None
+    if arguments['--cache']:
+        cache = FitnessCache(
+            arguments['--cache'],
+            allow_stochastic=arguments['--allow-stochastic-cache'])
 
     # HMM
     num_states = int(arguments['--states'])
     params_kwargs = {"num_states": num_states}
 
     if arguments['--algorithm'] == "PS":
-        objective = prepare_objective(name, turns, noise, repetitions, nmoran)
+        objective = prepare_objective(name, turns, noise, repetitions, nmoran,
+                                      exact=exact)
         pso = PSO(HMMParams, params_kwargs, objective=objective,
                   population=population, generations=generations,
                   size=num_states)
@@ -65,11 +131,29 @@ if __name__ == '__main__':
         xopt = HMMParams(num_states=num_states)
         xopt.read_vector(xopt_helper, num_states)
     else:
-        objective = prepare_objective(name, turns, noise, repetitions, nmoran)
+        objective = prepare_objective(name, turns, noise, repetitions, nmoran,
+                                      exact=exact)
         population = Population(HMMParams, params_kwargs, population, objective,
                                 output_filename, bottleneck, mutation_probability,
-                                processes=processes)
-        population.run(generations)
+                                processes=processes, cache=cache,
+                                reevaluate=reevaluate, racing=racing,
+                                common_random_numbers=crn, antithetic=antithetic,
+                                chunk_time=chunk_time, backend=backend,
+                                breed_in_workers=breed_in_workers,
+                                immigrants=immigrants,
+                                batched=batched,
+                                checkpoint=checkpoint,
+                                checkpoint_interval=checkpoint_interval)
+        if (checkpoint and arguments['--resume'] and
+                os.path.exists(checkpoint)):
+            population.resume(checkpoint)
+        if cache is not None and arguments['--warm']:
+            cache.warm(arguments['--warm'], HMMParams, objective,
+                       population.opponents_information)
+        if arguments['--steady-state']:
+            population.run_steady_state(generations * population.size)
+        else:
+            population.run(generations - population.generation)
         
         # Get the best member of the population to output.
         scores = population.score_all()
@@ -79,5 +163,8 @@ if __name__ == '__main__':
                 record = s
                 record_holder = i
         xopt, fopt = population.population[record_holder], record
+        population.close()
+    if backend is not None:
+        backend.close()
     
     print("Best Score: {} {}".format(fopt, xopt))
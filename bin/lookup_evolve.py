@@ -5,7 +5,9 @@ Usage:
     [--mu MUTATION_RATE] [--bottleneck BOTTLENECK] [--processes PROCESSORS]
     [--output OUTPUT_FILE] [--objective OBJECTIVE] [--repetitions REPETITIONS]
     [--turns TURNS] [--noise NOISE] [--nmoran NMORAN]
-    [--plays PLAYS] [--op_plays OP_PLAYS] [--op_start_plays OP_START_PLAYS]
+    [--plays PLAYS] [--op_plays OP_PLAYS] [--op_start_plays OP_START_PLAYS] [--exact]
+    [--racing]
+    [--checkpoint CHECKPOINT_FILE] [--checkpoint-interval INTERVAL] [--resume]
 
 Options:
     -h --help                   Show help
@@ -23,8 +25,14 @@ Options:
     --plays PLAYS               Number of recent plays in the lookup table [default: 2]
     --op_plays OP_PLAYS         Number of recent plays in the lookup table [default: 2]
     --op_start_plays OP_START_PLAYS   Number of opponent starting plays in the lookup table [default: 2]
+    --exact                     Compute exact expected scores instead of simulating matches
+    --racing                    Stop adding repetitions once an individual is clearly in or out of the survivors
+    --checkpoint CHECKPOINT_FILE    File to save the state of the evolution to
+    --checkpoint-interval INTERVAL  Generations between checkpoints [default: 10]
+    --resume                    Continue from the checkpoint file if it exists
 """
 
+import os
 import random
 from random import choice
 
@@ -149,6 +157,9 @@ if __name__ == '__main__':
     generations = int(arguments['--generations'])
     bottleneck = int(arguments['--bottleneck'])
     output_filename = arguments['--output']
+    racing = arguments['--racing']
+    checkpoint = arguments['--checkpoint']
+    checkpoint_interval = int(arguments['--checkpoint-interval'])
 
     # Objective
     name = str(arguments['--objective'])
@@ -156,6 +167,7 @@ if __name__ == '__main__':
     turns = int(arguments['--turns'])
     noise = float(arguments['--noise'])
     nmoran = int(arguments['--nmoran'])
+    exact = arguments['--exact']
 
     # Lookup Tables
     plays = int(arguments['--plays'])
@@ -166,7 +178,13 @@ if __name__ == '__main__':
     param_args = [plays, op_plays, op_start_plays, initial_actions,
                   mutation_rate]
 
-    objective = prepare_objective(name, turns, noise, repetitions, nmoran)
+    objective = prepare_objective(name, turns, noise, repetitions, nmoran,
+                                  exact=exact)
     population = Population(LookerUpParams, param_args, population, objective,
-                            output_filename, bottleneck, processes=processes)
-    population.run(generations)
+                            output_filename, bottleneck, processes=processes,
+                            racing=racing, checkpoint=checkpoint,
+                            checkpoint_interval=checkpoint_interval)
+    if (checkpoint and arguments['--resume'] and
+            os.path.exists(checkpoint)):
+        population.resume(checkpoint)
+    population.run(generations - population.generation)
@@ -10,7 +10,7 @@ Usage:
     [--output OUTPUT_FILE] [--objective OBJECTIVE]
     [--repetitions REPETITIONS] [--turns TURNS] [--noise NOISE]
     [--nmoran NMORAN]
-    [--plays PLAYS] [--op_plays OP_PLAYS] [--op_start_plays OP_START_PLAYS]
+    [--plays PLAYS] [--op_plays OP_PLAYS] [--op_start_plays OP_START_PLAYS] [--exact]
 
 Options:
     -h --help                   Show help
@@ -25,6 +25,7 @@ Options:
     --plays PLAYS               Number of recent plays in the lookup table [default: 2]
     --op_plays OP_PLAYS         Number of recent plays in the lookup table [default: 2]
     --op_start_plays OP_START_PLAYS     Number of opponent starting plays in the lookup table [default: 2]
+    --exact                     Compute exact expected scores instead of simulating matches
 """
 
 from docopt import docopt
@@ -49,6 +50,7 @@ if __name__ == "__main__":
     turns = int(arguments['--turns'])
     noise = float(arguments['--noise'])
     nmoran = int(arguments['--nmoran'])
+    exact = arguments['--exact']
 
     # Lookup Tables
     plays = int(arguments['--plays'])
@@ -58,7 +60,8 @@ if __name__ == "__main__":
                     "op_plays": op_plays,
                     "op_state_plays": op_start_plays}
 
-    objective = prepare_objective(name, turns, noise, repetitions, nmoran)
+    objective = prepare_objective(name, turns, noise, repetitions, nmoran,
+                                  exact=exact)
 
     pso = PSO(GamblerParams, params_kwargs, objective=objective,
               population=population, generations=generations)
@@ -0,0 +1,36 @@
+"""
+Shard worker: scores a shard written by a ShardBackend, for instance as one
+task of a batch job array.
+
+Usage:
+    shard_worker.py [-h] [--shard SHARD] [--batch BATCH] DIRECTORY
+
+Options:
+    -h --help                   Show help
+    --shard SHARD               Index of the shard to score, read from SLURM_ARRAY_TASK_ID or PBS_ARRAYID if not given
+    --batch BATCH               Batch directory to score, the current batch of DIRECTORY if not given
+
+DIRECTORY is the directory of the ShardBackend.
+"""
+import os
+import sys
+
+from docopt import docopt
+
+from axelrod_dojo.shards import current_batch, score_shard
+
+
+if __name__ == '__main__':
+    arguments = docopt(__doc__, version='Shard Worker 0.1')
+    shard = arguments['--shard']
+    for variable in ["SLURM_ARRAY_TASK_ID", "PBS_ARRAYID"]:
+        if shard is None:
+            shard = os.environ.get(variable)
+    if shard is None:
+        sys.exit("No shard given")
+
+    batch = arguments['--batch']
+    if batch is None:
+        batch = current_batch(arguments['DIRECTORY'])
+    if not score_shard(batch, int(shard)):
+        print("No shard {} in {}".format(shard, batch))
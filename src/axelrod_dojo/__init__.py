@@ -2,8 +2,18 @@ from .version import __version__
 from .archetypes.fsm import FSMParams
 from .archetypes.hmm import HMMParams
 from .archetypes.gambler import GamblerParams
+from .archetypes.arrays import FSMArrays, HMMArrays
 from .algorithms.genetic_algorithm import Population
 from .algorithms.particle_swarm_optimization import PSO
+from .algorithms.gradient_descent import GradientDescent
+from .algorithms.island_model import Islands
+from .engines.fsm import score_fsm_population
+from .cache import FitnessCache
+from .backends import (SerialBackend,
+                       MultiprocessingBackend,
+                       ProcessPoolBackend,
+                       ThreadBackend,
+                       ExecutorBackend)
 from .utils import (prepare_objective,
                     load_params,
                     Params,
@@ -1,26 +1,94 @@
+from functools import partial
 from itertools import repeat
-from multiprocessing import Pool, cpu_count
+from math import ceil
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
 from operator import itemgetter
 from random import randrange
 from statistics import mean, pstdev
+import gzip
+import os
+import pickle
+import random
+import time
 
 import axelrod as axl
+import numpy as np
+from scipy.stats import norm
 
-from axelrod_dojo.utils import Outputer, PlayerInfo, score_params
+from axelrod_dojo.archetypes.arrays import ARRAYS, FSMArrays, select
+from axelrod_dojo.archetypes.fsm import FSMParams
+from axelrod_dojo.backends import (Backend, ExecutorBackend, SerialBackend,
+                                   make_backend)
+from axelrod_dojo.engines.fsm import (TraceStore, is_traceable,
+                                      score_fsm_opponents,
+                                      score_fsm_population)
+from axelrod_dojo.engines.responses import merge_response_tries
+from axelrod_dojo.utils import (Outputer, PlayerInfo, breed_offspring,
+                                init_worker, sample_params, score_opponents,
+                                score_offspring_in_worker,
+                                score_opponents_in_worker, score_params,
+                                score_params_in_worker, write_atomically)
+
+
+def score_chunk(function, *args):
+    """Return the scores of a scoring function and the time they took."""
+    start = time.perf_counter()
+    scores = function(*args)
+    return scores, time.perf_counter() - start
 
 
 class Population(object):
-    """Population class that implements the evolutionary algorithm."""
+    """
+    Population class that implements the evolutionary algorithm.
+
+    Individuals are scored by an evaluation backend (see
+    `axelrod_dojo.backends`): `backend` is either the name of a backend
+    created for `processes` processes and closed by `close` (or on leaving
+    the population as a context manager), or a backend or
+    `concurrent.futures.Executor` supplied by the caller, which is left open.
+    By default a single process scores in the calling process and several
+    processes use a `multiprocessing.Pool`.
+
+    With `breed_in_workers` the offspring are bred from recipes (see
+    `breed_offspring`) and, when the worker processes hold the objective
+    and opponents, scored by sending each task the survivors and the recipes
+    of a batch of offspring instead of the offspring themselves, so that
+    the genomes sent each generation grow with the survivors and the
+    number of processes rather than with the population.
+
+    Each generation may also take in `immigrants` new random individuals,
+    which do not depend on the scores of the current generation: they are
+    created, and submitted for scoring with `score_params` unless the cache,
+    an evaluator, traces, racing or fidelities are used, before the current
+    generation is scored, so that the backend scores them alongside it.
+
+    With `batched` the population of FSMParams or HMMParams is held as the
+    arrays of `axelrod_dojo.archetypes.arrays` for large populations: the
+    survivors are selected by partitioning the scores and taken from the
+    arrays, and their offspring are bred with the batched operators. The
+    genomes are only built as Params instances when scoring needs them,
+    not with the `score_fsm_population` evaluator, which plays FSMArrays as
+    they are. The immigrants of a batched population are not scored ahead
+    of their generation.
+
+    With a `checkpoint` file, `run` saves the state of the evolution every
+    `checkpoint_interval` generations, from which a population built with
+    the same arguments continues with `resume`.
+    """
     def __init__(self, params_class, params_kwargs, size, objective, output_filename,
                  bottleneck=None, mutation_probability=.1, opponents=None,
                  processes=1, weights=None,
-                 sample_count=None, population=None):
+                 sample_count=None, population=None, evaluator=None,
+                 deduplicate=False, reuse_traces=False, cache=None,
+                 reevaluate="always", response_tries=False, racing=False,
+                 racing_batch=5, racing_confidence=.95, fidelities=None,
+                 promotion=.5, common_random_numbers=False,
+                 antithetic=False, chunk_time=None, backend=None,
+                 breed_in_workers=False, immigrants=0, batched=False,
+                 checkpoint=None, checkpoint_interval=10):
         self.params_class = params_class
         self.bottleneck = bottleneck
 
-        if processes == 0:
-            processes = cpu_count()
-        self.pool = Pool(processes=processes)
         self.outputer = Outputer(output_filename, mode='a')
         self.size = size
         self.objective = objective
@@ -35,6 +103,16 @@ class Population(object):
             self.opponents_information = [
                     PlayerInfo(p.__class__, p.init_kwargs) for p in opponents]
         self.generation = 0
+        if reevaluate not in ["always", "never", "average"]:
+            raise ValueError("reevaluate must be one of always, never, or "
+                             "average")
+        self.reevaluate = reevaluate
+        if batched and params_class not in ARRAYS:
+            raise ValueError("batched breeding is not available for "
+                             "{}".format(params_class.__name__))
+        if batched and breed_in_workers:
+            raise ValueError("batched can not be combined with "
+                             "breed_in_workers")
 
         self.params_kwargs = params_kwargs
         if "mutation_probability" not in self.params_kwargs:
@@ -45,25 +123,483 @@ class Population(object):
         else:
             self.population = [params_class(**params_kwargs)
                                for _ in range(self.size)]
+        if batched:
+            self.population = ARRAYS[params_class].from_params(
+                self.population, self.params_kwargs["mutation_probability"])
 
         self.weights = weights
         self.sample_count = sample_count
+        self.evaluator = evaluator
+        self.deduplicate = deduplicate
+        # Traces are recorded from the transitions of finite state machines
+        if reuse_traces and not issubclass(params_class, FSMParams):
+            raise ValueError("reuse_traces can only be used with FSMParams")
+        self.reuse_traces = reuse_traces
+        self.traces = TraceStore()
+        self.cache = cache
+        self.response_tries = response_tries
+        if racing and racing_batch < 2:
+            raise ValueError("racing_batch must be at least 2")
+        if racing and not (isinstance(objective, partial) and
+                           "repetitions" in objective.keywords):
+            raise ValueError("racing needs an objective from "
+                             "prepare_objective, with a number of "
+                             "repetitions")
+        self.racing = racing
+        self.racing_batch = racing_batch
+        self.racing_confidence = racing_confidence
+        self.fidelities = [] if fidelities is None else fidelities
+        self.promotion = promotion
+        # With common random numbers every individual scored in a generation
+        # plays each repetition against an opponent on the same random
+        # stream, derived from a seed drawn once per generation
+        self.common_random_numbers = common_random_numbers
+        self.antithetic = antithetic
+        self.generation_seed = None
+        # Seeds of the coming generations drawn ahead of time, to score
+        # immigrants before their generation
+        self.seeds = []
+        # The target duration in seconds of an (individual, opponent chunk)
+        # scoring task, and the number of opponents per task it led to
+        self.chunk_time = chunk_time
+        self.chunk_size = None
+        if breed_in_workers and chunk_time is not None:
+            raise ValueError("breed_in_workers can not be combined with "
+                             "chunk_time")
+        # The survivors the offspring were bred from, and the (individual,
+        # recipe) of the population by id
+        self.breed_in_workers = breed_in_workers
+        self.parents = []
+        self.recipes = {}
+        # The (individual, future of its score) of the immigrants submitted
+        # for scoring ahead of their generation, by id
+        self.immigrants = immigrants
+        self.speculative = {}
+        self.batched = batched
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+
+        # The worker processes of a backend created here keep the objective
+        # and opponents, so that scoring tasks only carry the individuals
+        if isinstance(backend, Executor):
+            backend = ExecutorBackend(backend)
+        self.owns_pool = not isinstance(backend, Backend)
+        if self.owns_pool:
+            self.worker_setup = (self.objective, self.opponents_information,
+                                 self.weights, self.response_tries)
+            self.pool = make_backend(processes, backend, init_worker,
+                                     self.worker_setup)
+        else:
+            self.pool = backend
+        if not (self.owns_pool and self.pool.resident):
+            self.worker_setup = None
+        # The random streams of common random numbers replace the random
+        # state of the process running a task, which threads share
+        if common_random_numbers and self.pool.threaded:
+            self.close()
+            raise ValueError("common_random_numbers can not be used with a "
+                             "backend running tasks in threads")
+        self.processes = self.pool.processes
+        # The (score, number of evaluations, fidelity level) of the
+        # individuals at the start of the population that survived the
+        # previous generation
+        self.known_scores = []
 
     def score_all(self):
+        if self.common_random_numbers:
+            self.generation_seed = (self.seeds.pop(0) if self.seeds
+                                    else randrange(2 ** 32))
+        known = self.known_scores + [None] * (
+            len(self.population) - len(self.known_scores))
+        to_score = [i for i, record in enumerate(known)
+                    if record is None or self.reevaluate != "never"]
+
+        # Identical (or, when deduplicating, behaviourally identical)
+        # individuals are only scored once
+        if self.batched:
+            genomes = self.population.take(to_score)
+            individuals = None
+            if self.deduplicate:
+                individuals = genomes.to_params()
+                keys = [repr(params.canonical_form())
+                        for params in individuals]
+            else:
+                keys = genomes.keys()
+        elif self.deduplicate:
+            keys = [repr(self.population[i].canonical_form())
+                    for i in to_score]
+        else:
+            keys = [repr(self.population[i]) for i in to_score]
+        representatives = {}
+        for j, (key, i) in enumerate(zip(keys, to_score)):
+            representatives.setdefault(key, j)
+        unique = list(representatives.values())
+        if not self.batched:
+            population = [self.population[to_score[j]] for j in unique]
+            results = self.score_by_fidelity(population)
+        elif individuals is None and self.scores_arrays(genomes):
+            results = [(score, 0) for score in self.evaluator(
+                genomes.take(unique), self.objective,
+                self.opponents_information, self.weights, self.sample_count)]
+        else:
+            if individuals is None:
+                individuals = genomes.take(unique).to_params()
+            else:
+                individuals = [individuals[j] for j in unique]
+            results = self.score_by_fidelity(individuals)
+        new_scores = dict(zip(representatives, results))
+
+        full = len(self.fidelities)
+        for key, i in zip(keys, to_score):
+            score, level = new_scores[key]
+            if (known[i] is not None and self.reevaluate == "average" and
+                    level == full):
+                old_score, count, _ = known[i]
+                known[i] = ((old_score * count + score) / (count + 1),
+                            count + 1, level)
+            else:
+                known[i] = (score, 1, level)
+        self.known_scores = known
+        return [score for score, _, _ in known]
+
+    def scores_arrays(self, genomes):
+        """Return True if a batched population is scored by passing its
+        arrays to the evaluator, which is the case of FSMArrays with the
+        `score_fsm_population` evaluator and no cache, fidelities, racing
+        or traces."""
+        return (isinstance(genomes, FSMArrays) and
+                self.evaluator is score_fsm_population and
+                self.cache is None and not self.fidelities and
+                not self.racing and not self.reuse_traces)
+
+    def score_by_fidelity(self, population):
+        """
+        Return the (score, fidelity level) of each individual.
+
+        Without fidelities every individual is scored at full fidelity, level
+        0. Otherwise the individuals are scored by successive halving: all of
+        them at the first fidelity level, then only the best `promotion`
+        fraction of them (and at least `bottleneck`) at each following level,
+        ending with the objective itself at level `len(fidelities)`.
+
+        Each fidelity is a dictionary of objective keywords to override, such
+        as turns and repetitions, and optionally a sample_count.
+        """
+        results = [None] * len(population)
+        candidates = list(range(len(population)))
+        for level, fidelity in enumerate(self.fidelities):
+            fidelity = dict(fidelity)
+            sample_count = fidelity.pop("sample_count", self.sample_count)
+            objective = partial(self.objective, **fidelity)
+            individuals = [population[i] for i in candidates]
+            if self.evaluator is not None:
+                scores = self.evaluator(individuals, objective,
+                                        self.opponents_information,
+                                        self.weights, sample_count)
+            else:
+                scores = self.score_in_pool(individuals, objective,
+                                            sample_count)
+            for i, score in zip(candidates, scores):
+                results[i] = (score, level)
+            promoted = max(self.bottleneck,
+                           ceil(len(candidates) * self.promotion))
+            ranked = sorted(zip(scores, candidates), key=itemgetter(0),
+                            reverse=True)
+            candidates = sorted(i for _, i in ranked[:promoted])
+
+        scores = self.score_population([population[i] for i in candidates])
+        for i, score in zip(candidates, scores):
+            results[i] = (score, len(self.fidelities))
+        return results
+
+    def score_population(self, population):
+        if self.cache is None:
+            return self.evaluate(population)
+        keys = [self.cache.key(params, self.objective,
+                               self.opponents_information, self.weights,
+                               self.sample_count)
+                for params in population]
+        scores = self.cache.get_many(keys)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            new_scores = self.evaluate([population[i] for i in missing])
+            for i, score in zip(missing, new_scores):
+                scores[i] = score
+            self.cache.set_many([(keys[i], scores[i]) for i in missing])
+        return scores
+
+    def evaluate(self, population):
+        if self.racing:
+            return self.race(population)
+        if (self.reuse_traces and self.sample_count is None and
+                is_traceable(self.objective)):
+            return self.score_with_traces(population)
+        if self.evaluator is not None:
+            return self.evaluator(population, self.objective,
+                                  self.opponents_information, self.weights,
+                                  self.sample_count)
+        return self.score_in_pool(population, self.objective,
+                                  self.sample_count)
+
+    def workers_hold(self, objective):
+        """Return True if the worker processes hold the objective and the
+        current opponents, weights and response tries."""
+        if self.worker_setup is None:
+            return False
+        current = (objective, self.opponents_information, self.weights,
+                   self.response_tries)
+        return all(held is now for held, now in zip(self.worker_setup,
+                                                    current))
+
+    def score_in_pool(self, population, objective, sample_count):
+        """Score a list of individuals with `score_params` in the pool."""
+        # Immigrants submitted ahead of time only wait for their scores
+        futures = {}
+        for i, params in enumerate(population):
+            entry = self.speculative.pop(id(params), None)
+            if entry is not None and entry[0] is params:
+                futures[i] = entry[1]
+        if futures:
+            others = [i for i in range(len(population)) if i not in futures]
+            scores = [None] * len(population)
+            if others:
+                for i, score in zip(others, self.score_in_pool(
+                        [population[i] for i in others], objective,
+                        sample_count)):
+                    scores[i] = score
+            for i, future in futures.items():
+                scores[i] = future.result()
+            return scores
+        if self.breed_in_workers and self.workers_hold(objective):
+            return self.score_offspring(population, sample_count)
+        if self.chunk_time is not None:
+            return self.score_in_chunks(population, objective, sample_count)
+        if self.workers_hold(objective):
+            starmap_params = zip(
+                population,
+                repeat(sample_count),
+                repeat('player'),
+                repeat(self.generation_seed),
+                repeat(self.antithetic))
+            return self.pool.starmap(score_params_in_worker, starmap_params)
         starmap_params = zip(
-            self.population,
-            repeat(self.objective),
+            population,
+            repeat(objective),
             repeat(self.opponents_information),
             repeat(self.weights),
-            repeat(self.sample_count))
+            repeat(sample_count),
+            repeat('player'),
+            repeat(self.response_tries),
+            repeat(self.generation_seed),
+            repeat(self.antithetic))
         results = self.pool.starmap(score_params, starmap_params)
         return results
 
+    def score_offspring(self, population, sample_count):
+        """
+        Score a list of individuals in the worker processes, which breed
+        those with a recipe from the survivors, in one batch per process.
+        The other individuals, such as those of the first generation, are
+        sent to the workers.
+        """
+        bred, others = [], []
+        for i, params in enumerate(population):
+            if self.recipes.get(id(params), (None,))[0] is params:
+                bred.append(i)
+            else:
+                others.append(i)
+        scores = [None] * len(population)
+        processes = self.pool.processes
+        batches = [bred[k::processes] for k in range(processes)]
+        batches = [batch for batch in batches if batch]
+        if batches:
+            starmap_params = [
+                (self.parents, [self.recipes[id(population[i])][1]
+                                for i in batch],
+                 self.params_class, self.params_kwargs, sample_count,
+                 self.generation_seed, self.antithetic)
+                for batch in batches]
+            for batch, batch_scores in zip(batches, self.pool.starmap(
+                    score_offspring_in_worker, starmap_params,
+                    chunksize=1)):
+                for i, score in zip(batch, batch_scores):
+                    scores[i] = score
+        if others:
+            starmap_params = zip(
+                [population[i] for i in others],
+                repeat(sample_count),
+                repeat('player'),
+                repeat(self.generation_seed),
+                repeat(self.antithetic))
+            for i, score in zip(others, self.pool.starmap(
+                    score_params_in_worker, starmap_params)):
+                scores[i] = score
+        return scores
+
+    def score_in_chunks(self, population, objective, sample_count):
+        """
+        Score a list of individuals in the pool with one task per individual
+        and chunk of opponents, so that small populations keep every process
+        busy, and average the scores of the chunks of each individual.
+
+        The number of opponents per task is adapted to the measured time of
+        the tasks of the previous call, aiming at `chunk_time` seconds per
+        task, while leaving at least two tasks per process.
+        """
+        num_opponents = len(self.opponents_information)
+        if sample_count is None:
+            indices = [list(range(num_opponents)) for _ in population]
+        else:
+            indices = [list(np.random.choice(num_opponents, sample_count))
+                       for _ in population]
+        num_scores = sum(map(len, indices))
+        if num_scores == 0:
+            return []
+        largest = max(1, num_scores // (2 * self.pool.processes))
+        chunk_size = min(self.chunk_size or largest, largest)
+        tasks = [(g, genome_indices[i:i + chunk_size])
+                 for g, genome_indices in enumerate(indices)
+                 for i in range(0, len(genome_indices), chunk_size)]
+        if self.workers_hold(objective):
+            starmap_params = [(score_opponents_in_worker, population[g],
+                               chunk, 'player', self.generation_seed,
+                               self.antithetic) for g, chunk in tasks]
+        else:
+            starmap_params = [(score_opponents, population[g], objective,
+                               self.opponents_information, chunk, 'player',
+                               self.response_tries, self.generation_seed,
+                               self.antithetic) for g, chunk in tasks]
+        results = self.pool.starmap(score_chunk, starmap_params, chunksize=1)
+
+        opponent_scores = [[] for _ in population]
+        total_time = 0
+        for (g, _), (scores, duration) in zip(tasks, results):
+            opponent_scores[g].extend(scores)
+            total_time += duration
+        if total_time > 0:
+            self.chunk_size = max(1, int(self.chunk_time * num_scores /
+                                         total_time))
+
+        scores = []
+        for genome_scores, genome_indices in zip(opponent_scores, indices):
+            weights = self.weights
+            if weights is not None:
+                weights = [weights[i] for i in genome_indices]
+            scores.append(np.average(genome_scores, weights=weights))
+        return scores
+
+    def score_with_traces(self, population):
+        """
+        Score a list of FSMParams instances, only playing the deterministic
+        matches whose outcome can not be inherited from the traces of the
+        previously scored generation.
+        """
+        num_opponents = len(self.opponents_information)
+        inherited = [self.traces.inherited(params) for params in population]
+        indices = [[i for i in range(num_opponents) if i not in known]
+                   for known in inherited]
+        starmap_params = zip(
+            population,
+            repeat(self.objective),
+            repeat(self.opponents_information),
+            indices)
+        played = self.pool.starmap(score_fsm_opponents, starmap_params)
+
+        self.traces = TraceStore()
+        scores = []
+        for params, known, missing, results in zip(population, inherited,
+                                                   indices, played):
+            known.update(zip(missing, results))
+            results = [known[i] for i in range(num_opponents)]
+            self.traces.add(params, results)
+            scores.append(np.average([score for score, _ in results],
+                                     weights=self.weights))
+        return scores
+
+    def race(self, population):
+        """
+        Score a list of individuals by racing: repetitions are added in
+        batches of `racing_batch`, up to the repetitions of the objective,
+        until a confidence interval of each individual's score shows whether
+        it is in or out of the `bottleneck` best individuals. A match that
+        turns out to be deterministic, giving a single score for a batch of
+        repetitions, is not played again.
+        """
+        num_opponents = len(self.opponents_information)
+        if self.sample_count is not None:
+            indices = [np.random.choice(num_opponents, self.sample_count)
+                       for _ in population]
+        else:
+            indices = [np.arange(num_opponents) for _ in population]
+        weights = []
+        for genome_indices in indices:
+            if self.weights is None:
+                genome_weights = np.ones(len(genome_indices))
+            else:
+                genome_weights = np.array(self.weights,
+                                          dtype=float)[genome_indices]
+            weights.append(genome_weights / genome_weights.sum())
+
+        z = norm.ppf((1 + self.racing_confidence) / 2)
+        cut = min(self.bottleneck, len(population))
+        samples = [[[] for _ in genome_indices] for genome_indices in indices]
+        # The positions in indices of the opponents still to play
+        playing = [list(range(len(genome_indices)))
+                   for genome_indices in indices]
+        repetitions = 0
+        racing = list(range(len(population)))
+        while racing:
+            batch = min(self.racing_batch,
+                        self.objective.keywords["repetitions"] - repetitions)
+            repetitions += batch
+            racing = [g for g in racing if playing[g]]
+            starmap_params = zip(
+                [population[g] for g in racing],
+                repeat(self.objective),
+                [[self.opponents_information[indices[g][k]]
+                  for k in playing[g]] for g in racing],
+                repeat(batch))
+            for g, new_samples in zip(racing, self.pool.starmap(
+                    sample_params, starmap_params)):
+                for k, new in zip(playing[g], new_samples):
+                    samples[g][k].extend(new)
+                if batch > 1:
+                    playing[g] = [k for k, new in zip(playing[g], new_samples)
+                                  if len(new) > 1]
+
+            means, errors = [], []
+            for genome_samples, genome_weights in zip(samples, weights):
+                means.append(sum(w * np.mean(s) for w, s in
+                                 zip(genome_weights, genome_samples)))
+                errors.append(np.sqrt(sum(
+                    w ** 2 * np.var(s, ddof=1) / len(s)
+                    for w, s in zip(genome_weights, genome_samples)
+                    if len(s) > 1)))
+            if repetitions >= self.objective.keywords["repetitions"]:
+                break
+            # Individuals stop once they are clearly on one side of the
+            # score separating the survivors from the rest
+            ranked = sorted(means, reverse=True)
+            if cut == len(population):
+                threshold = -np.inf
+            else:
+                threshold = (ranked[cut - 1] + ranked[cut]) / 2
+            racing = [g for g in racing
+                      if abs(means[g] - threshold) <= z * errors[g]]
+        return means
+
     def subset_population(self, indices):
-        population = []
-        for i in indices:
-            population.append(self.population[i])
-        self.population = population
+        if self.batched:
+            self.population = self.population.take(list(indices))
+        else:
+            population = []
+            for i in indices:
+                population.append(self.population[i])
+            self.population = population
+        if all(i < len(self.known_scores) for i in indices):
+            self.known_scores = [self.known_scores[i] for i in indices]
+        else:
+            self.known_scores = []
 
     @staticmethod
     def crossover(population, num_variants):
@@ -79,39 +615,215 @@ class Population(object):
         self.generation += 1
         print("Scoring Generation {}".format(self.generation))
 
-        # Score population
+        immigrants, upcoming = self.speculate()
+        # Score population, ranking individuals scored at a higher fidelity
+        # first
         scores = self.score_all()
-        results = list(zip(scores, range(len(scores))))
-        results.sort(key=itemgetter(0), reverse=True)
+        self.speculative = upcoming
+        levels = [level for _, _, level in self.known_scores]
+        if self.batched and not self.fidelities:
+            results = [(scores[p], p) for p in select(scores,
+                                                      self.bottleneck)]
+        else:
+            results = list(zip(scores, range(len(scores))))
+            results.sort(key=lambda result: (levels[result[1]], result[0]),
+                         reverse=True)
 
         # Report
         print("Generation", self.generation, "| Best Score:", results[0][0],
               repr(self.population[results[0][1]]))
-        # Write the data
-        row = [self.generation, mean(scores), pstdev(scores), results[0][0],
-               repr(self.population[results[0][1]])]
+        # Write the data, with the mean and standard deviation of the
+        # scores at the highest fidelity level reached
+        top = max(levels)
+        top_scores = [score for score, level in zip(scores, levels)
+                      if level == top]
+        row = [self.generation, mean(top_scores), pstdev(top_scores),
+               results[0][0], repr(self.population[results[0][1]])]
         self.outputer.write(row)
 
         ## Next Population
         indices_to_keep = [p for (s, p) in results[0: self.bottleneck]]
         self.subset_population(indices_to_keep)
-        # Add mutants of the best players
-        best_mutants = [p.copy() for p in self.population]
-        for p in best_mutants:
-            p.mutate()
-            self.population.append(p)
-        # Add random variants
-        random_params = [self.params_class(**self.params_kwargs)
-                         for _ in range(self.bottleneck // 2)]
-        params_to_modify = [params.copy() for params in self.population]
-        params_to_modify += random_params
-        # Crossover
-        size_left = self.size - len(params_to_modify)
-        params_to_modify = self.crossover(params_to_modify, size_left)
-        # Mutate
-        for p in params_to_modify:
-            p.mutate()
-        self.population += params_to_modify
+        if self.breed_in_workers:
+            self.breed_from_recipes()
+        elif self.batched:
+            offspring = self.population.breed(self.size - self.immigrants,
+                                              self.bottleneck // 2)
+            self.population = self.population.concatenate(offspring)
+        else:
+            # Add mutants of the best players
+            best_mutants = [p.copy() for p in self.population]
+            for p in best_mutants:
+                p.mutate()
+                self.population.append(p)
+            # Add random variants
+            random_params = [self.params_class(**self.params_kwargs)
+                             for _ in range(self.bottleneck // 2)]
+            params_to_modify = [params.copy() for params in self.population]
+            params_to_modify += random_params
+            # Crossover
+            size_left = self.size - len(params_to_modify) - self.immigrants
+            params_to_modify = self.crossover(params_to_modify, size_left)
+            # Mutate
+            for p in params_to_modify:
+                p.mutate()
+            self.population += params_to_modify
+        self.extend(immigrants)
+
+    def extend(self, individuals):
+        """Add a list of individuals at the end of the population."""
+        if not self.batched:
+            self.population += individuals
+        elif individuals:
+            self.population = self.population.concatenate(
+                ARRAYS[self.params_class].from_params(
+                    individuals, self.params_kwargs["mutation_probability"]))
+
+    def speculate(self):
+        """
+        Return the immigrants of the next generation and the futures of
+        their scores by id, submitting them for scoring with `score_params`
+        (and, with common random numbers, the seed of the next generation)
+        when that is how the population is scored.
+        """
+        immigrants = [self.params_class(**self.params_kwargs)
+                      for _ in range(self.immigrants)]
+        if (not immigrants or self.batched or self.evaluator is not None or
+                self.cache is not None or self.reuse_traces or
+                self.racing or self.fidelities):
+            return immigrants, {}
+        seed = None
+        if self.common_random_numbers:
+            while len(self.seeds) < 2:
+                self.seeds.append(randrange(2 ** 32))
+            seed = self.seeds[1]
+        return immigrants, {id(params): (params,
+                                         self.submit_score(params, seed))
+                            for params in immigrants}
+
+    def breed_from_recipes(self):
+        """
+        Add offspring to the survivors in the proportions of `evolve`,
+        breeding each of them from a recipe kept for the worker processes.
+        """
+        self.parents = list(self.population)
+        survivors = [("survivor", (i,), None)
+                     for i in range(len(self.parents))]
+        mutants = [("mutant", (recipe,), randrange(2 ** 32))
+                   for recipe in survivors]
+        random_variants = [("random", (), randrange(2 ** 32))
+                           for _ in range(self.bottleneck // 2)]
+        candidates = survivors + mutants + random_variants
+        crossovers = [
+            ("crossover", (candidates[randrange(len(candidates))],
+                           candidates[randrange(len(candidates))]),
+             randrange(2 ** 32))
+            for _ in range(self.size - len(candidates) - self.immigrants)]
+        recipes = survivors + mutants + crossovers
+        self.population = [
+            breed_offspring(self.parents, recipe, self.params_class,
+                            self.params_kwargs)
+            for recipe in recipes]
+        self.recipes = {id(params): (params, recipe)
+                        for params, recipe in zip(self.population, recipes)}
+
+    def breed(self, ranked):
+        """
+        Return an offspring of the `bottleneck` best of a list of individuals
+        ranked from best, in the proportions of `evolve`: a mutant of one of
+        them, or otherwise a mutated crossover of two of them or of random
+        variants.
+        """
+        parents = ranked[:self.bottleneck]
+        if randrange(self.size) < len(parents):
+            child = parents[randrange(len(parents))].copy()
+        else:
+            candidates = len(parents) + self.bottleneck // 2
+            first, second = [
+                parents[k] if k < len(parents)
+                else self.params_class(**self.params_kwargs)
+                for k in (randrange(candidates), randrange(candidates))]
+            child = first.crossover(second)
+        child.mutate()
+        return child
+
+    def submit_score(self, params, generation_seed=None):
+        """Return a future of the score of an individual, played on the
+        random streams of the given generation seed or otherwise of the
+        current one."""
+        if generation_seed is None:
+            generation_seed = self.generation_seed
+        if self.workers_hold(self.objective):
+            return self.pool.submit(score_params_in_worker, params,
+                                    self.sample_count, 'player',
+                                    generation_seed, self.antithetic)
+        return self.pool.submit(score_params, params, self.objective,
+                                self.opponents_information, self.weights,
+                                self.sample_count, 'player',
+                                self.response_tries, generation_seed,
+                                self.antithetic)
+
+    def run_steady_state(self, evaluations):
+        """
+        Evolve by steady-state replacement for a number of evaluations,
+        without waiting for a whole generation to be scored.
+
+        Twice as many individuals as processes are scored at a time, one
+        per task. As soon as a score arrives the individual takes the place
+        of the worst one of the population if it scores better (or joins the
+        population while it is not full) and an offspring bred from the
+        current best individuals is submitted. A row is written to the output
+        every `size` evaluations, counted as a generation.
+
+        Individuals are scored with `score_params`: the cache, traces, racing
+        and fidelities are not used. Checkpoints and batched populations are
+        not supported.
+        """
+        if self.checkpoint is not None:
+            raise ValueError("Steady-state evolution can not be "
+                             "checkpointed")
+        if self.batched:
+            raise ValueError("Steady-state evolution can not be batched")
+        members = []
+        queue = list(self.population)
+        running = {}
+        submitted = completed = 0
+        while completed < evaluations:
+            while (len(running) < 2 * self.pool.processes and
+                   submitted < evaluations and (queue or members)):
+                if self.common_random_numbers and submitted % self.size == 0:
+                    self.generation_seed = randrange(2 ** 32)
+                if queue:
+                    params = queue.pop(0)
+                else:
+                    params = self.breed([params for _, params in members])
+                running[self.submit_score(params)] = params
+                submitted += 1
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                params = running.pop(future)
+                score = future.result()
+                completed += 1
+                if len(members) < self.size:
+                    members.append((score, params))
+                elif score > members[-1][0]:
+                    members[-1] = (score, params)
+                members.sort(key=itemgetter(0), reverse=True)
+
+                if completed % self.size == 0:
+                    self.generation += 1
+                    scores = [score for score, _ in members]
+                    print("Generation", self.generation, "| Best Score:",
+                          scores[0], repr(members[0][1]))
+                    self.outputer.write([self.generation, mean(scores),
+                                         pstdev(scores), scores[0],
+                                         repr(members[0][1])])
+
+        self.population = [params for _, params in members]
+        self.known_scores = [(score, 1, len(self.fidelities))
+                             for score, _ in members]
+        self.outputer.close()
 
     def __iter__(self):
         return self
@@ -120,6 +832,106 @@ class Population(object):
         self.evolve()
 
     def run(self, generations):
+        """Evolve for a number of generations, then close the output file
+        and the backend, unless it was supplied. Individuals scored after
+        the run are scored in the calling process."""
         for _ in range(generations):
             next(self)
-        self.outputer.close()
+            if (self.checkpoint is not None and
+                    self.generation % self.checkpoint_interval == 0):
+                self.save_checkpoint(self.checkpoint)
+        self.close()
+
+    def save_response_tries(self):
+        """Save the response tries of this process, merged with those saved
+        by worker processes that have stopped, when `response_tries` names
+        a file. Worker processes save their tries when they stop, which for
+        a backend created by the population is when it is closed."""
+        if isinstance(self.response_tries, str):
+            merge_response_tries(self.response_tries)
+
+    def save_checkpoint(self, filename):
+        """
+        Write the state of the evolution to a file, compressed and
+        atomically: the population and the scores of its survivors, the
+        generation, the parameters of new individuals, the random states of
+        the process, the traces, the seeds drawn ahead and the length of the
+        output file.
+
+        Immigrants scored ahead of time are saved without their scores, and
+        the random states of worker processes are not saved. The fitness
+        cache keeps its own file, and so do the response tries when
+        `response_tries` names a file (see `save_response_tries`);
+        otherwise response tries are not saved and are built again.
+        """
+        self.save_response_tries()
+        self.outputer.output.flush()
+        # Only individuals bred in workers have recipes
+        recipes = []
+        if self.breed_in_workers:
+            for params in self.population:
+                entry = self.recipes.get(id(params), (None, None))
+                recipes.append(entry[1] if entry[0] is params else None)
+        state = {"params_class": self.params_class,
+                 "params_kwargs": self.params_kwargs,
+                 "generation": self.generation,
+                 "population": self.population,
+                 "known_scores": self.known_scores,
+                 "parents": self.parents,
+                 "recipes": recipes,
+                 "traces": self.traces,
+                 "chunk_size": self.chunk_size,
+                 "seeds": self.seeds,
+                 "random_state": random.getstate(),
+                 "numpy_state": np.random.get_state(),
+                 "output_size": self.outputer.output.tell()}
+        write_atomically(filename, gzip.compress(
+            pickle.dumps(state, pickle.HIGHEST_PROTOCOL)))
+
+    def resume(self, filename):
+        """
+        Continue the evolution saved by `save_checkpoint`, dropping the rows
+        written to the output file after the checkpoint.
+        """
+        with open(filename, "rb") as f:
+            state = pickle.loads(gzip.decompress(f.read()))
+        if state["params_class"] is not self.params_class:
+            raise ValueError("The checkpoint holds {} individuals".format(
+                state["params_class"].__name__))
+        self.params_kwargs = state["params_kwargs"]
+        self.generation = state["generation"]
+        self.population = state["population"]
+        self.known_scores = state["known_scores"]
+        self.parents = state["parents"]
+        self.recipes = {}
+        if state["recipes"]:
+            self.recipes = {id(params): (params, recipe)
+                            for params, recipe in zip(self.population,
+                                                      state["recipes"])
+                            if recipe is not None}
+        self.speculative = {}
+        self.traces = state["traces"]
+        self.chunk_size = state["chunk_size"]
+        self.seeds = state["seeds"]
+        random.setstate(state["random_state"])
+        np.random.set_state(state["numpy_state"])
+        output = self.outputer.output
+        output.flush()
+        if os.fstat(output.fileno()).st_size > state["output_size"]:
+            output.truncate(state["output_size"])
+
+    def close(self):
+        """Close the output file and the backend, unless it was supplied."""
+        if not self.outputer.output.closed:
+            self.outputer.close()
+        if self.owns_pool:
+            self.pool.close()
+            self.pool = SerialBackend()
+            self.worker_setup = None
+        self.save_response_tries()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,107 @@
+from functools import partial
+
+import axelrod as axl
+import numpy as np
+from scipy.optimize import minimize
+
+from axelrod_dojo.engines.markov import (expected_payoff_gradient,
+                                         payoff_matrices, player_model)
+from axelrod_dojo.utils import (PlayerInfo, objective_expected_score,
+                                objective_expected_score_diff,
+                                objective_score, objective_score_diff)
+
+
+class GradientDescent(object):
+    """
+    GradientDescent class that trains a vector of cooperation probabilities
+    with L-BFGS-B, using the exact gradient of the expected score.
+
+    The params class must implement `create_vector_bounds`, `receive_vector`
+    and `chain_model`, and every opponent must be describable as a finite
+    Markov chain (see `axelrod_dojo.engines.markov`). By default the
+    opponents are the short run time strategies that are.
+
+    Parameters
+    ----------
+    starts : integer
+        The number of optimisations, each from a random vector within the
+        bounds. The best result is kept.
+    iterations : integer
+        The maximum number of L-BFGS-B iterations of each optimisation.
+    """
+    def __init__(self, params_class, params_kwargs, objective, opponents=None,
+                 starts=1, iterations=100, debug=True, weights=None):
+
+        if not (isinstance(objective, partial) and objective.func in (
+                objective_score, objective_score_diff,
+                objective_expected_score, objective_expected_score_diff)):
+            raise ValueError("Gradient descent is only available for score "
+                             "and score_diff")
+        self.params_class = params_class
+        self.params_kwargs = params_kwargs
+        self.objective = objective
+        if opponents is None:
+            opponents = [s() for s in axl.short_run_time_strategies]
+            opponents = [p for p in opponents if player_model(p) is not None]
+        self.opponents_information = [
+                PlayerInfo(p.__class__, p.init_kwargs) for p in opponents]
+        self.starts = starts
+        self.iterations = iterations
+        self.debug = debug
+        self.weights = weights
+
+        self.opponent_models = []
+        for strategy, init_kwargs in self.opponents_information:
+            model = player_model(strategy(**init_kwargs))
+            if model is None:
+                raise ValueError("{} can not be described as a finite Markov "
+                                 "chain".format(strategy.name))
+            self.opponent_models.append(model)
+
+        self.turns = objective.keywords["turns"]
+        self.noise = objective.keywords["noise"]
+        my_payoffs, their_payoffs = payoff_matrices()
+        if objective.func in (objective_score_diff,
+                              objective_expected_score_diff):
+            self.payoffs = my_payoffs - their_payoffs
+        else:
+            self.payoffs = my_payoffs
+        self.evaluations = 0
+
+    def score_gradient(self, params):
+        """Return the weighted mean expected score of params against the
+        opponents and its gradient with respect to the vector."""
+        model, indices = params.chain_model()
+        table = indices >= 0
+        scores, gradients = [], []
+        for opponent_model in self.opponent_models:
+            total, gradient = expected_payoff_gradient(
+                model, opponent_model, self.turns, self.noise, self.payoffs)
+            scores.append(total / self.turns)
+            gradients.append(np.bincount(
+                indices[table], weights=gradient[table],
+                minlength=len(params.vector)) / self.turns)
+        self.evaluations += 1
+        return (np.average(scores, weights=self.weights),
+                np.average(gradients, axis=0, weights=self.weights))
+
+    def optimize(self):
+        params = self.params_class(**self.params_kwargs)
+        lb, ub = params.create_vector_bounds()
+
+        def objective_function(vector):
+            params.receive_vector(vector=vector)
+            score, gradient = self.score_gradient(params)
+            return -score, -gradient
+
+        xopt, fopt = None, np.inf
+        for start in range(self.starts):
+            x0 = np.random.uniform(lb, ub)
+            result = minimize(objective_function, x0, jac=True,
+                              method="L-BFGS-B", bounds=list(zip(lb, ub)),
+                              options={"maxiter": self.iterations})
+            if self.debug:
+                print("Start", start + 1, "| Score:", -result.fun)
+            if result.fun < fopt:
+                xopt, fopt = result.x, result.fun
+        return xopt, fopt
@@ -0,0 +1,146 @@
+import os
+from multiprocessing import Process, Queue
+from operator import itemgetter
+from queue import Empty
+from random import randrange
+
+import axelrod as axl
+
+from axelrod_dojo.algorithms.genetic_algorithm import Population
+
+
+def neighbours(topology, islands):
+    """
+    Return the islands each island sends its migrants to.
+
+    The topology is either ring, where each island sends to the next one,
+    complete, where each island sends to all others, or a list of the
+    neighbours of each island.
+    """
+    if topology == "ring":
+        return [[(i + 1) % islands] if islands > 1 else []
+                for i in range(islands)]
+    if topology == "complete":
+        return [[j for j in range(islands) if j != i] for i in range(islands)]
+    if isinstance(topology, str) or len(topology) != islands:
+        raise ValueError("topology must be ring, complete or a list of the "
+                         "neighbours of each island")
+    return [list(island_neighbours) for island_neighbours in topology]
+
+
+def island_filename(output_filename, island):
+    root, extension = os.path.splitext(output_filename)
+    return "{}_{}{}".format(root, island, extension)
+
+
+def run_island(island, seed, generations, migration_interval, migrants,
+               inboxes, island_neighbours, num_senders, results,
+               population_args, population_kwargs):
+    """Evolve the population of an island, exchanging migrants with its
+    neighbours, and put its ranked (score, individual) survivors in the
+    results queue."""
+    axl.seed(seed)
+    population = Population(*population_args, **population_kwargs)
+    for generation in range(1, generations + 1):
+        population.evolve()
+        if generation % migration_interval or generation == generations:
+            continue
+        # The best individuals come first
+        emigrants = [params.copy()
+                     for params in population.population[:migrants]]
+        for neighbour in island_neighbours:
+            inboxes[neighbour].put(emigrants)
+        immigrants = [params for _ in range(num_senders)
+                      for params in inboxes[island].get()]
+        # and immigrants take the place of the newest offspring
+        immigrants = immigrants[:len(population.population) -
+                                len(population.known_scores)]
+        if immigrants:
+            kept = len(population.population) - len(immigrants)
+            population.population = population.population[:kept]
+            population.extend(immigrants)
+    population.close()
+    results.put((island, [(score, params) for (score, _, _), params in
+                          zip(population.known_scores,
+                              population.population)]))
+
+
+class Islands(object):
+    """
+    Island model: several populations evolving in parallel in their own
+    processes, exchanging their best individuals.
+
+    Each island is a `Population` built from the given arguments, scoring
+    its own individuals (in its process unless `processes` is given) and
+    writing to its own output file, the island number being appended to
+    the output file name. Every `migration_interval` generations each island
+    sends copies of its `migrants` best individuals to its neighbours, where
+    they replace the newest offspring.
+
+    Parameters
+    ----------
+    islands : integer
+        The number of islands.
+    topology : string or list
+        ring, complete or a list of the neighbours of each island (see
+        `neighbours`).
+    migration_interval : integer
+        The number of generations between migrations.
+    migrants : integer
+        The number of individuals each island sends to each neighbour.
+    """
+    def __init__(self, params_class, params_kwargs, size, objective,
+                 output_filename, islands=4, topology="ring",
+                 migration_interval=10, migrants=1, **population_kwargs):
+        self.params_class = params_class
+        self.params_kwargs = params_kwargs
+        self.size = size
+        self.objective = objective
+        self.output_filename = output_filename
+        self.islands = islands
+        self.neighbours = neighbours(topology, islands)
+        self.migration_interval = migration_interval
+        self.migrants = migrants
+        self.population_kwargs = population_kwargs
+        # The ranked (score, individual) survivors of each island
+        self.results = None
+
+    def run(self, generations):
+        """Evolve the islands and return the best (score, individual)."""
+        seeds = [randrange(2 ** 32) for _ in range(self.islands)]
+        inboxes = [Queue() for _ in range(self.islands)]
+        results = Queue()
+        senders = [sum(island in island_neighbours
+                       for island_neighbours in self.neighbours)
+                   for island in range(self.islands)]
+        processes = []
+        for island in range(self.islands):
+            population_args = (self.params_class, self.params_kwargs,
+                               self.size, self.objective,
+                               island_filename(self.output_filename, island))
+            processes.append(Process(target=run_island, args=(
+                island, seeds[island], generations, self.migration_interval,
+                self.migrants, inboxes, self.neighbours[island],
+                senders[island], results, population_args,
+                self.population_kwargs)))
+        for process in processes:
+            process.start()
+
+        collected = {}
+        while len(collected) < self.islands:
+            try:
+                island, survivors = results.get(timeout=1)
+            except Empty:
+                if any(process.exitcode not in (None, 0)
+                       for process in processes):
+                    for process in processes:
+                        process.terminate()
+                    raise RuntimeError("An island process failed")
+                continue
+            collected[island] = survivors
+        for process in processes:
+            process.join()
+
+        self.results = [collected[island] for island in range(self.islands)]
+        return max((survivors[0] for survivors in self.results if survivors),
+                   key=itemgetter(0))
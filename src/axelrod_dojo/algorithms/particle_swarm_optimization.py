@@ -1,16 +1,27 @@
+from concurrent.futures import Executor
+
 import axelrod as axl
+import numpy as np
 import pyswarm
 
-from axelrod_dojo.utils import score_params
+from axelrod_dojo.backends import Backend, ExecutorBackend, make_backend
+from axelrod_dojo.utils import score_opponents, score_params
 from axelrod_dojo.utils import PlayerInfo
 from multiprocessing import cpu_count
 
 
 class PSO(object):
-    """PSO class that implements a particle swarm optimization algorithm."""
+    """
+    PSO class that implements a particle swarm optimization algorithm.
+
+    Particles are scored one at a time, with the opponents split over the
+    processes of an evaluation backend (see `Population` for the meaning of
+    `processes` and `backend`).
+    """
     def __init__(self, params_class, params_kwargs, objective, opponents=None,
                  population=1, generations=1, debug=True, phip=0.8, phig=0.8,
-                 omega=0.8, weights=None, sample_count=None, processes=1):
+                 omega=0.8, weights=None, sample_count=None, processes=1,
+                 backend=None):
 
         self.params_class = params_class
         self.params_kwargs = params_kwargs
@@ -33,37 +44,49 @@ class PSO(object):
             self.processes = cpu_count()
         else:
             self.processes = processes
+        if isinstance(backend, Executor):
+            backend = ExecutorBackend(backend)
+        self.backend = backend
+
+    def score(self, params, backend):
+        """Return the score of params, split over the processes of a
+        backend."""
+        if backend.processes == 1:
+            return score_params(params=params, objective=self.objective,
+                                opponents_information=self.opponents_information,
+                                weights=self.weights,
+                                sample_count=self.sample_count)
+        indices = np.arange(len(self.opponents_information))
+        if self.sample_count is not None:
+            indices = np.random.choice(indices, self.sample_count)
+        chunks = [chunk for chunk in
+                  np.array_split(indices, backend.processes) if len(chunk)]
+        scores = backend.starmap(score_opponents, [
+            (params, self.objective, self.opponents_information, chunk)
+            for chunk in chunks])
+        weights = self.weights
+        if weights is not None:
+            weights = [weights[i] for i in indices]
+        return np.average(np.concatenate(scores), weights=weights)
 
     def swarm(self):
+        if isinstance(self.backend, Backend):
+            return self.swarm_with(self.backend)
+        with make_backend(self.processes, self.backend) as backend:
+            return self.swarm_with(backend)
+
+    def swarm_with(self, backend):
 
         params = self.params_class(**self.params_kwargs)
         lb, ub = params.create_vector_bounds()
 
         def objective_function(vector):
             params.receive_vector(vector=vector)
-            instance_generation_function = 'player'
-
-            return - score_params(params=params, objective=self.objective,
-                                  opponents_information=self.opponents_information,
-                                  weights=self.weights,
-                                  sample_count=self.sample_count,
-                                  instance_generation_function=instance_generation_function
-                                 )
+            return - self.score(params, backend)
 
-        # TODO remove check once v 0.7 is pip installable
-        # There is a multiprocessing version (0.7) of pyswarm available at
-        # https://github.com/tisimst/pyswarm, just pass processes=X
-        # Pip installs version 0.6
-        if pyswarm.__version__ == "0.7":
-            xopt, fopt = pyswarm.pso(objective_function, lb, ub,
-                                     swarmsize=self.population,
-                                     maxiter=self.generations, debug=self.debug,
-                                     phip=self.phip, phig=self.phig,
-                                     omega=self.omega, processes=self.processes)
-        else:
-            xopt, fopt = pyswarm.pso(objective_function, lb, ub,
-                                     swarmsize=self.population,
-                                     maxiter=self.generations, debug=self.debug,
-                                     phip=self.phip, phig=self.phig,
-                                     omega=self.omega)
+        xopt, fopt = pyswarm.pso(objective_function, lb, ub,
+                                 swarmsize=self.population,
+                                 maxiter=self.generations, debug=self.debug,
+                                 phip=self.phip, phig=self.phig,
+                                 omega=self.omega)
         return xopt, fopt
@@ -0,0 +1,328 @@
+"""
+Populations of genomes of one archetype held as NumPy arrays.
+
+Rather than a list of Params instances, each mutated and crossed over in
+Python, every genome of a population is a row of a few contiguous arrays,
+so that random generation, mutation and crossover of the whole population
+are a handful of NumPy operations. The operators follow those of the
+Params classes, drawing from `numpy.random`.
+"""
+import numpy as np
+from axelrod import Action
+
+from axelrod_dojo.archetypes.fsm import FSMParams
+from axelrod_dojo.archetypes.hmm import HMMParams
+
+C, D = Action.C, Action.D
+ACTIONS = (C, D)
+OBJECT_ACTIONS = np.empty(2, dtype=object)
+OBJECT_ACTIONS[:] = ACTIONS
+
+
+def select(scores, number):
+    """Return the indices of the `number` best scores, from the best, found
+    by partitioning the scores rather than sorting them all."""
+    scores = np.asarray(scores)
+    number = min(number, len(scores))
+    if number == 0:
+        return np.zeros(0, dtype=np.intp)
+    best = np.argpartition(-scores, number - 1)[:number]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+def mutate_values(values, mutation_probability):
+    """Add a value drawn uniformly from [-0.25, 0.25] to each entry of an
+    array with probability `mutation_probability`, bounded by 0 and 1, as
+    `mutate_row`."""
+    changes = np.random.uniform(-1, 1, values.shape) / 4
+    mutated = np.random.random(values.shape) < mutation_probability
+    return np.clip(np.where(mutated, values + changes, values), 0, 1)
+
+
+def normalize_rows(matrices):
+    """Normalize the last axis of an array to sum to 1, as
+    `normalize_vector`: rows summing to 0 become uniform."""
+    sums = matrices.sum(axis=-1, keepdims=True)
+    uniform = np.full_like(matrices, 1 / matrices.shape[-1])
+    return np.where(sums == 0, uniform,
+                    matrices / np.where(sums == 0, 1, sums))
+
+
+def random_vectors(shape):
+    """Return random vectors of values in [0, 1] that sum to 1 along the
+    last axis, broken as `random_vector`."""
+    randoms = np.random.random(shape[:-1] + (shape[-1] - 1,))
+    left = np.concatenate([np.ones(shape[:-1] + (1,)),
+                           np.cumprod(1 - randoms, axis=-1)], axis=-1)
+    return np.concatenate([left[..., :-1] * randoms, left[..., -1:]],
+                          axis=-1)
+
+
+def crossover_masks(size, length):
+    """Return a boolean array of shape (size, length) taking the entries
+    before a random crosspoint of each row from the first parent."""
+    crosspoints = np.random.randint(length, size=size)
+    return np.arange(length) < crosspoints[:, np.newaxis]
+
+
+class GenomeArrays(object):
+    """
+    A population of genomes held as arrays whose first axis runs over the
+    genomes.
+
+    Subclasses name their arrays in `fields` and implement `random`,
+    `from_params`, `to_params`, `mutate` and `crossover`.
+    """
+    fields = ()
+
+    def __len__(self):
+        return len(getattr(self, self.fields[0]))
+
+    def __getitem__(self, index):
+        """Return the genome at an index as a Params instance, or the
+        genomes of a slice as arrays."""
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        return self.take([index]).to_params()[0]
+
+    def __iter__(self):
+        return iter(self.to_params())
+
+    def keys(self):
+        """Return a key for each genome, equal for identical genomes."""
+        size = len(self)
+        genomes = np.concatenate(
+            [getattr(self, field).reshape(size, -1).astype(float)
+             for field in self.fields], axis=1)
+        return [genome.tobytes() for genome in genomes]
+
+    def replace(self, **arrays):
+        """Return a population of the same archetype with the given
+        arrays."""
+        new = object.__new__(type(self))
+        new.__dict__.update(self.__dict__)
+        new.__dict__.update(arrays)
+        return new
+
+    def take(self, indices):
+        """Return a copy of the genomes at the given indices."""
+        return self.replace(**{field: getattr(self, field)[indices]
+                               for field in self.fields})
+
+    def concatenate(self, other):
+        """Return the genomes of this population followed by those of
+        another of the same archetype."""
+        return self.replace(**{field: np.concatenate([getattr(self, field),
+                                                      getattr(other, field)])
+                               for field in self.fields})
+
+    def mutate_initial(self):
+        """Flip the initial actions with probability mutation_probability / 10
+        and draw new initial states with probability mutation_probability /
+        (10 * num_states), as the Params classes."""
+        size = len(self)
+        flips = (np.random.random(size) < self.mutation_probability / 10)
+        self.initial_actions = self.initial_actions ^ flips
+        moves = (np.random.random(size) <
+                 self.mutation_probability / (10 * self.num_states))
+        self.initial_states = np.where(
+            moves, np.random.randint(self.num_states, size=size),
+            self.initial_states)
+
+    def breed(self, size, random_variants):
+        """
+        Return the offspring of this population of survivors, in the
+        proportions of `Population.evolve`: a mutant of each survivor, then
+        mutated crossovers of the candidates made of the survivors, their
+        mutants and `random_variants` new random genomes, as many as `size`
+        less the number of candidates.
+        """
+        mutants = self.take(np.arange(len(self)))
+        mutants.mutate()
+        candidates = self.concatenate(mutants).concatenate(
+            self.random(random_variants, self.num_states,
+                        self.mutation_probability))
+        number = max(0, size - len(candidates))
+        crossovers = candidates.crossover(
+            np.random.randint(len(candidates), size=number),
+            np.random.randint(len(candidates), size=number))
+        crossovers.mutate()
+        return mutants.concatenate(crossovers)
+
+
+class FSMArrays(GenomeArrays):
+    """
+    A population of FSMParams genomes of `num_states` states, as the arrays
+    of `FSMBatch`: the next state and action of each state and opponent
+    action, indexed by [genome, state, opponent action], and the initial
+    state and action of each genome. Actions are 0 for C and 1 for D.
+    """
+    params_class = FSMParams
+    fields = ("next_states", "actions", "initial_states", "initial_actions")
+
+    def __init__(self, num_states, next_states, actions, initial_states,
+                 initial_actions, mutation_probability=0):
+        self.num_states = num_states
+        self.next_states = np.asarray(next_states, dtype=np.intp)
+        self.actions = np.asarray(actions, dtype=np.intp)
+        self.initial_states = np.asarray(initial_states, dtype=np.intp)
+        self.initial_actions = np.asarray(initial_actions, dtype=np.intp)
+        self.mutation_probability = mutation_probability
+
+    @classmethod
+    def random(cls, size, num_states, mutation_probability=0):
+        return cls(num_states,
+                   np.random.randint(num_states, size=(size, num_states, 2)),
+                   np.random.randint(2, size=(size, num_states, 2)),
+                   np.random.randint(num_states, size=size),
+                   np.random.randint(2, size=size), mutation_probability)
+
+    @classmethod
+    def from_params(cls, population, mutation_probability=0):
+        num_states = population[0].num_states
+        next_states = np.zeros((len(population), num_states, 2),
+                               dtype=np.intp)
+        actions = np.zeros((len(population), num_states, 2), dtype=np.intp)
+        for g, params in enumerate(population):
+            for state, input_action, next_state, action in params.rows:
+                j = ACTIONS.index(input_action)
+                next_states[g, state, j] = next_state
+                actions[g, state, j] = ACTIONS.index(action)
+        return cls(num_states, next_states, actions,
+                   [params.initial_state for params in population],
+                   [ACTIONS.index(params.initial_action)
+                    for params in population], mutation_probability)
+
+    def to_params(self):
+        # The rows of every genome are built as one array of objects, which
+        # is faster than building them row by row
+        size = len(self)
+        rows = np.empty((size, self.num_states, 2, 4), dtype=object)
+        rows[..., 0] = np.arange(self.num_states)[:, np.newaxis]
+        rows[..., 1] = OBJECT_ACTIONS
+        rows[..., 2] = self.next_states
+        rows[..., 3] = OBJECT_ACTIONS[self.actions]
+        rows = rows.reshape(size, 2 * self.num_states, 4).tolist()
+        return [FSMParams(self.num_states, genome_rows, initial_state,
+                          ACTIONS[initial_action], self.mutation_probability)
+                for genome_rows, initial_state, initial_action in zip(
+                    rows, self.initial_states.tolist(),
+                    self.initial_actions.tolist())]
+
+    def mutate(self):
+        """Flip each action with probability mutation_probability and, for
+        half of the genomes, swap the transitions out of two random states,
+        as `FSMParams.mutate`."""
+        size = len(self)
+        flips = (np.random.random((size, self.num_states, 2)) <
+                 self.mutation_probability)
+        self.actions = self.actions ^ flips
+        swapped = np.flatnonzero(np.random.random(size) < 0.5)
+        first = np.random.randint(self.num_states, size=len(swapped))
+        second = np.random.randint(self.num_states, size=len(swapped))
+        for array in (self.next_states, self.actions):
+            array[swapped, first], array[swapped, second] = (
+                array[swapped, second], array[swapped, first])
+        self.mutate_initial()
+
+    def crossover(self, first, second):
+        """Return the genomes taking the transitions of the states before a
+        random crosspoint from the genomes at the indices `first` and the
+        others from the genomes at the indices `second`, as
+        `FSMParams.crossover`."""
+        masks = crossover_masks(len(first), self.num_states)[..., np.newaxis]
+        return self.replace(
+            next_states=np.where(masks, self.next_states[first],
+                                 self.next_states[second]),
+            actions=np.where(masks, self.actions[first],
+                             self.actions[second]),
+            initial_states=self.initial_states[first],
+            initial_actions=self.initial_actions[first])
+
+
+class HMMArrays(GenomeArrays):
+    """
+    A population of HMMParams genomes of `num_states` states: the transition
+    matrices after each opponent action, indexed by [genome, state, next
+    state], the emission probabilities, indexed by [genome, state], and the
+    initial state and action of each genome. Actions are 0 for C and 1 for D.
+    """
+    params_class = HMMParams
+    fields = ("transitions_C", "transitions_D", "emission_probabilities",
+              "initial_states", "initial_actions")
+
+    def __init__(self, num_states, transitions_C, transitions_D,
+                 emission_probabilities, initial_states, initial_actions,
+                 mutation_probability=None):
+        self.num_states = num_states
+        self.transitions_C = np.asarray(transitions_C, dtype=float)
+        self.transitions_D = np.asarray(transitions_D, dtype=float)
+        self.emission_probabilities = np.asarray(emission_probabilities,
+                                                 dtype=float)
+        self.initial_states = np.asarray(initial_states, dtype=np.intp)
+        self.initial_actions = np.asarray(initial_actions, dtype=np.intp)
+        if mutation_probability is None:
+            mutation_probability = 10 / (num_states ** 2)
+        self.mutation_probability = mutation_probability
+
+    @classmethod
+    def random(cls, size, num_states, mutation_probability=None):
+        shape = (size, num_states, num_states)
+        return cls(num_states, random_vectors(shape), random_vectors(shape),
+                   np.random.random((size, num_states)),
+                   np.random.randint(num_states, size=size),
+                   np.zeros(size, dtype=np.intp), mutation_probability)
+
+    @classmethod
+    def from_params(cls, population, mutation_probability=None):
+        return cls(population[0].num_states,
+                   [params.transitions_C for params in population],
+                   [params.transitions_D for params in population],
+                   [params.emission_probabilities for params in population],
+                   [params.initial_state for params in population],
+                   [ACTIONS.index(params.initial_action)
+                    for params in population], mutation_probability)
+
+    def to_params(self):
+        return [HMMParams(self.num_states, self.mutation_probability,
+                          transitions_C, transitions_D, emission_probabilities,
+                          initial_state, ACTIONS[initial_action])
+                for (transitions_C, transitions_D, emission_probabilities,
+                     initial_state, initial_action) in zip(
+                    self.transitions_C.tolist(), self.transitions_D.tolist(),
+                    self.emission_probabilities.tolist(),
+                    self.initial_states.tolist(),
+                    self.initial_actions.tolist())]
+
+    def mutate(self):
+        """Perturb each probability with probability mutation_probability,
+        normalizing the transition matrices, as `HMMParams.mutate`."""
+        self.transitions_C = normalize_rows(mutate_values(
+            self.transitions_C, self.mutation_probability))
+        self.transitions_D = normalize_rows(mutate_values(
+            self.transitions_D, self.mutation_probability))
+        self.emission_probabilities = mutate_values(
+            self.emission_probabilities, self.mutation_probability)
+        self.mutate_initial()
+
+    def crossover(self, first, second):
+        """Return the genomes taking the rows of each transition matrix and
+        the emission probabilities before random crosspoints from the
+        genomes at the indices `first` and the others from the genomes at
+        the indices `second`, as `HMMParams.crossover`."""
+        size = len(first)
+        arrays = {}
+        for field in ("transitions_C", "transitions_D"):
+            masks = crossover_masks(size, self.num_states)[..., np.newaxis]
+            arrays[field] = np.where(masks, getattr(self, field)[first],
+                                     getattr(self, field)[second])
+        masks = crossover_masks(size, self.num_states)
+        arrays["emission_probabilities"] = np.where(
+            masks, self.emission_probabilities[first],
+            self.emission_probabilities[second])
+        return self.replace(initial_states=self.initial_states[first],
+                            initial_actions=self.initial_actions[first],
+                            **arrays)
+
+
+ARRAYS = {FSMParams: FSMArrays, HMMParams: HMMArrays}
@@ -105,6 +105,63 @@ class FSMParams(Params):
                          initial_state=self.initial_state, 
                          initial_action=self.initial_action)
 
+    def canonical_form(self):
+        """
+        Returns an equivalent FSMParams instance with unreachable states
+        removed, equivalent states merged and states labelled in the order in
+        which they are first reached from the initial state.
+        """
+        transitions = {(row[0], row[1]): (row[2], row[3]) for row in self.rows}
+
+        # Reachability pruning
+        reachable = [self.initial_state]
+        for state in reachable:
+            for action in (C, D):
+                next_state = transitions[(state, action)][0]
+                if next_state not in reachable:
+                    reachable.append(next_state)
+
+        # Minimization by partition refinement, numbering the blocks of each
+        # round so that signatures do not nest the previous ones
+        signatures = {state: (transitions[(state, C)][1],
+                              transitions[(state, D)][1])
+                      for state in reachable}
+        ids = {}
+        blocks = {state: ids.setdefault(signatures[state], len(ids))
+                  for state in reachable}
+        while True:
+            signatures = {state: (blocks[state],
+                                  blocks[transitions[(state, C)][0]],
+                                  blocks[transitions[(state, D)][0]])
+                          for state in reachable}
+            ids = {}
+            refined = {state: ids.setdefault(signatures[state], len(ids))
+                       for state in reachable}
+            if len(ids) == len(set(blocks.values())):
+                break
+            blocks = refined
+
+        # Relabelling in breadth first order
+        labels = {blocks[self.initial_state]: 0}
+        order = [self.initial_state]
+        for state in order:
+            for action in (C, D):
+                next_state = transitions[(state, action)][0]
+                if blocks[next_state] not in labels:
+                    labels[blocks[next_state]] = len(labels)
+                    order.append(next_state)
+
+        rows = []
+        for state in order:
+            for action in (C, D):
+                next_state, next_action = transitions[(state, action)]
+                rows.append([labels[blocks[state]], action,
+                             labels[blocks[next_state]], next_action])
+        return FSMParams(num_states=len(order), rows=rows,
+                         initial_state=0,
+                         initial_action=self.initial_action,
+                         mutation_probability=self.mutation_probability)
+
     @staticmethod
     def repr_rows(rows):
         ss = []
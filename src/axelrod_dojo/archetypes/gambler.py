@@ -2,6 +2,7 @@ import random
 
 from axelrod import Action, Gambler
 from axelrod.strategies.lookerup import create_lookup_table_keys
+from axelrod_dojo.engines.markov import gambler_model
 from axelrod_dojo.utils import Params
 
 C, D = Action.C, Action.D
@@ -46,6 +47,13 @@ class GamblerParams(Params):
         vector.  Ignores extra parameters."""
         self.vector = vector
 
+    def chain_model(self):
+        """Returns the ChainModel of the Gambler given by the vector, with
+        the index in the vector of each state's cooperation probability (-1
+        for the opening states)."""
+        return gambler_model(self.vector, self.plays, self.op_plays,
+                             self.op_start_plays)
+
     def create_vector_bounds(self):
         """Creates the bounds for the decision variables.  Ignores extra
         parameters."""
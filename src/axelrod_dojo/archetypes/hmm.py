@@ -150,6 +150,98 @@ class HMMParams(Params):
                          t_C, t_D, emissions,
                          self.initial_state, self.initial_action)
 
+    def canonical_form(self, precision=12):
+        """
+        Returns an equivalent HMMParams instance with unreachable states
+        removed, lumpable states merged and states relabelled in breadth
+        first order from the initial state.
+
+        Probabilities are compared after rounding to `precision` decimal
+        places.
+        """
+        matrices = (self.transitions_C, self.transitions_D)
+
+        # Reachability pruning
+        reachable = [self.initial_state]
+        for state in reachable:
+            for matrix in matrices:
+                for next_state, p in enumerate(matrix[state]):
+                    if p > 0 and next_state not in reachable:
+                        reachable.append(next_state)
+
+        # Merge states with the same emission probability and the same
+        # probability of moving into each block (exact lumpability). The
+        # blocks of each round are numbered by the rank of their signature,
+        # which does not depend on the labels of the states
+        def number(signatures):
+            ids = {signature: i for i, signature in
+                   enumerate(sorted(set(signatures.values())))}
+            return {state: ids[signatures[state]] for state in reachable}
+
+        blocks = number({state: round(self.emission_probabilities[state],
+                                      precision)
+                         for state in reachable})
+        while True:
+            signatures = {}
+            for state in reachable:
+                flows = []
+                for matrix in matrices:
+                    flow = {}
+                    for next_state in reachable:
+                        block = blocks[next_state]
+                        flow[block] = flow.get(block, 0) + matrix[state][
+                            next_state]
+                    flows.append(tuple(sorted(
+                        (block, round(p, precision))
+                        for block, p in flow.items())))
+                signatures[state] = (blocks[state], tuple(flows))
+            refined = number(signatures)
+            if len(set(refined.values())) == len(set(blocks.values())):
+                break
+            blocks = refined
+
+        # Relabelling in breadth first order, visiting the most likely
+        # successors first and, between equally likely ones, the blocks of
+        # lower rank
+        representatives = {}
+        for state in reachable:
+            representatives.setdefault(blocks[state], state)
+
+        def probability(matrix, state, block):
+            return round(sum(matrix[state][n] for n in reachable
+                             if blocks[n] == block), precision)
+
+        order = [blocks[self.initial_state]]
+        for block in order:
+            state = representatives[block]
+            successors = sorted(
+                set(blocks[next_state] for next_state in reachable
+                    if matrices[0][state][next_state] > 0 or
+                    matrices[1][state][next_state] > 0),
+                key=lambda b: (-probability(matrices[0], state, b),
+                               -probability(matrices[1], state, b), b))
+            for successor in successors:
+                if successor not in order:
+                    order.append(successor)
+
+        def lumped_rows(matrix):
+            rows = []
+            for block in order:
+                state = representatives[block]
+                rows.append([sum(matrix[state][n] for n in reachable
+                                 if blocks[n] == b) for b in order])
+            return rows
+
+        return HMMParams(num_states=len(order),
+                         mutation_probability=self.mutation_probability,
+                         transitions_C=lumped_rows(self.transitions_C),
+                         transitions_D=lumped_rows(self.transitions_D),
+                         emission_probabilities=[
+                             self.emission_probabilities[representatives[b]]
+                             for b in order],
+                         initial_state=0,
+                         initial_action=self.initial_action)
+
     @staticmethod
     def repr_rows(rows):
         ss = []
@@ -0,0 +1,182 @@
+"""
+Evaluation backends shared by the optimisation algorithms.
+
+A backend runs scoring tasks with `starmap(function, iterable, chunksize)`,
+like `multiprocessing.Pool.starmap`, or one at a time with `submit(function,
+*args)`, which returns a `concurrent.futures.Future`, and is closed with
+`close` or by using it as a context manager. A backend passed to an
+algorithm is not closed by it, so it can be reused across runs.
+
+Backends that run their tasks in worker processes may be given an
+initializer run once by each worker, which `Population` uses to keep the
+objective and opponents in the workers. Backends that run their tasks in
+the calling process or in threads ignore it: their tasks share the state of
+the process.
+"""
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import Pool, cpu_count
+
+
+def _call(function, args):
+    return function(*args)
+
+
+class Backend(ABC):
+    """
+    The interface of evaluation backends.
+
+    Attributes
+    ----------
+    processes : integer
+        The number of tasks run at the same time.
+    resident : bool
+        Whether the initializer has been run by each worker process, whose
+        state is then not shared with the calling process.
+    threaded : bool
+        Whether tasks may run at the same time in threads of the calling
+        process, sharing its random state.
+    """
+    processes = 1
+    resident = False
+    threaded = False
+
+    @abstractmethod
+    def starmap(self, function, iterable, chunksize=None):
+        """Return [function(*args) for args in iterable]."""
+
+    def submit(self, function, *args):
+        """Return a future of function(*args). By default the task is run
+        before returning, with `starmap`."""
+        future = Future()
+        try:
+            future.set_result(self.starmap(function, [args])[0])
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SerialBackend(Backend):
+    """Run tasks one after the other in the calling process."""
+    def __init__(self, initializer=None, initargs=()):
+        pass
+
+    def starmap(self, function, iterable, chunksize=None):
+        return [function(*args) for args in iterable]
+
+
+class MultiprocessingBackend(Backend):
+    """Run tasks in a `multiprocessing.Pool`."""
+    resident = True
+
+    def __init__(self, processes=None, initializer=None, initargs=()):
+        self.processes = processes or cpu_count()
+        self.pool = Pool(processes=self.processes, initializer=initializer,
+                         initargs=initargs)
+
+    def starmap(self, function, iterable, chunksize=None):
+        return self.pool.starmap(function, iterable, chunksize)
+
+    def submit(self, function, *args):
+        future = Future()
+        self.pool.apply_async(function, args, callback=future.set_result,
+                              error_callback=future.set_exception)
+        return future
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+class ExecutorBackend(Backend):
+    """
+    Run tasks with a user supplied `concurrent.futures.Executor`, which is
+    not shut down when the backend is closed. Executors other than a
+    `ProcessPoolExecutor` are taken to run their tasks in threads.
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor
+        The executor.
+    processes : integer
+        The number of tasks the executor runs at the same time.
+    """
+    def __init__(self, executor, processes=None):
+        self.executor = executor
+        self.processes = processes or cpu_count()
+        self.threaded = not isinstance(executor, ProcessPoolExecutor)
+
+    def starmap(self, function, iterable, chunksize=None):
+        iterable = list(iterable)
+        return list(self.executor.map(_call, [function] * len(iterable),
+                                      iterable, chunksize=chunksize or 1))
+
+    def submit(self, function, *args):
+        return self.executor.submit(function, *args)
+
+
+class ProcessPoolBackend(ExecutorBackend):
+    """Run tasks in a `concurrent.futures.ProcessPoolExecutor`."""
+    resident = True
+
+    def __init__(self, processes=None, initializer=None, initargs=()):
+        processes = processes or cpu_count()
+        super().__init__(ProcessPoolExecutor(max_workers=processes,
+                                             initializer=initializer,
+                                             initargs=initargs),
+                         processes)
+
+    def close(self):
+        self.executor.shutdown()
+
+
+class ThreadBackend(ExecutorBackend):
+    """
+    Run tasks in a `concurrent.futures.ThreadPoolExecutor`, which only
+    scores in parallel on free-threaded builds of CPython.
+
+    The threads share the random state of the process, so that it can not
+    be used with common random numbers.
+    """
+    def __init__(self, processes=None, initializer=None, initargs=()):
+        processes = processes or cpu_count()
+        super().__init__(ThreadPoolExecutor(max_workers=processes), processes)
+
+    def close(self):
+        self.executor.shutdown()
+
+
+BACKENDS = {"serial": SerialBackend,
+            "multiprocessing": MultiprocessingBackend,
+            "process_pool": ProcessPoolBackend,
+            "threads": ThreadBackend}
+
+
+def make_backend(processes=1, backend=None, initializer=None, initargs=()):
+    """
+    Return a backend running `processes` tasks at the same time, or as many
+    as there are CPUs if `processes` is 0.
+
+    `backend` is one of serial, multiprocessing, process_pool or threads,
+    and defaults to serial for a single process and to multiprocessing
+    otherwise.
+    """
+    if processes == 0:
+        processes = cpu_count()
+    if backend is None:
+        backend = "serial" if processes == 1 else "multiprocessing"
+    if backend not in BACKENDS:
+        raise ValueError("backend must be one of {}".format(
+            ", ".join(sorted(BACKENDS))))
+    if backend == "serial":
+        return SerialBackend(initializer, initargs)
+    return BACKENDS[backend](processes, initializer, initargs)
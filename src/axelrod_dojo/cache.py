@@ -0,0 +1,231 @@
+"""
+A persistent fitness cache shared across runs and worker processes.
+
+Scores are stored in an SQLite database on local disk, keyed by a hash of
+everything the score depends on: the archetype, the repr of the canonical
+form of the genome, the objective and its parameters, the opponents and the
+weights. Each process opens its own connection, so a cache can be passed to
+worker processes and shared by concurrent runs.
+"""
+from functools import partial
+import csv
+import hashlib
+import os
+import sqlite3
+import time
+import warnings
+
+import axelrod as axl
+
+from axelrod_dojo.engines.markov import player_model
+from axelrod_dojo.utils import (objective_expected_score,
+                                objective_expected_score_diff,
+                                objective_score, objective_score_diff)
+
+
+def opponents_determinism(objective, opponents_information,
+                          sample_count=None):
+    """
+    Return whether scoring against the opponents always gives the same score
+    for a player with a Markov model, with an objective of expected scores,
+    and for a deterministic player, as a pair of booleans.
+    """
+    if sample_count is not None or not isinstance(objective, partial):
+        return False, False
+    exact = objective.func in (objective_expected_score,
+                               objective_expected_score_diff)
+    if not exact and objective.func not in (objective_score,
+                                            objective_score_diff):
+        return False, False
+    opponents = [strategy(**init_kwargs)
+                 for strategy, init_kwargs in opponents_information]
+    modelled = exact and all(player_model(p) is not None for p in opponents)
+    plain = not objective.keywords["noise"] and not any(
+        p.classifier['stochastic'] for p in opponents)
+    return modelled, plain
+
+
+def is_deterministic(params, objective, opponents_information,
+                     sample_count=None, determinism=None):
+    """Return True if scoring params always gives the same score. The
+    result of `opponents_determinism` may be given as `determinism` to
+    avoid building the opponents again."""
+    if determinism is None:
+        determinism = opponents_determinism(objective, opponents_information,
+                                            sample_count)
+    modelled, plain = determinism
+    if not (modelled or plain):
+        return False
+    player = params.player()
+    return ((modelled and player_model(player) is not None) or
+            (plain and not player.classifier['stochastic']))
+
+
+def fitness_key(params, objective, opponents_information, weights=None,
+                sample_count=None):
+    """Return the content address of the score of params."""
+    if isinstance(objective, partial):
+        objective_description = (objective.func.__name__,
+                                 sorted(objective.keywords.items()))
+    else:
+        objective_description = objective.__name__
+    opponents = [(strategy.__module__, strategy.__name__,
+                  sorted(init_kwargs.items()))
+                 for strategy, init_kwargs in opponents_information]
+    description = repr((axl.__version__, type(params).__name__,
+                        repr(params.canonical_form()), objective_description,
+                        opponents, weights, sample_count))
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+class FitnessCache(object):
+    """
+    A size bounded, least recently used cache of scores on local disk.
+
+    Parameters
+    ----------
+    filename : string
+        The SQLite database file, created if it does not exist.
+    max_entries : integer
+        The number of scores to keep. The least recently used scores are
+        evicted beyond this. Reads do not write to the database: the times
+        at which scores are used are recorded when scores are stored, just
+        before evicting, or when the cache is closed.
+    allow_stochastic : bool
+        Whether to also cache scores of stochastic evaluations, which are
+        then not re-evaluated.
+    """
+    def __init__(self, filename, max_entries=100000, allow_stochastic=False):
+        self.filename = filename
+        self.max_entries = max_entries
+        self.allow_stochastic = allow_stochastic
+        self._connection = None
+        self._pid = None
+        self._evaluation = None
+        self._determinism = None
+        # The time each score read since the last write was last used
+        self._used = {}
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS fitness "
+                "(key TEXT PRIMARY KEY, score REAL, used REAL)")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS fitness_used ON fitness (used)")
+
+    @property
+    def connection(self):
+        # Connections can not be shared across processes
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.filename, timeout=60)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._pid = os.getpid()
+        return self._connection
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_connection"], state["_pid"] = None, None
+        state["_used"] = {}
+        return state
+
+    def __len__(self):
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM fitness").fetchone()[0]
+
+    def determinism(self, objective, opponents_information,
+                    sample_count=None):
+        """Return `opponents_determinism` for an evaluation, computed once
+        for successive calls with the same evaluation. Warns if no score of
+        the evaluation can be cached."""
+        evaluation = (objective, list(opponents_information), sample_count)
+        if self._evaluation != evaluation:
+            self._determinism = opponents_determinism(
+                objective, opponents_information, sample_count)
+            self._evaluation = evaluation
+            if not any(self._determinism):
+                warnings.warn("Scores against these opponents are not "
+                              "deterministic and will not be cached unless "
+                              "allow_stochastic is set")
+        return self._determinism
+
+    def key(self, params, objective, opponents_information, weights=None,
+            sample_count=None):
+        """Return the key of the score of params, or None if it may not be
+        cached."""
+        if not (self.allow_stochastic or is_deterministic(
+                params, objective, opponents_information, sample_count,
+                self.determinism(objective, opponents_information,
+                                 sample_count))):
+            return None
+        return fitness_key(params, objective, opponents_information, weights,
+                           sample_count)
+
+    def get_many(self, keys):
+        """Return the cached score for each key, or None if it is not
+        cached."""
+        scores = {}
+        wanted = sorted(set(key for key in keys if key is not None))
+        for i in range(0, len(wanted), 500):
+            chunk = wanted[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            scores.update(self.connection.execute(
+                "SELECT key, score FROM fitness WHERE key IN ({})".format(
+                    placeholders), chunk).fetchall())
+        now = time.time()
+        self._used.update((key, now) for key in scores)
+        return [scores.get(key) for key in keys]
+
+    def _record_use(self):
+        """Write the times at which the scores read were used, in the
+        current transaction."""
+        self.connection.executemany(
+            "UPDATE fitness SET used = ? WHERE key = ?",
+            [(used, key) for key, used in self._used.items()])
+        self._used = {}
+
+    def set_many(self, items):
+        """Store (key, score) pairs, skipping keys that are None, and evict
+        the least recently used scores beyond the size bound."""
+        now = time.time()
+        rows = [(key, float(score), now) for key, score in items
+                if key is not None]
+        with self.connection:
+            self._record_use()
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO fitness VALUES (?, ?, ?)", rows)
+            self.connection.execute(
+                "DELETE FROM fitness WHERE key IN (SELECT key FROM fitness "
+                "ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def set(self, key, score):
+        self.set_many([(key, score)])
+
+    def warm(self, filename, params_class, objective, opponents_information,
+             weights=None, sample_count=None):
+        """
+        Pre-warm the cache with the best individual of each generation in an
+        output file written by `Population`, which must have been scored with
+        the same objective, opponents and weights.
+
+        Returns the number of scores stored.
+        """
+        items = []
+        with open(filename) as datafile:
+            for line in csv.reader(datafile):
+                score, rep = float(line[-2]), line[-1]
+                params = params_class.parse_repr(rep)
+                items.append((self.key(params, objective,
+                                       opponents_information, weights,
+                                       sample_count), score))
+        self.set_many(items)
+        return len(set(key for key, _ in items if key is not None))
+
+    def close(self):
+        if self._used:
+            with self.connection:
+                self._record_use()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,219 @@
+"""
+Evaluation over TCP by workers that connect to a coordinator.
+
+The coordinator is the `ClusterBackend` of an algorithm: it listens for
+workers and sends each of them one pickled task at a time, a scoring
+function with its arguments (including the genome), gathering the results
+back. Workers are started with `run_worker`, or `bin/cluster_worker.py`, on
+any machine that can reach the coordinator, and may join or leave at any
+time: the task of a worker that disconnects, or takes longer than the task
+timeout, is sent again to another worker.
+
+Tasks are pickled, so workers must only connect to coordinators they trust
+and the coordinator authenticates workers with a shared key.
+"""
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener, wait
+import os
+import threading
+import time
+
+from axelrod_dojo.backends import Backend
+
+
+class ClusterBackend(Backend):
+    """
+    A coordinator running tasks on the workers connected to it.
+
+    Tasks are queued by `submit` and `starmap` and sent by a dispatching
+    thread to the idle workers, one task per worker at a time, so that
+    tasks submitted one by one run in parallel.
+
+    Parameters
+    ----------
+    address : tuple
+        The (host, port) to listen on. The default port 0 picks a free port,
+        which is then found in `address`.
+    authkey : bytes
+        The key shared with the workers. A random key is generated by
+        default.
+    task_timeout : float
+        The number of seconds after which a worker that has not returned the
+        result of a task is disconnected and its task sent again, or None to
+        wait for ever.
+    """
+    def __init__(self, address=("localhost", 0), authkey=None,
+                 task_timeout=None):
+        self.authkey = os.urandom(16) if authkey is None else authkey
+        self.task_timeout = task_timeout
+        self.listener = Listener(address, authkey=self.authkey)
+        self.address = self.listener.address
+        self.workers = []
+        self.new_workers = []
+        # The (future, function, args) of the tasks waiting for a worker
+        self.pending = deque()
+        self.lock = threading.Lock()
+        self.closing = False
+        self.accepting = threading.Thread(target=self.accept, daemon=True)
+        self.accepting.start()
+        self.dispatching = threading.Thread(target=self.dispatch,
+                                            daemon=True)
+        self.dispatching.start()
+
+    @property
+    def processes(self):
+        with self.lock:
+            return max(1, len(self.workers) + len(self.new_workers))
+
+    def accept(self):
+        """Accept connecting workers until the backend is closed."""
+        while True:
+            try:
+                connection = self.listener.accept()
+            except (AuthenticationError, EOFError, OSError):
+                if self.closing:
+                    return
+                continue
+            if self.closing:
+                connection.close()
+                return
+            with self.lock:
+                self.new_workers.append(connection)
+
+    def drop(self, connection):
+        with self.lock:
+            if connection in self.workers:
+                self.workers.remove(connection)
+        connection.close()
+
+    def submit(self, function, *args):
+        """Queue function(*args) for the workers and return its future."""
+        future = Future()
+        with self.lock:
+            if self.closing:
+                raise RuntimeError("The backend is closed")
+            self.pending.append((future, function, args))
+        return future
+
+    def starmap(self, function, iterable, chunksize=None):
+        """Run function on each tuple of arguments on the workers, waiting
+        for workers to connect if there are none."""
+        futures = [self.submit(function, *args) for args in iterable]
+        return [future.result() for future in futures]
+
+    def dispatch(self):
+        """Send the queued tasks to the idle workers and set the results of
+        their futures until the backend is closed. The task of a worker that
+        disconnects or times out is queued again."""
+        running = {}
+        while not self.closing:
+            with self.lock:
+                self.workers.extend(self.new_workers)
+                self.new_workers = []
+                idle = [connection for connection in self.workers
+                        if connection not in running]
+            for connection in idle:
+                with self.lock:
+                    if not self.pending:
+                        break
+                    task = self.pending.popleft()
+                future, function, args = task
+                if future.done():
+                    continue
+                try:
+                    connection.send((function, args))
+                except OSError:
+                    with self.lock:
+                        self.pending.appendleft(task)
+                    self.drop(connection)
+                    continue
+                running[connection] = (task, time.monotonic())
+
+            ready = wait(list(running), timeout=.1) if running else []
+            if not running:
+                time.sleep(.01)
+            for connection in ready:
+                task, _ = running.pop(connection)
+                try:
+                    succeeded, result = connection.recv()
+                except (EOFError, OSError):
+                    with self.lock:
+                        self.pending.appendleft(task)
+                    self.drop(connection)
+                    continue
+                future = task[0]
+                if future.done():
+                    continue
+                if succeeded:
+                    future.set_result(result)
+                else:
+                    future.set_exception(result)
+
+            if self.task_timeout is not None:
+                now = time.monotonic()
+                for connection, (task, start) in list(running.items()):
+                    if now - start > self.task_timeout:
+                        del running[connection]
+                        with self.lock:
+                            self.pending.appendleft(task)
+                        self.drop(connection)
+
+        with self.lock:
+            unfinished = list(self.pending) + [task for task, _ in
+                                               running.values()]
+            self.pending.clear()
+        for future, _, _ in unfinished:
+            if not future.done():
+                future.set_exception(RuntimeError("The backend is closed"))
+
+    def close(self):
+        """Stop accepting workers and disconnect the connected ones, which
+        then stop. Tasks that have not run fail."""
+        with self.lock:
+            self.closing = True
+        self.dispatching.join()
+        # Wake the accepting thread up
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+        self.accepting.join()
+        self.listener.close()
+        with self.lock:
+            self.workers.extend(self.new_workers)
+            self.new_workers = []
+        for connection in self.workers:
+            try:
+                connection.send(None)
+            except OSError:
+                pass
+            connection.close()
+        self.workers = []
+
+
+def run_worker(address, authkey):
+    """
+    Connect to a coordinator and run its tasks until it closes.
+
+    The exception raised by a task is sent back to the coordinator, which
+    raises it.
+    """
+    connection = Client(tuple(address), authkey=authkey)
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):
+                return
+            if message is None:
+                return
+            function, args = message
+            try:
+                result = (True, function(*args))
+            except Exception as error:
+                result = (False, error)
+            connection.send(result)
+    finally:
+        connection.close()
@@ -0,0 +1,291 @@
+"""
+A batched match engine for populations of finite state machines.
+
+Rather than building one `axl.FSMPlayer` per genome and playing a Python
+level `axl.Match`, every genome of a generation is held as an integer
+transition table and all of them are stepped against an opponent at once:
+one NumPy operation per turn for the whole population.
+"""
+from functools import partial
+from statistics import mean
+
+import numpy as np
+import axelrod as axl
+from axelrod import Action
+
+from axelrod_dojo.archetypes.arrays import FSMArrays
+from axelrod_dojo.engines.markov import (ACTION_INDEX, KNOWN_FSM_OPPONENTS,
+                                         payoff_matrices)
+from axelrod_dojo.engines.responses import uses_response_trie
+from axelrod_dojo.utils import (objective_score, objective_score_diff,
+                                score_params)
+
+C, D = Action.C, Action.D
+
+
+def encode_transitions(transitions, initial_state, num_states=None):
+    """
+    Encode FSM transitions of the form (state, input, next_state, action) as
+    two integer arrays indexed by [state, input action].
+
+    States are relabelled to 0, 1, ... in sorted order. Returns the next
+    state array, the action array and the relabelled initial state.
+    """
+    labels = sorted(set(row[0] for row in transitions))
+    index = {label: i for i, label in enumerate(labels)}
+    if num_states is None:
+        num_states = len(labels)
+    next_states = np.zeros((num_states, 2), dtype=np.intp)
+    actions = np.zeros((num_states, 2), dtype=np.intp)
+    for state, input_action, next_state, action in transitions:
+        i, j = index[state], ACTION_INDEX[input_action]
+        next_states[i, j] = index[next_state]
+        actions[i, j] = ACTION_INDEX[action]
+    return next_states, actions, index[initial_state]
+
+
+def opponent_tables(opponent):
+    """
+    Return the encoded transition tables of an opponent if it can be played
+    by the engine, otherwise None.
+    """
+    if isinstance(opponent, axl.FSMPlayer):
+        transitions = [(state, input_action, next_state, action)
+                       for (state, input_action), (next_state, action)
+                       in opponent.fsm.state_transitions.items()]
+        initial_state = opponent.initial_state
+        initial_action = opponent.initial_action
+    elif type(opponent) in KNOWN_FSM_OPPONENTS:
+        transitions, initial_state, initial_action = KNOWN_FSM_OPPONENTS[
+            type(opponent)]
+    else:
+        return None
+    next_states, actions, initial_state = encode_transitions(transitions,
+                                                             initial_state)
+    return next_states, actions, initial_state, ACTION_INDEX[initial_action]
+
+
+class FSMBatch(object):
+    """
+    A population of FSMParams genomes held as integer transition tables.
+
+    Parameters
+    ----------
+    population : list
+        A list of FSMParams instances, or an FSMArrays population whose
+        arrays are played as they are.
+    """
+    def __init__(self, population):
+        self.size = len(population)
+        if isinstance(population, FSMArrays):
+            self.next_states = population.next_states
+            self.actions = population.actions
+            self.initial_states = population.initial_states
+            self.initial_actions = population.initial_actions
+            return
+        num_states = max(params.num_states for params in population)
+        self.next_states = np.zeros((self.size, num_states, 2),
+                                    dtype=np.intp)
+        self.actions = np.zeros((self.size, num_states, 2), dtype=np.intp)
+        self.initial_states = np.zeros(self.size, dtype=np.intp)
+        self.initial_actions = np.zeros(self.size, dtype=np.intp)
+        for g, params in enumerate(population):
+            for state, input_action, next_state, action in params.rows:
+                j = ACTION_INDEX[input_action]
+                self.next_states[g, state, j] = next_state
+                self.actions[g, state, j] = ACTION_INDEX[action]
+            self.initial_states[g] = params.initial_state
+            self.initial_actions[g] = ACTION_INDEX[params.initial_action]
+
+    def play(self, opponent_tables, turns, noise=0, repetitions=1):
+        """
+        Play every genome against an opponent given by its encoded tables.
+
+        Returns two arrays of shape (size, repetitions) with the total score
+        of the genomes and of the opponent in each match.
+        """
+        opp_next_states, opp_actions, opp_initial_state, opp_initial_action = (
+            opponent_tables)
+        rows = self.size * repetitions
+        genome = np.repeat(np.arange(self.size), repetitions)
+        my_payoffs, their_payoffs = payoff_matrices()
+
+        state = self.initial_states[genome]
+        action = self.initial_actions[genome]
+        opp_state = np.full(rows, opp_initial_state, dtype=np.intp)
+        opp_action = np.full(rows, opp_initial_action, dtype=np.intp)
+        my_total = np.zeros(rows)
+        their_total = np.zeros(rows)
+
+        for _ in range(turns):
+            if noise:
+                action = action ^ (np.random.random(rows) < noise)
+                opp_action = opp_action ^ (np.random.random(rows) < noise)
+            my_total += my_payoffs[action, opp_action]
+            their_total += their_payoffs[action, opp_action]
+            state, action, opp_state, opp_action = (
+                self.next_states[genome, state, opp_action],
+                self.actions[genome, state, opp_action],
+                opp_next_states[opp_state, action],
+                opp_actions[opp_state, action])
+
+        return (my_total.reshape(self.size, repetitions),
+                their_total.reshape(self.size, repetitions))
+
+
+def score_fsm_population(population, objective, opponents_information,
+                         weights=None, sample_count=None):
+    """
+    Return the overall mean score of each FSMParams instance in a population.
+
+    This gives the same scores as calling `score_params` on each genome but
+    plays all genomes at once against each opponent. Opponents that cannot be
+    represented as transition tables, and objectives other than score and
+    score difference, fall back to `axl.Match`.
+
+    The population is a list of FSMParams instances or an FSMArrays
+    population, which is only built as FSMParams instances for the matches
+    falling back to `axl.Match`.
+    """
+    if not (isinstance(objective, partial) and
+            objective.func in (objective_score, objective_score_diff)):
+        if isinstance(population, FSMArrays):
+            population = population.to_params()
+        return [score_params(params, objective, opponents_information,
+                             weights=weights, sample_count=sample_count)
+                for params in population]
+
+    turns = objective.keywords["turns"]
+    noise = objective.keywords["noise"]
+    repetitions = objective.keywords["repetitions"] if noise else 1
+    difference = objective.func is objective_score_diff
+
+    if sample_count is not None:
+        samples = [np.random.choice(len(opponents_information), sample_count)
+                   for _ in range(len(population))]
+        needed = sorted(set(np.concatenate(samples)))
+    else:
+        samples = [range(len(opponents_information))
+                   for _ in range(len(population))]
+        needed = range(len(opponents_information))
+
+    batch = FSMBatch(population)
+    if isinstance(population, FSMArrays):
+        individuals = None
+    else:
+        individuals = population
+    scores = np.zeros((len(population), len(opponents_information)))
+    for i in needed:
+        strategy, init_kwargs = opponents_information[i]
+        opponent = strategy(**init_kwargs)
+        tables = opponent_tables(opponent)
+        if tables is None or opponent.classifier['stochastic']:
+            if individuals is None:
+                individuals = population.to_params()
+            for g, params in enumerate(individuals):
+                opponent.reset()
+                scores[g, i] = mean(objective(params.player(), opponent))
+            continue
+        my_total, their_total = batch.play(tables, turns, noise, repetitions)
+        if difference:
+            scores[:, i] = np.mean(my_total / turns - their_total / turns,
+                                   axis=1)
+        else:
+            scores[:, i] = np.mean(my_total / turns, axis=1)
+
+    overall_scores = []
+    for g, indices in enumerate(samples):
+        indices = list(indices)
+        genome_weights = weights
+        if sample_count is not None and weights is not None:
+            genome_weights = [weights[i] for i in indices]
+        overall_scores.append(np.average(scores[g, indices],
+                                         weights=genome_weights))
+    return overall_scores
+
+
+## Trace-aware re-evaluation
+
+def is_traceable(objective):
+    """Return True if matches played by an objective are deterministic for
+    deterministic opponents, so that their traces can be reused."""
+    return (isinstance(objective, partial) and
+            objective.func in (objective_score, objective_score_diff) and
+            not objective.keywords["noise"])
+
+
+def score_fsm_opponents(params, objective, opponents_information, indices):
+    """
+    Score an FSMParams instance against the opponents at the given indices.
+
+    Matches against deterministic opponents are played turn by turn while
+    recording the (state, opponent action) rows of the genome that are
+    visited. Returns a list of (score, visited rows) pairs, with visited rows
+    set to None for stochastic opponents and for opponents that inspect or
+    manipulate the player, whose moves depend on more than the visited
+    rows.
+    """
+    turns = objective.keywords["turns"]
+    match_attributes = objective.keywords.get("match_attributes")
+    results = []
+    for i in indices:
+        strategy, init_kwargs = opponents_information[i]
+        player = params.player()
+        opponent = strategy(**init_kwargs)
+        if not uses_response_trie(opponent):
+            results.append((mean(objective(player, opponent)), None))
+            continue
+        match = axl.Match((player, opponent), turns=turns,
+                          match_attributes=match_attributes)
+        player.reset()
+        opponent.reset()
+        visited = set()
+        for _ in range(turns):
+            if player.history:
+                visited.add((player.fsm.state, opponent.history[-1]))
+            player.play(opponent)
+        match.result = list(zip(player.history, opponent.history))
+        final_scores = match.final_score_per_turn()
+        if objective.func is objective_score_diff:
+            score = final_scores[0] - final_scores[1]
+        else:
+            score = final_scores[0]
+        results.append((score, frozenset(visited)))
+    return results
+
+
+class TraceStore(object):
+    """
+    The per-opponent scores of scored FSMParams instances together with the
+    rows of their transition tables that each deterministic match visited.
+
+    A genome that agrees with a stored genome on its initial state, initial
+    action and every row visited against an opponent plays exactly the same
+    deterministic match, so it inherits that score.
+    """
+    def __init__(self):
+        self.records = []
+
+    @staticmethod
+    def transitions(params):
+        return {(row[0], row[1]): (row[2], row[3]) for row in params.rows}
+
+    def add(self, params, results):
+        self.records.append((params.initial_state, params.initial_action,
+                             self.transitions(params), results))
+
+    def inherited(self, params):
+        """Return a dictionary mapping opponent indices to the (score,
+        visited rows) pairs that params can inherit."""
+        transitions = self.transitions(params)
+        inherited = {}
+        for initial_state, initial_action, parent, results in self.records:
+            if (initial_state, initial_action) != (params.initial_state,
+                                                   params.initial_action):
+                continue
+            for i, (score, visited) in enumerate(results):
+                if i in inherited or visited is None:
+                    continue
+                if all(transitions.get(row) == parent[row] for row in visited):
+                    inherited[i] = (score, visited)
+        return inherited
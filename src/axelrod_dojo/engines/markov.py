@@ -0,0 +1,389 @@
+"""
+Exact expected scores of matches between finite state players.
+
+A player whose next move only depends on a finite internal state, which in
+turn only changes with the actions played, is described as a Markov chain:
+in state s it intends to cooperate with probability `cooperation[s]`, and
+once the (possibly noisy) actions of both players are known it moves to
+state t with probability `transitions[own action, opponent action][s, t]`.
+
+A match between two such players is a Markov chain over pairs of states, so
+the expected score over a number of turns is computed exactly by
+propagating the joint distribution of the players' states turn by turn, in
+the manner of the forward algorithm for hidden Markov models.
+"""
+from functools import lru_cache
+
+import numpy as np
+import axelrod as axl
+from axelrod import Action
+from axelrod.strategies.gambler import Gambler
+from axelrod.strategies.hmm import HMMPlayer
+from axelrod.strategies.lookerup import (LookerUp, Plays,
+                                        create_lookup_table_keys)
+from axelrod.strategies.memoryone import MemoryOnePlayer
+
+C, D = Action.C, Action.D
+
+ACTION_INDEX = {C: 0, D: 1}
+
+# Opponents that are not `axl.FSMPlayer` instances but behave exactly as a
+# small finite state machine: (transitions, initial_state, initial_action)
+KNOWN_FSM_OPPONENTS = {
+    axl.Cooperator: (((0, C, 0, C), (0, D, 0, C)), 0, C),
+    axl.Defector: (((0, C, 0, D), (0, D, 0, D)), 0, D),
+    axl.TitForTat: (((0, C, 0, C), (0, D, 0, D)), 0, C),
+    axl.Grudger: (((0, C, 0, C), (0, D, 1, D),
+                   (1, C, 1, D), (1, D, 1, D)), 0, C),
+}
+
+
+class ChainModel(object):
+    """
+    A player described as a Markov chain over its internal states.
+
+    Parameters
+    ----------
+    initial : array
+        The distribution of the state on the first turn.
+    cooperation : array
+        The probability of intending to cooperate in each state.
+    transitions : array
+        An array of shape (2, 2, n, n): the transition matrix over states
+        for each pair of (own action, opponent action), with C indexed by 0
+        and D by 1.
+    """
+    def __init__(self, initial, cooperation, transitions):
+        self.initial = np.asarray(initial, dtype=float)
+        self.cooperation = np.asarray(cooperation, dtype=float)
+        self.transitions = np.asarray(transitions, dtype=float)
+
+    @property
+    def num_states(self):
+        return len(self.initial)
+
+
+def fsm_model(transitions, initial_state, initial_action):
+    """
+    Return the ChainModel of a finite state machine given by rows of the form
+    (state, opponent action, next state, next action).
+
+    The states of the chain are the pairs (machine state, action about to be
+    played).
+    """
+    labels = sorted(set(row[0] for row in transitions))
+    index = {label: i for i, label in enumerate(labels)}
+    num_states = 2 * len(labels)
+
+    def chain_state(state, action):
+        return 2 * index[state] + ACTION_INDEX[action]
+
+    initial = np.zeros(num_states)
+    initial[chain_state(initial_state, initial_action)] = 1
+    cooperation = np.tile([1., 0.], len(labels))
+    matrices = np.zeros((2, 2, num_states, num_states))
+    for state, opponent_action, next_state, next_action in transitions:
+        for action in (C, D):
+            matrices[:, ACTION_INDEX[opponent_action],
+                     chain_state(state, action),
+                     chain_state(next_state, next_action)] = 1
+    return ChainModel(initial, cooperation, matrices)
+
+
+def memory_one_model(four_vector, initial_action):
+    """
+    Return the ChainModel of a memory one player. The states are the opening
+    move followed by the four possible outcomes of the previous turn.
+    """
+    initial = np.zeros(5)
+    initial[0] = 1
+    cooperation = np.zeros(5)
+    cooperation[0] = 1 if initial_action == C else 0
+    matrices = np.zeros((2, 2, 5, 5))
+    for own in (C, D):
+        for opponent in (C, D):
+            i, j = ACTION_INDEX[own], ACTION_INDEX[opponent]
+            outcome = 1 + 2 * i + j
+            cooperation[outcome] = four_vector[(own, opponent)]
+            matrices[i, j, :, outcome] = 1
+    return ChainModel(initial, cooperation, matrices)
+
+
+def hmm_model(transitions_C, transitions_D, emission_probabilities,
+              initial_state, initial_action):
+    """
+    Return the ChainModel of a hidden Markov model player.
+
+    The first state of the chain plays the initial action and then moves
+    like the initial hidden state; the remaining states are the hidden
+    states, cooperating with their emission probabilities.
+    """
+    num_states = len(emission_probabilities) + 1
+    initial = np.zeros(num_states)
+    initial[0] = 1
+    cooperation = np.zeros(num_states)
+    cooperation[0] = 1 if initial_action == C else 0
+    cooperation[1:] = emission_probabilities
+    matrices = np.zeros((2, 2, num_states, num_states))
+    for opponent, hidden in ((C, transitions_C), (D, transitions_D)):
+        hidden = np.asarray(hidden, dtype=float)
+        j = ACTION_INDEX[opponent]
+        matrices[:, j, 0, 1:] = hidden[initial_state]
+        matrices[:, j, 1:, 1:] = hidden
+    return ChainModel(initial, cooperation, matrices)
+
+
+def reachable_states(initial_state, step):
+    """
+    Enumerate the states reachable from `initial_state` of a player whose
+    state changes deterministically with the actions played, where
+    `step(state, own action, opponent action)` gives the next state.
+
+    Returns the list of states and the (2, 2, n, n) transition matrices.
+    """
+    states = [initial_state]
+    index = {initial_state: 0}
+    edges = []
+    for state in states:
+        for own in (C, D):
+            for opponent in (C, D):
+                next_state = step(state, own, opponent)
+                if next_state not in index:
+                    index[next_state] = len(states)
+                    states.append(next_state)
+                edges.append((ACTION_INDEX[own], ACTION_INDEX[opponent],
+                              index[state], index[next_state]))
+    matrices = np.zeros((2, 2, len(states), len(states)))
+    for i, j, k, l in edges:
+        matrices[i, j, k, l] = 1
+    return states, matrices
+
+
+@lru_cache(maxsize=None)
+def lookup_states(player_depth, op_depth, op_openings_depth):
+    """
+    Return the states of a lookup table player with the given depths and
+    the transition matrices between them.
+
+    A state is the number of turns played (capped at the table depth), the
+    recent plays of both players and the opening plays of the opponent. The
+    structure does not depend on the table, so it is built once per set of
+    depths.
+    """
+    table_depth = max(player_depth, op_depth, op_openings_depth)
+
+    def step(state, own, opponent):
+        turn, plays, op_plays, op_openings = state
+        plays = (plays + (own,))[len(plays) + 1 - player_depth:]
+        op_plays = (op_plays + (opponent,))[len(op_plays) + 1 - op_depth:]
+        if len(op_openings) < op_openings_depth:
+            op_openings += (opponent,)
+        return min(turn + 1, table_depth), plays, op_plays, op_openings
+
+    return reachable_states((0, (), (), ()), step)
+
+
+def lookup_model(lookup_dict, initial_actions):
+    """
+    Return the ChainModel of a lookup table player (LookerUp or Gambler).
+
+    The lookup dictionary maps `Plays(self_plays, op_plays, op_openings)` to
+    an action or a probability of cooperating; the initial actions are
+    played until the table can be used.
+    """
+    player_depth, op_depth, op_openings_depth = map(
+        len, next(iter(lookup_dict)))
+    table_depth = max(player_depth, op_depth, op_openings_depth)
+    initial_actions = tuple(initial_actions)[:table_depth]
+    initial_actions += (C,) * (table_depth - len(initial_actions))
+    states, matrices = lookup_states(player_depth, op_depth,
+                                     op_openings_depth)
+
+    cooperation = []
+    for turn, plays, op_plays, op_openings in states:
+        if turn < table_depth:
+            value = initial_actions[turn]
+        else:
+            value = lookup_dict[Plays(plays, op_plays, op_openings)]
+        if isinstance(value, Action):
+            value = 1 if value == C else 0
+        cooperation.append(value)
+
+    initial = np.zeros(len(states))
+    initial[0] = 1
+    return ChainModel(initial, cooperation, matrices)
+
+
+def gambler_model(pattern, plays, op_plays, op_start_plays):
+    """
+    Return the ChainModel of a Gambler whose table, keyed by
+    `create_lookup_table_keys(plays, op_plays, op_start_plays)`, holds the
+    cooperation probabilities in `pattern`.
+
+    Also returns, for each state of the chain, the index in `pattern` of its
+    cooperation probability, or -1 for the opening states which cooperate.
+    """
+    keys = create_lookup_table_keys(plays, op_plays, op_start_plays)
+    key_index = {key: i for i, key in enumerate(keys)}
+    table_depth = max(plays, op_plays, op_start_plays)
+    states, matrices = lookup_states(plays, op_plays, op_start_plays)
+
+    indices = np.array([
+        key_index[Plays(state[1], state[2], state[3])]
+        if state[0] == table_depth else -1 for state in states])
+    pattern = np.append(np.asarray(pattern, dtype=float), 1)
+    initial = np.zeros(len(states))
+    initial[0] = 1
+    return ChainModel(initial, pattern[indices], matrices), indices
+
+
+def memoryless_model(p):
+    """Return the ChainModel of a player cooperating with probability p."""
+    return ChainModel([1], [p], np.ones((2, 2, 1, 1)))
+
+
+def alternator_model():
+    """Return the ChainModel of a player that starts with C and then plays
+    the opposite of its own previous action."""
+    matrices = np.zeros((2, 2, 2, 2))
+    matrices[ACTION_INDEX[C], :, :, ACTION_INDEX[D]] = 1
+    matrices[ACTION_INDEX[D], :, :, ACTION_INDEX[C]] = 1
+    return ChainModel([1, 0], [1, 0], matrices)
+
+
+def player_model(player):
+    """
+    Return the ChainModel of an axelrod player, or None if the player can not
+    be described as a finite Markov chain.
+    """
+    cls = type(player)
+    if isinstance(player, axl.FSMPlayer) and (
+            cls.strategy is axl.FSMPlayer.strategy):
+        transitions = [(state, opponent_action, next_state, next_action)
+                       for (state, opponent_action), (next_state, next_action)
+                       in player.fsm.state_transitions.items()]
+        return fsm_model(transitions, player.initial_state,
+                         player.initial_action)
+    if isinstance(player, HMMPlayer) and (
+            cls.strategy is HMMPlayer.strategy):
+        return hmm_model(player.hmm.transitions_C, player.hmm.transitions_D,
+                         player.hmm.emission_probabilities,
+                         player.initial_state, player.initial_action)
+    if isinstance(player, LookerUp) and (
+            cls.strategy in (LookerUp.strategy, Gambler.strategy)):
+        return lookup_model(player.lookup_dict, player.initial_actions)
+    if cls in KNOWN_FSM_OPPONENTS:
+        return fsm_model(*KNOWN_FSM_OPPONENTS[cls])
+    if isinstance(player, MemoryOnePlayer) and (
+            cls.strategy is MemoryOnePlayer.strategy):
+        return memory_one_model(player._four_vector, player._initial)
+    if cls is axl.Random:
+        return memoryless_model(player.p)
+    if cls is axl.Alternator:
+        return alternator_model()
+    return None
+
+
+def payoff_matrices(game=None):
+    """Return the payoffs of both players indexed by [my action, their
+    action]."""
+    if game is None:
+        game = axl.Game()
+    me = np.zeros((2, 2))
+    them = np.zeros((2, 2))
+    for (a, b), (score_a, score_b) in game.scores.items():
+        me[ACTION_INDEX[a], ACTION_INDEX[b]] = score_a
+        them[ACTION_INDEX[a], ACTION_INDEX[b]] = score_b
+    return me, them
+
+
+def expected_final_scores(model, other, turns, noise=0, game=None):
+    """
+    Return the expected total scores of both players over a match of the
+    given number of turns between two ChainModels.
+    """
+    my_payoffs, their_payoffs = payoff_matrices(game)
+    # Probability of each actual (post noise) action in each state
+    my_cooperation = model.cooperation * (1 - 2 * noise) + noise
+    their_cooperation = other.cooperation * (1 - 2 * noise) + noise
+    my_actions = (my_cooperation, 1 - my_cooperation)
+    their_actions = (their_cooperation, 1 - their_cooperation)
+    outcomes = [(a, b, np.outer(my_actions[a], their_actions[b]))
+                for a in (0, 1) for b in (0, 1)]
+
+    distribution = np.outer(model.initial, other.initial)
+    my_total, their_total = 0, 0
+    for _ in range(turns):
+        next_distribution = np.zeros_like(distribution)
+        for a, b, probabilities in outcomes:
+            weighted = distribution * probabilities
+            mass = weighted.sum()
+            my_total += mass * my_payoffs[a, b]
+            their_total += mass * their_payoffs[a, b]
+            next_distribution += (model.transitions[a, b].T @ weighted @
+                                  other.transitions[b, a])
+        distribution = next_distribution
+    return my_total, their_total
+
+
+def expected_final_scores_per_turn(me, other, turns, noise=0, game=None):
+    """
+    Return the exact expected score per turn of both players in a match
+    between two axelrod players, or None if either player can not be
+    described as a finite Markov chain.
+    """
+    model, other_model = player_model(me), player_model(other)
+    if model is None or other_model is None:
+        return None
+    my_total, their_total = expected_final_scores(model, other_model, turns,
+                                                  noise, game)
+    return my_total / turns, their_total / turns
+
+
+def expected_payoff_gradient(model, other, turns, noise=0, payoffs=None):
+    """
+    Return the expected total payoff of the first player over a match between
+    two ChainModels, and its gradient with respect to the cooperation
+    probabilities of the first player's states.
+
+    `payoffs` is indexed by [my action, their action] and defaults to the
+    first player's payoffs in the standard game. The gradient is obtained by
+    propagating the derivative of the payoff backwards through the turns of
+    the match, so it costs about as much as a second forward pass.
+    """
+    if payoffs is None:
+        payoffs = payoff_matrices()[0]
+    my_cooperation = model.cooperation * (1 - 2 * noise) + noise
+    their_cooperation = other.cooperation * (1 - 2 * noise) + noise
+    my_actions = (my_cooperation, 1 - my_cooperation)
+    their_actions = (their_cooperation, 1 - their_cooperation)
+    outcomes = [(a, b, np.outer(my_actions[a], their_actions[b]))
+                for a in (0, 1) for b in (0, 1)]
+
+    distributions = [np.outer(model.initial, other.initial)]
+    total = 0
+    for _ in range(turns):
+        distribution = distributions[-1]
+        next_distribution = np.zeros_like(distribution)
+        for a, b, probabilities in outcomes:
+            weighted = distribution * probabilities
+            total += weighted.sum() * payoffs[a, b]
+            next_distribution += (model.transitions[a, b].T @ weighted @
+                                  other.transitions[b, a])
+        distributions.append(next_distribution)
+
+    # The derivative of the payoff still to come with respect to the joint
+    # distribution of states at the start of each turn
+    adjoint = np.zeros_like(distributions[0])
+    action_gradients = np.zeros((2, model.num_states))
+    for distribution in reversed(distributions[:-1]):
+        previous_adjoint = np.zeros_like(adjoint)
+        for a, b, probabilities in outcomes:
+            outcome_adjoint = payoffs[a, b] + (
+                model.transitions[a, b] @ adjoint @ other.transitions[b, a].T)
+            previous_adjoint += outcome_adjoint * probabilities
+            action_gradients[a] += (outcome_adjoint * distribution) @ (
+                their_actions[b])
+        adjoint = previous_adjoint
+    gradient = (action_gradients[0] - action_gradients[1]) * (1 - 2 * noise)
+    return total, gradient
@@ -0,0 +1,230 @@
+"""
+Shared response tries for deterministic opponents.
+
+A deterministic opponent's next move only depends on the history of the
+match so far, so once it has been computed for one genome it can be reused
+by every other genome that reaches the same history. The moves are stored in
+a trie keyed by the turns played: a node holds the opponent's move after a
+history prefix, and its children are keyed by the (opponent action, genome
+action) pairs of the next turn.
+
+Tries are built lazily in each process and may be saved to and loaded from
+disk between runs. A worker process that loads tries from a file saves its
+own tries next to it when it stops, and `merge_response_tries` gathers them.
+
+A node takes about 350 bytes, so that the tries of a process are bounded by
+`MAX_NODES` nodes in all, about 350 MB by default: beyond it new histories
+are played but not recorded.
+"""
+import glob
+from multiprocessing import parent_process, util
+import os
+import pickle
+
+import axelrod as axl
+from axelrod.player import update_history, update_state_distribution
+
+# The tries of the current process, keyed by opponent and match attributes,
+# the files they have been loaded from and the number of nodes they hold
+RESPONSE_TRIES = {}
+LOADED_FILES = set()
+MAX_NODES = 10 ** 6
+NUM_NODES = 0
+
+
+def uses_response_trie(opponent):
+    """
+    Return True if an opponent's moves can be read from a response trie:
+    it is deterministic and does not look at or modify its opponent beyond
+    the history.
+    """
+    classifier = opponent.classifier
+    return not (classifier['stochastic'] or classifier['inspects_source'] or
+                classifier['manipulates_source'] or
+                classifier['manipulates_state'])
+
+
+class ResponseTrie(object):
+    """
+    The moves of a deterministic opponent after each history prefix.
+
+    Parameters
+    ----------
+    max_nodes : integer
+        The size bound of the trie, or None to only be bound by the
+        `MAX_NODES` of all the tries of the process.
+    """
+    def __init__(self, max_nodes=None):
+        self.root = [None, {}]
+        self.max_nodes = max_nodes
+        self.num_nodes = 1
+
+    def child(self, node, turn):
+        """Return the child of a node for a turn, creating it if neither
+        the trie nor the tries of the process are full, otherwise None."""
+        global NUM_NODES
+        child = node[1].get(turn)
+        if (child is None and NUM_NODES < MAX_NODES and
+                (self.max_nodes is None or self.num_nodes < self.max_nodes)):
+            child = [None, {}]
+            node[1][turn] = child
+            self.num_nodes += 1
+            NUM_NODES += 1
+        return child
+
+
+def response_trie(opponent):
+    """Return the trie of the current process for an opponent and its match
+    attributes, creating it if needed."""
+    key = (type(opponent), repr(sorted(opponent.init_kwargs.items())),
+           repr(sorted(opponent.match_attributes.items())))
+    if key not in RESPONSE_TRIES:
+        add_response_trie(key, ResponseTrie())
+    return RESPONSE_TRIES[key]
+
+
+def add_response_trie(key, trie):
+    """Keep a trie in the current process unless it already has a larger
+    one for the same key."""
+    global NUM_NODES
+    current = RESPONSE_TRIES.get(key)
+    if current is None or current.num_nodes < trie.num_nodes:
+        RESPONSE_TRIES[key] = trie
+        NUM_NODES += trie.num_nodes - (current.num_nodes if current else 0)
+
+
+def clear_response_tries():
+    """Drop the tries of the current process."""
+    global NUM_NODES
+    RESPONSE_TRIES.clear()
+    LOADED_FILES.clear()
+    NUM_NODES = 0
+
+
+def worker_filename(filename):
+    return "{}.worker-{}".format(filename, os.getpid())
+
+
+def save_response_tries(filename):
+    """Save the tries of the current process, written atomically."""
+    temporary_filename = "{}.{}.tmp".format(filename, os.getpid())
+    with open(temporary_filename, "wb") as f:
+        pickle.dump(RESPONSE_TRIES, f)
+    os.replace(temporary_filename, filename)
+
+
+def load_response_tries(filename):
+    """
+    Load saved tries into the current process, once per file and if the
+    file exists, keeping the larger of two tries of the same opponent.
+
+    A worker process saves its tries to a file of its own next to
+    `filename` when it stops.
+    """
+    if filename in LOADED_FILES:
+        return
+    LOADED_FILES.add(filename)
+    if parent_process() is not None:
+        util.Finalize(None, save_response_tries,
+                      args=(worker_filename(filename),), exitpriority=0)
+    if os.path.exists(filename):
+        with open(filename, "rb") as f:
+            for key, trie in pickle.load(f).items():
+                add_response_trie(key, trie)
+
+
+def merge_response_tries(filename):
+    """
+    Save the tries of the current process to a file, merged with those
+    already in it and with those saved next to it by worker processes that
+    have stopped, whose files are removed. The larger of two tries of the
+    same opponent is kept.
+    """
+    load_response_tries(filename)
+    worker_files = [name for name in glob.glob(
+        "{}.worker-*".format(glob.escape(filename)))
+        if not name.endswith(".tmp")]
+    for name in worker_files:
+        with open(name, "rb") as f:
+            for key, trie in pickle.load(f).items():
+                add_response_trie(key, trie)
+    save_response_tries(filename)
+    for name in worker_files:
+        os.remove(name)
+
+
+class HistoryView(object):
+    """A player as it was after the first `turns` turns of its history."""
+    def __init__(self, player, turns):
+        self._player = player
+        self.history = player.history[:turns]
+        self.cooperations = self.history.count(axl.Action.C)
+        self.defections = self.history.count(axl.Action.D)
+
+    def __getattr__(self, name):
+        return getattr(self._player, name)
+
+
+class TrieOpponent(axl.Player):
+    """
+    Plays the moves of a deterministic opponent, reading them from the
+    opponent's response trie where possible.
+
+    On histories that are not in the trie the opponent itself is brought up
+    to date by replaying the history and then played, and its moves are added
+    to the trie.
+    """
+    name = "Trie Opponent"
+
+    def __init__(self, opponent):
+        self.opponent = opponent
+        self.classifier = opponent.classifier
+        super().__init__()
+        self.name = opponent.name
+        self.trie = None
+        self.node = None
+        self.calls = 0
+
+    def set_match_attributes(self, length=-1, game=None, noise=0):
+        super().set_match_attributes(length, game, noise)
+        self.opponent.set_match_attributes(length, game, noise)
+
+    def reset(self):
+        super().reset()
+        self.opponent.reset()
+        self.node = None
+        self.calls = 0
+
+    def strategy(self, opponent):
+        if not self.history:
+            self.trie = response_trie(self.opponent)
+            self.node = self.trie.root
+        elif self.node is not None:
+            self.node = self.trie.child(
+                self.node, (self.history[-1], opponent.history[-1]))
+
+        if self.node is not None and self.node[0] is not None:
+            return self.node[0]
+        move = self.play_opponent(opponent)
+        if self.node is not None:
+            self.node[0] = move
+        return move
+
+    def play_opponent(self, opponent):
+        """Return the opponent's move, first bringing it up to date with the
+        history of the match."""
+        turns = len(self.history)
+        if self.calls == turns and turns > 0:
+            self.advance(opponent, turns - 1)
+        elif self.calls != turns:
+            self.opponent.reset()
+            for turn in range(turns):
+                self.opponent.strategy(HistoryView(opponent, turn))
+                self.advance(opponent, turn)
+        self.calls = turns + 1
+        return self.opponent.strategy(opponent)
+
+    def advance(self, opponent, turn):
+        update_history(self.opponent, self.history[turn])
+        update_state_distribution(self.opponent, self.history[turn],
+                                  opponent.history[turn])
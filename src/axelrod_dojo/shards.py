@@ -0,0 +1,162 @@
+"""
+Evaluation by batch jobs sharing a filesystem with the driver.
+
+The `ShardBackend` of an algorithm writes the tasks of each call, scoring
+functions with their arguments (including the genomes), to a new batch
+directory as shard files of `shard_size` tasks and points the `current` file
+of its directory to the batch. Each job then scores a shard with
+`score_shard`, or `bin/shard_worker.py`, and writes its results next to it.
+The driver waits for the results of every shard and merges them.
+
+All files are written atomically, so that a shard or a result file is either
+complete or absent. Results that can not be read, or that do not hold a
+result for every task of their shard, are treated as missing.
+"""
+import os
+import pickle
+import shutil
+import time
+import uuid
+
+from axelrod_dojo.backends import Backend
+from axelrod_dojo.utils import write_atomically
+
+
+class MissingShardsError(RuntimeError):
+    """Raised when shards have no complete results in time."""
+    def __init__(self, batch, shards):
+        super().__init__("Shards {} of {} have no complete results".format(
+            shards, batch))
+        self.batch = batch
+        self.shards = shards
+
+
+def shard_filename(batch, index):
+    return os.path.join(batch, "shard-{:05d}.pickle".format(index))
+
+
+def result_filename(batch, index):
+    return os.path.join(batch, "result-{:05d}.pickle".format(index))
+
+
+def current_batch(directory):
+    """Return the batch directory the driver is waiting on."""
+    with open(os.path.join(directory, "current")) as f:
+        return os.path.join(directory, f.read().strip())
+
+
+def read_results(batch, index, num_tasks):
+    """Return the (succeeded, results) of a shard, or None if they are
+    missing or incomplete."""
+    try:
+        with open(result_filename(batch, index), "rb") as f:
+            succeeded, results = pickle.load(f)
+    except Exception:
+        return None
+    if succeeded and len(results) != num_tasks:
+        return None
+    return succeeded, results
+
+
+def score_shard(batch, index):
+    """
+    Run the tasks of a shard and write their results, unless they have
+    already been written. An exception raised by a task is written instead,
+    and raised by the driver.
+
+    Returns False if the batch has no such shard.
+    """
+    if not os.path.exists(shard_filename(batch, index)):
+        return False
+    with open(shard_filename(batch, index), "rb") as f:
+        function, tasks = pickle.load(f)
+    if read_results(batch, index, len(tasks)) is not None:
+        return True
+    try:
+        results = (True, [function(*args) for args in tasks])
+    except Exception as error:
+        results = (False, error)
+    write_atomically(result_filename(batch, index), pickle.dumps(results))
+    return True
+
+
+class ShardBackend(Backend):
+    """
+    A driver running tasks as shard files scored by batch jobs.
+
+    Parameters
+    ----------
+    directory : string
+        A directory on the filesystem shared with the jobs.
+    shard_size : integer
+        The number of tasks per shard.
+    submit_jobs : function
+        Called with the batch directory and a list of shard indices when
+        shards need to be scored, for instance to submit a job array. If
+        None the jobs are started by other means, reading the batch from the
+        `current` file.
+    timeout : float
+        The number of seconds to wait for the results of a batch, or None to
+        wait for ever.
+    retries : integer
+        The number of times the shards still missing results at the timeout
+        are submitted again before raising `MissingShardsError`.
+    poll_interval : float
+        The number of seconds between checks for results.
+    keep_files : bool
+        Whether to keep the batch directories once merged.
+    """
+    def __init__(self, directory, shard_size=10, submit_jobs=None,
+                 timeout=None, retries=0, poll_interval=1, keep_files=False):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.submit_jobs = submit_jobs
+        self.timeout = timeout
+        self.retries = retries
+        self.poll_interval = poll_interval
+        self.keep_files = keep_files
+        os.makedirs(directory, exist_ok=True)
+
+    def starmap(self, function, iterable, chunksize=None):
+        tasks = list(iterable)
+        if not tasks:
+            return []
+        name = "batch-{}".format(uuid.uuid4().hex)
+        batch = os.path.join(self.directory, name)
+        os.makedirs(batch)
+        shards = [tasks[i:i + self.shard_size]
+                  for i in range(0, len(tasks), self.shard_size)]
+        for index, shard in enumerate(shards):
+            write_atomically(shard_filename(batch, index),
+                             pickle.dumps((function, shard)))
+        write_atomically(os.path.join(self.directory, "current"),
+                         name.encode())
+
+        results = [None] * len(shards)
+        missing = list(range(len(shards)))
+        for _ in range(self.retries + 1):
+            if self.submit_jobs is not None:
+                self.submit_jobs(batch, missing)
+            start = time.monotonic()
+            while True:
+                for index in missing:
+                    results[index] = read_results(batch, index,
+                                                  len(shards[index]))
+                    if results[index] is not None and not results[index][0]:
+                        raise results[index][1]
+                missing = [index for index in missing
+                           if results[index] is None]
+                if not missing or (
+                        self.timeout is not None and
+                        time.monotonic() - start > self.timeout):
+                    break
+                time.sleep(self.poll_interval)
+            if not missing:
+                break
+        if missing:
+            raise MissingShardsError(batch, missing)
+
+        if not self.keep_files:
+            shutil.rmtree(batch)
+        return [result for _, shard_results in results
+                for result in shard_results]
@@ -1,12 +1,22 @@
 from collections import namedtuple
+from contextlib import contextmanager
 from functools import partial
 from statistics import mean
 import csv
+import hashlib
 import os
+import random
+import socket
+import threading
 
 import numpy as np
 import axelrod as axl
 
+from axelrod_dojo.engines.markov import expected_final_scores_per_turn
+from axelrod_dojo.engines.responses import (TrieOpponent,
+                                            load_response_tries,
+                                            uses_response_trie)
+
 
 ## Output Evolutionary Algorithm results
 
@@ -24,13 +34,28 @@ class Outputer(object):
         self.output.close()
 
 
+def write_atomically(filename, data):
+    """Write bytes to a file through a temporary file of the same
+    directory, so that readers never see a partial file."""
+    temporary_filename = "{}.{}.{}.tmp".format(filename, socket.gethostname(),
+                                               os.getpid())
+    with open(temporary_filename, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary_filename, filename)
+
+
 ## Objective functions for optimization
 
 def prepare_objective(name="score", turns=200, noise=0., repetitions=None,
-                      nmoran=None, match_attributes=None):
+                      nmoran=None, match_attributes=None, exact=False):
     name = name.lower()
     if name not in ["score", "score_diff", "moran"]:
         raise ValueError("Score must be one of score, score_diff, or moran")
+    if exact and name == "moran":
+        raise ValueError("Exact evaluation is only available for score and "
+                         "score_diff")
     if name == "moran":
         if repetitions is None:
             repetitions = 1000
@@ -42,51 +67,219 @@ def prepare_objective(name="score", turns=200, noise=0., repetitions=None,
     elif name == "score":
         if repetitions is None:
             repetitions = 20
-        objective = partial(objective_score, turns=turns, noise=noise,
+        function = objective_expected_score if exact else objective_score
+        objective = partial(function, turns=turns, noise=noise,
                             repetitions=repetitions,
                             match_attributes=match_attributes)
     elif name == "score_diff":
         if repetitions is None:
             repetitions = 20
-        objective = partial(objective_score_diff, turns=turns, noise=noise,
+        if exact:
+            function = objective_expected_score_diff
+        else:
+            function = objective_score_diff
+        objective = partial(function, turns=turns, noise=noise,
                             repetitions=repetitions,
                             match_attributes=match_attributes)
     return objective
 
 
-def objective_score(me, other, turns, noise, repetitions, match_attributes=None):
-    """Objective function to maximize total score over matches."""
+def state_key(player):
+    """
+    Return a hashable key for the internal state of a deterministic player
+    together with the number of previous turns its next move depends on, or
+    None if the state of the player cannot be captured.
+
+    Finite state machines are keyed by their current state. Players that
+    make no use of the history at all have no state.
+    """
+    if isinstance(player, axl.FSMPlayer):
+        return player.fsm.state, 1
+    if (player.classifier['memory_depth'] == 0 and
+            not player.classifier['makes_use_of']):
+        return (), 0
+    return None
+
+
+def cyclic_final_scores(match):
+    """
+    Return the total scores of both players in a deterministic match by
+    detecting the cycle that the joint state of the players enters, or None
+    if the state of a player cannot be captured.
+
+    Only the transient and a single period of the cycle are played; the
+    scores of the remaining turns are computed in closed form.
+    """
+    players = match.players
+    if any(state_key(player) is None for player in players):
+        return None
+    depth = max([1] + [state_key(player)[1] for player in players])
+
+    for player in players:
+        player.reset()
+    turns = match.turns
+    totals = [(0, 0)]
+    seen = {}
+    for turn in range(1, turns + 1):
+        players[0].play(players[1])
+        scores = match.game.score((players[0].history[-1],
+                                   players[1].history[-1]))
+        totals.append((totals[-1][0] + scores[0], totals[-1][1] + scores[1]))
+        if turn < depth:
+            continue
+        key = (tuple(state_key(player)[0] for player in players),
+               tuple(players[0].history[-depth:]),
+               tuple(players[1].history[-depth:]))
+        if key in seen:
+            start = seen[key]
+            cycles, remainder = divmod(turns - turn, turn - start)
+            return tuple(
+                totals[turn][i] +
+                cycles * (totals[turn][i] - totals[start][i]) +
+                totals[start + remainder][i] - totals[start][i]
+                for i in range(2))
+        seen[key] = turn
+    return totals[turns]
+
+
+## Common random numbers
+
+def stream_seed(*keys):
+    """Return a 32 bit seed derived from a sequence of integer keys, the same
+    in every process."""
+    description = repr(tuple(int(key) for key in keys)).encode()
+    return int.from_bytes(hashlib.sha256(description).digest()[:4], "little")
+
+
+class MirroredRandom(random.Random):
+    """A random number generator drawing 1 - u wherever a generator with the
+    same seed draws u."""
+    def random(self):
+        return 1 - super().random()
+
+
+# axelrod draws from the random state of the process, so the threads of a
+# process take turns to play on random streams
+_stream_lock = threading.RLock()
+
+
+@contextmanager
+def random_stream(seed, repetition, antithetic=False):
+    """
+    Play a repetition of a match on the random stream of a seed, restoring
+    the random state of the process afterwards.
+
+    With antithetic pairs, repetitions 2k and 2k + 1 share a stream and the
+    second one draws 1 - u wherever the first draws u from `random.random`,
+    which axelrod uses for noise and for stochastic decisions. The second
+    repetition draws from its own `MirroredRandom`, installed as
+    `random.random` while it is played. Draws from `numpy.random` are not
+    mirrored, so strategies driven by numpy are played on the stream of the
+    pair but are not antithetic.
+
+    As axelrod has no random state of its own, a stream replaces the one of
+    the process: threads of the process playing on streams wait for each
+    other, but any other thread drawing random numbers meanwhile draws from
+    the stream. Play on streams in separate processes rather than threads.
+
+    Without a seed the repetition is played on the random state of the
+    process.
+    """
+    if seed is None:
+        yield
+        return
+    if antithetic:
+        repetition, mirrored = divmod(repetition, 2)
+    else:
+        mirrored = False
+    with _stream_lock:
+        state, numpy_state = random.getstate(), np.random.get_state()
+        draw = random.random
+        axl.seed(stream_seed(seed, repetition))
+        if mirrored:
+            random.random = MirroredRandom(
+                stream_seed(seed, repetition)).random
+        try:
+            yield
+        finally:
+            random.random = draw
+            random.setstate(state)
+            np.random.set_state(numpy_state)
+
+
+def objective_score(me, other, turns, noise, repetitions, match_attributes=None,
+                    seed=None, antithetic=False):
+    """Objective function to maximize total score over matches. If a seed is
+    given each repetition is played on its own random stream (see
+    `random_stream`)."""
     match = axl.Match((me, other), turns=turns, noise=noise,
                       match_attributes=match_attributes)
     if not match._stochastic:
         repetitions = 1
+        final_scores = cyclic_final_scores(match)
+        if final_scores is not None:
+            return [final_scores[0] / match.turns]
     scores_for_this_opponent = []
 
-    for _ in range(repetitions):
-        match.play()
+    for repetition in range(repetitions):
+        with random_stream(seed, repetition, antithetic):
+            match.play()
         scores_for_this_opponent.append(match.final_score_per_turn()[0])
     return scores_for_this_opponent
 
 
 def objective_score_diff(me, other, turns, noise, repetitions,
-                         match_attributes=None):
+                         match_attributes=None, seed=None, antithetic=False):
     """Objective function to maximize total score difference over matches."""
     match = axl.Match((me, other), turns=turns, noise=noise,
                       match_attributes=match_attributes)
     if not match._stochastic:
         repetitions = 1
+        final_scores = cyclic_final_scores(match)
+        if final_scores is not None:
+            return [final_scores[0] / match.turns -
+                    final_scores[1] / match.turns]
     scores_for_this_opponent = []
 
-    for _ in range(repetitions):
-        match.play()
+    for repetition in range(repetitions):
+        with random_stream(seed, repetition, antithetic):
+            match.play()
         final_scores = match.final_score_per_turn()
         score_diff = final_scores[0] - final_scores[1]
         scores_for_this_opponent.append(score_diff)
     return scores_for_this_opponent
 
 
+def objective_expected_score(me, other, turns, noise, repetitions,
+                             match_attributes=None, seed=None,
+                             antithetic=False):
+    """Objective function to maximize the exact expected score over matches.
+    Falls back to simulation if a player can not be described as a finite
+    Markov chain."""
+    final_scores = expected_final_scores_per_turn(me, other, turns, noise)
+    if final_scores is None:
+        return objective_score(me, other, turns, noise, repetitions,
+                               match_attributes=match_attributes, seed=seed,
+                               antithetic=antithetic)
+    return [final_scores[0]]
+
+
+def objective_expected_score_diff(me, other, turns, noise, repetitions,
+                                  match_attributes=None, seed=None,
+                                  antithetic=False):
+    """Objective function to maximize the exact expected score difference
+    over matches. Falls back to simulation if a player can not be described
+    as a finite Markov chain."""
+    final_scores = expected_final_scores_per_turn(me, other, turns, noise)
+    if final_scores is None:
+        return objective_score_diff(me, other, turns, noise, repetitions,
+                                    match_attributes=match_attributes,
+                                    seed=seed, antithetic=antithetic)
+    return [final_scores[0] - final_scores[1]]
+
+
 def objective_moran_win(me, other, turns, noise, repetitions, N=5,
-                        match_attributes=None):
+                        match_attributes=None, seed=None, antithetic=False):
     """Objective function to maximize Moran fixations over N=4 matches"""
     population = []
     for _ in range(N):
@@ -96,9 +289,10 @@ def objective_moran_win(me, other, turns, noise, repetitions, N=5,
 
     scores_for_this_opponent = []
 
-    for _ in range(repetitions):
+    for repetition in range(repetitions):
         mp.reset()
-        mp.play()
+        with random_stream(seed, repetition, antithetic):
+            mp.play()
         if mp.winning_strategy_name == str(me):
             scores_for_this_opponent.append(1)
         else:
@@ -134,6 +328,12 @@ class Params(object):
     def crossover(self, other):
         pass
 
+    def canonical_form(self):
+        """Returns a behaviourally equivalent instance in a normal form, so
+        that equivalent instances have the same repr. By default an
+        instance is its own normal form."""
+        return self
+
     def receive_vector(self, vector):
         """Receives a vector and creates an instance attribute called
         vector."""
@@ -152,32 +352,207 @@ PlayerInfo = namedtuple('PlayerInfo', ['strategy', 'init_kwargs'])
 
 def score_params(params, objective,
                  opponents_information, weights=None, sample_count=None,
-                 instance_generation_function='player'):
+                 instance_generation_function='player', response_tries=False,
+                 seed=None, antithetic=False):
     """
     Return the overall mean score of a Params instance.
-    """
-    scores_for_all_opponents = []
 
-    player = getattr(params, instance_generation_function)()
+    If `response_tries` is True, or the name of a file of saved tries, the
+    moves of deterministic opponents are read from the response tries of the
+    process where possible (see `axelrod_dojo.engines.responses`).
 
+    If a seed is given, the repetitions against each opponent are played on
+    random streams that only depend on the seed, the opponent and the
+    repetition, so that Params instances scored with the same seed face the
+    same noise and opponent randomness, in any process. The objective must
+    accept the seed and antithetic keywords, as the objectives of
+    `prepare_objective` do.
+    """
+    indices = range(len(opponents_information))
     if sample_count is not None:
         indices = np.random.choice(len(opponents_information), sample_count)
-        opponents_information = [opponents_information[i] for i in indices]
         if weights is not None:
             weights = [weights[i] for i in indices]
 
-    for strategy, init_kwargs in opponents_information:
-        player.reset()
-        opponent = strategy(**init_kwargs)
-        scores_for_this_opponent = objective(player, opponent)
-        mean_vs_opponent = mean(scores_for_this_opponent)
-        scores_for_all_opponents.append(mean_vs_opponent)
+    scores_for_all_opponents = score_opponents(
+        params, objective, opponents_information, indices,
+        instance_generation_function, response_tries, seed, antithetic)
 
     overall_mean_score = np.average(scores_for_all_opponents,
                                     weights=weights)
     return overall_mean_score
 
 
+def score_opponents(params, objective, opponents_information, indices,
+                    instance_generation_function='player',
+                    response_tries=False, seed=None, antithetic=False):
+    """
+    Return the mean score of a Params instance against each of the opponents
+    at the given indices of `opponents_information`, scored as by
+    `score_params`.
+    """
+    if isinstance(response_tries, str):
+        load_response_tries(response_tries)
+    use_tries = uses_tries(objective, response_tries)
+    player = getattr(params, instance_generation_function)()
+    opponents = []
+    for index in indices:
+        strategy, init_kwargs = opponents_information[index]
+        opponents.append(build_opponent(strategy, init_kwargs, use_tries))
+    return play_opponents(player, objective, opponents, indices, seed,
+                          antithetic)
+
+
+def uses_tries(objective, response_tries):
+    """Return True if opponents should be played from response tries for an
+    objective."""
+    return bool(response_tries) and isinstance(objective, partial) and (
+        objective.func in (objective_score, objective_score_diff))
+
+
+def build_opponent(strategy, init_kwargs, use_tries=False):
+    """Return an opponent, reading its moves from its response trie if
+    possible when `use_tries` is True."""
+    opponent = strategy(**init_kwargs)
+    # Opponents whose matches are shortened by cycle detection are played
+    # directly
+    if (use_tries and uses_response_trie(opponent) and
+            state_key(opponent) is None):
+        opponent = TrieOpponent(opponent)
+    return opponent
+
+
+def play_opponents(player, objective, opponents, indices, seed=None,
+                   antithetic=False):
+    """Return the mean score of a player against each opponent, the index of
+    an opponent keying its random streams if a seed is given."""
+    scores = []
+    for index, opponent in zip(indices, opponents):
+        player.reset()
+        opponent.reset()
+        if seed is None:
+            scores_for_this_opponent = objective(player, opponent)
+        else:
+            scores_for_this_opponent = objective(
+                player, opponent, seed=stream_seed(seed, index),
+                antithetic=antithetic)
+        scores.append(mean(scores_for_this_opponent))
+    return scores
+
+
+## Worker processes
+
+# The evaluation set up of the current worker process, see `init_worker`
+WORKER = {}
+
+
+def init_worker(objective, opponents_information, weights=None,
+                response_tries=False):
+    """
+    Pool initializer keeping the objective, the opponents and their weights
+    in each worker process, so that tasks only need to carry the genomes.
+
+    The opponents are built once and reset between uses. Matches are still
+    created for each genome: the deterministic cache of a match is keyed by
+    player names, so a match can not be shared by genomes.
+    """
+    if isinstance(response_tries, str):
+        load_response_tries(response_tries)
+    use_tries = uses_tries(objective, response_tries)
+    WORKER.clear()
+    WORKER.update(objective=objective, weights=weights, opponents=[
+        build_opponent(strategy, init_kwargs, use_tries)
+        for strategy, init_kwargs in opponents_information])
+
+
+def score_params_in_worker(params, sample_count=None,
+                           instance_generation_function='player', seed=None,
+                           antithetic=False):
+    """Return the overall mean score of a Params instance against the
+    opponents of the worker process, as `score_params`."""
+    weights = WORKER["weights"]
+    indices = range(len(WORKER["opponents"]))
+    if sample_count is not None:
+        indices = np.random.choice(len(WORKER["opponents"]), sample_count)
+        if weights is not None:
+            weights = [weights[i] for i in indices]
+    scores_for_all_opponents = score_opponents_in_worker(
+        params, indices, instance_generation_function, seed, antithetic)
+    return np.average(scores_for_all_opponents, weights=weights)
+
+
+def score_opponents_in_worker(params, indices,
+                              instance_generation_function='player',
+                              seed=None, antithetic=False):
+    """Return the mean score of a Params instance against each of the
+    opponents of the worker process at the given indices."""
+    player = getattr(params, instance_generation_function)()
+    opponents = [WORKER["opponents"][i] for i in indices]
+    return play_opponents(player, WORKER["objective"], opponents, indices,
+                          seed, antithetic)
+
+
+def breed_offspring(parents, recipe, params_class, params_kwargs):
+    """
+    Return the individual bred from a list of parents by a recipe, an
+    (operator, ingredients, seed) tuple, the same in every process:
+
+    - ("survivor", (i,), None) is the parent i itself,
+    - ("random", (), seed) is a new random individual,
+    - ("mutant", (recipe,), seed) is a mutated copy of the individual of a
+      recipe,
+    - ("crossover", (recipe, recipe), seed) is the mutated crossover of the
+      individuals of two recipes.
+
+    Random draws are made on the random stream of the seed.
+    """
+    operator, ingredients, seed = recipe
+    if operator == "survivor":
+        return parents[ingredients[0]]
+    with random_stream(seed, 0):
+        if operator == "random":
+            return params_class(**params_kwargs)
+        ingredients = [breed_offspring(parents, ingredient, params_class,
+                                       params_kwargs)
+                       for ingredient in ingredients]
+        if operator == "mutant":
+            child = ingredients[0].copy()
+        elif operator == "crossover":
+            child = ingredients[0].crossover(ingredients[1])
+        else:
+            raise ValueError("Unknown breeding operator {}".format(operator))
+        child.mutate()
+    return child
+
+
+def score_offspring_in_worker(parents, recipes, params_class, params_kwargs,
+                              sample_count=None, seed=None, antithetic=False):
+    """Breed individuals from a list of parents by their recipes (see
+    `breed_offspring`) and return their scores against the opponents of the
+    worker process, as `score_params_in_worker`."""
+    return [score_params_in_worker(
+                breed_offspring(parents, recipe, params_class, params_kwargs),
+                sample_count, 'player', seed, antithetic)
+            for recipe in recipes]
+
+
+def sample_params(params, objective, opponents_information, repetitions,
+                  instance_generation_function='player'):
+    """
+    Return the scores of a Params instance against each opponent over the
+    given number of repetitions: one list of scores per opponent, holding a
+    single score for deterministic matches.
+    """
+    objective = partial(objective, repetitions=repetitions)
+    player = getattr(params, instance_generation_function)()
+    samples = []
+    for strategy, init_kwargs in opponents_information:
+        player.reset()
+        opponent = strategy(**init_kwargs)
+        samples.append(objective(player, opponent))
+    return samples
+
+
 def load_params(params_class, filename, num):
     """Load the best num parameters from the given file."""
     parser = params_class.parse_repr
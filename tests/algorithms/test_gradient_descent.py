@@ -0,0 +1,92 @@
+import functools
+import unittest
+
+import axelrod as axl
+import numpy as np
+from axelrod.strategies.lookerup import Plays
+
+from axelrod_dojo import GamblerParams, GradientDescent, prepare_objective
+from axelrod_dojo.engines.markov import expected_final_scores_per_turn
+
+
+class TestGradientDescent(unittest.TestCase):
+    params_kwargs = {"plays": 1, "op_plays": 1, "op_start_plays": 1}
+
+    def test_init_default(self):
+        objective = prepare_objective('score', 2, 0, 1)
+        opponents = [axl.Defector(), axl.Cooperator()]
+        gd = GradientDescent(GamblerParams, self.params_kwargs,
+                             objective=objective, opponents=opponents)
+
+        self.assertIsInstance(gd.objective, functools.partial)
+        self.assertEqual(len(gd.opponents_information), len(opponents))
+        self.assertEqual(len(gd.opponent_models), len(opponents))
+        self.assertEqual(gd.starts, 1)
+        self.assertEqual(gd.iterations, 100)
+        self.assertTrue(gd.debug)
+        self.assertEqual(gd.turns, 2)
+        self.assertEqual(gd.noise, 0)
+        self.assertEqual(gd.evaluations, 0)
+
+    def test_default_opponents(self):
+        objective = prepare_objective('score', 2, 0, 1)
+        gd = GradientDescent(GamblerParams, self.params_kwargs,
+                             objective=objective)
+        self.assertGreater(len(gd.opponent_models), 0)
+        self.assertEqual(len(gd.opponent_models),
+                         len(gd.opponents_information))
+
+    def test_init_errors(self):
+        objective = prepare_objective('moran', 2, 0, 1)
+        self.assertRaises(ValueError, GradientDescent, GamblerParams,
+                          self.params_kwargs, objective=objective,
+                          opponents=[axl.Defector()])
+        objective = prepare_objective('score', 2, 0, 1)
+        self.assertRaises(ValueError, GradientDescent, GamblerParams,
+                          self.params_kwargs, objective=objective,
+                          opponents=[axl.Tester()])
+
+    def test_score_gradient(self):
+        objective = prepare_objective('score_diff', 10, .05, 1)
+        opponents = [axl.TitForTat(), axl.Random(), axl.PSOGambler1_1_1()]
+        weights = [1, 2, 3]
+        gd = GradientDescent(GamblerParams, self.params_kwargs,
+                             objective=objective, opponents=opponents,
+                             weights=weights)
+        axl.seed(0)
+        params = GamblerParams(**self.params_kwargs)
+        params.receive_vector(np.random.random(8))
+        score, gradient = gd.score_gradient(params)
+
+        player = axl.Gambler(pattern=list(params.vector),
+                             parameters=Plays(1, 1, 1))
+        expected = []
+        for opponent in opponents:
+            my_score, their_score = expected_final_scores_per_turn(
+                player, opponent, 10, .05)
+            expected.append(my_score - their_score)
+        self.assertAlmostEqual(score, np.average(expected, weights=weights))
+
+        epsilon = 1e-6
+        vector = params.vector
+        for i in range(len(vector)):
+            params.receive_vector(vector + epsilon * np.eye(len(vector))[i])
+            shifted_score, _ = gd.score_gradient(params)
+            self.assertAlmostEqual((shifted_score - score) / epsilon,
+                                   gradient[i], places=4)
+
+    def test_optimize(self):
+        objective = prepare_objective('score', 10, 0, 1)
+        opponents = [axl.Defector(), axl.Grudger()]
+        gd = GradientDescent(GamblerParams, self.params_kwargs,
+                             objective=objective, opponents=opponents,
+                             starts=2, debug=False)
+        axl.seed(0)
+        xopt, fopt = gd.optimize()
+
+        self.assertEqual(len(xopt), 8)
+        self.assertTrue(np.all((0 <= xopt) & (xopt <= 1)))
+        # Cooperating with the Grudger throughout and defecting against the
+        # Defector after the first turn
+        self.assertAlmostEqual(fopt, -(3 + .9) / 2)
+        self.assertGreater(gd.evaluations, 0)
@@ -0,0 +1,76 @@
+import csv
+import os
+import tempfile
+import unittest
+from multiprocessing import Queue
+
+import axelrod as axl
+
+import axelrod_dojo as dojo
+from axelrod_dojo.algorithms.island_model import (island_filename,
+                                                  neighbours, run_island)
+
+C, D = axl.Action.C, axl.Action.D
+
+
+class TestNeighbours(unittest.TestCase):
+    def test_neighbours(self):
+        self.assertEqual(neighbours("ring", 3), [[1], [2], [0]])
+        self.assertEqual(neighbours("ring", 1), [[]])
+        self.assertEqual(neighbours("complete", 3), [[1, 2], [0, 2], [0, 1]])
+        self.assertEqual(neighbours([[1], []], 2), [[1], []])
+        for topology in ["star", [[1]]]:
+            with self.assertRaises(ValueError):
+                neighbours(topology, 2)
+
+    def test_island_filename(self):
+        self.assertEqual(island_filename("fsm.csv", 2), "fsm_2.csv")
+
+
+class TestIslands(unittest.TestCase):
+    def test_run(self):
+        directory = tempfile.TemporaryDirectory()
+        output_filename = os.path.join(directory.name, "fsm.csv")
+        objective = dojo.prepare_objective(name="score", turns=10)
+        opponents = [axl.TitForTat(), axl.Alternator(), axl.Grudger()]
+        islands = dojo.Islands(dojo.FSMParams, {"num_states": 2}, 6,
+                               objective, output_filename, islands=3,
+                               migration_interval=2, opponents=opponents,
+                               bottleneck=2)
+        axl.seed(0)
+        score, best = islands.run(4)
+
+        self.assertEqual(len(islands.results), 3)
+        for island, survivors in enumerate(islands.results):
+            self.assertEqual(len(survivors), 2)
+            self.assertEqual(survivors[0][0], dojo.utils.score_params(
+                survivors[0][1], objective,
+                [dojo.PlayerInfo(type(p), {}) for p in opponents]))
+            with open(island_filename(output_filename, island)) as f:
+                self.assertEqual(len(list(csv.reader(f))), 4)
+        self.assertEqual(score, max(survivors[0][0]
+                                    for survivors in islands.results))
+        self.assertIsInstance(best, dojo.FSMParams)
+        directory.cleanup()
+
+    def test_immigrants_replace_newest_offspring(self):
+        directory = tempfile.TemporaryDirectory()
+        output_filename = os.path.join(directory.name, "fsm.csv")
+        objective = dojo.prepare_objective(name="score", turns=10)
+        defector = dojo.FSMParams(num_states=1,
+                                  rows=[[0, C, 0, D], [0, D, 0, D]],
+                                  initial_action=D)
+        inboxes, results = [Queue(), Queue()], Queue()
+        inboxes[0].put([defector])
+        population_args = (dojo.FSMParams, {"num_states": 1}, 4, objective,
+                           output_filename)
+        run_island(0, 0, 2, 1, 1, inboxes, [1], 1, results, population_args,
+                   {"opponents": [axl.Cooperator()], "bottleneck": 2,
+                    "mutation_probability": 0})
+
+        island, survivors = results.get()
+        self.assertEqual(island, 0)
+        self.assertEqual(len(inboxes[1].get()), 1)
+        self.assertEqual(survivors[0][0], 5)
+        self.assertEqual(repr(survivors[0][1]), repr(defector))
+        directory.cleanup()
@@ -118,3 +118,31 @@ class TestPSO(unittest.TestCase):
                                                           0.31542835, 0.36371077,
                                                           0.57019677])))
         self.assertEqual(abs(opt_objective_value), 1)
+
+    def test_score_with_backends(self):
+        objective = prepare_objective('score', turns=10, repetitions=1)
+        opponents = [axl.TitForTat(), axl.Alternator(), axl.Grudger(),
+                     axl.Defector(), axl.Cooperator()]
+        weights = [1, 2, 3, 4, 5]
+        params = FSMParams(num_states=2)
+        pso = PSO(FSMParams, {"num_states": 2}, objective=objective,
+                  opponents=opponents, weights=weights)
+        expected = dojo.utils.score_params(params, objective,
+                                           pso.opponents_information,
+                                           weights=weights)
+        for backend in [dojo.SerialBackend(),
+                        dojo.MultiprocessingBackend(2),
+                        dojo.ProcessPoolBackend(3)]:
+            with backend:
+                self.assertAlmostEqual(pso.score(params, backend), expected)
+
+    def test_swarm_with_processes(self):
+        objective = prepare_objective('score', turns=10, repetitions=1)
+        pso = PSO(FSMParams, {"num_states": 2}, objective=objective,
+                  opponents=[axl.TitForTat(), axl.Defector()], population=4,
+                  generations=2, debug=False, processes=2)
+        opt_vector, opt_objective_value = pso.swarm()
+        params = FSMParams(num_states=2)
+        params.receive_vector(opt_vector)
+        self.assertAlmostEqual(-opt_objective_value, dojo.utils.score_params(
+            params, objective, pso.opponents_information))
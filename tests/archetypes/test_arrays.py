@@ -0,0 +1,154 @@
+import unittest
+
+import axelrod as axl
+import numpy as np
+
+from axelrod_dojo import FSMArrays, FSMParams, HMMArrays, HMMParams
+from axelrod_dojo.archetypes.arrays import (normalize_rows, random_vectors,
+                                            select)
+
+C, D = axl.Action.C, axl.Action.D
+
+
+class TestSelect(unittest.TestCase):
+    def test_select(self):
+        scores = [3, 1, 4, 1, 5, 9, 2, 6]
+        self.assertEqual(list(select(scores, 3)), [5, 7, 4])
+        self.assertEqual([scores[i] for i in select(scores, 20)],
+                         sorted(scores, reverse=True))
+        self.assertEqual(list(select(scores, 0)), [])
+
+
+class TestHelpers(unittest.TestCase):
+    def test_random_vectors(self):
+        axl.seed(0)
+        vectors = random_vectors((10, 3, 4))
+        self.assertEqual(vectors.shape, (10, 3, 4))
+        self.assertTrue(np.allclose(vectors.sum(axis=-1), 1))
+        self.assertTrue((vectors >= 0).all())
+
+    def test_normalize_rows(self):
+        rows = normalize_rows(np.array([[1., 3.], [0., 0.]]))
+        self.assertEqual(rows.tolist(), [[.25, .75], [.5, .5]])
+
+
+class TestFSMArrays(unittest.TestCase):
+    def test_params(self):
+        rows = [[0, C, 1, D], [0, D, 0, C], [1, C, 1, C], [1, D, 0, D]]
+        population = [FSMParams(2, rows, 1, D),
+                      FSMParams(2, rows, 0, C)]
+        arrays = FSMArrays.from_params(population, .5)
+        self.assertEqual(len(arrays), 2)
+        self.assertEqual(arrays.next_states[0].tolist(), [[1, 0], [1, 0]])
+        self.assertEqual(arrays.actions[0].tolist(), [[1, 0], [0, 1]])
+        self.assertEqual(arrays.initial_states.tolist(), [1, 0])
+        self.assertEqual(arrays.initial_actions.tolist(), [1, 0])
+        params = arrays.to_params()
+        self.assertEqual([repr(p) for p in params],
+                         [repr(p) for p in population])
+        self.assertEqual(params[0].mutation_probability, .5)
+
+    def test_sequence(self):
+        axl.seed(0)
+        arrays = FSMArrays.random(5, 3)
+        population = arrays.to_params()
+        self.assertEqual(repr(arrays[3]), repr(population[3]))
+        self.assertEqual(repr(arrays[-1]), repr(population[-1]))
+        self.assertEqual([repr(p) for p in arrays[1:3]],
+                         [repr(p) for p in population[1:3]])
+        self.assertEqual([repr(p) for p in arrays],
+                         [repr(p) for p in population])
+
+    def test_keys(self):
+        axl.seed(0)
+        arrays = FSMArrays.random(3, 3)
+        keys = arrays.concatenate(arrays.take([1])).keys()
+        self.assertEqual(len(set(keys)), 3)
+        self.assertEqual(keys[1], keys[3])
+
+    def test_random(self):
+        axl.seed(0)
+        arrays = FSMArrays.random(50, 3)
+        for params in arrays.to_params():
+            self.assertEqual(len(params.rows), 6)
+            self.assertTrue(all(0 <= row[2] < 3 for row in params.rows))
+
+    def test_mutate(self):
+        axl.seed(0)
+        arrays = FSMArrays.random(100, 4, mutation_probability=0)
+        mutants = arrays.take(np.arange(100))
+        mutants.mutate()
+        # Without flips, mutation only swaps the transitions of two states
+        for g in range(100):
+            self.assertEqual(
+                sorted(zip(arrays.next_states[g].tolist(),
+                           arrays.actions[g].tolist())),
+                sorted(zip(mutants.next_states[g].tolist(),
+                           mutants.actions[g].tolist())))
+        self.assertFalse(np.array_equal(arrays.next_states,
+                                        mutants.next_states))
+
+        mutants = arrays.take(np.arange(100))
+        mutants.mutation_probability = 1
+        mutants.mutate()
+        # Every action is flipped
+        self.assertEqual((mutants.actions.sum(axis=(1, 2)) +
+                          arrays.actions.sum(axis=(1, 2))).tolist(), [8] * 100)
+
+    def test_crossover(self):
+        axl.seed(0)
+        arrays = FSMArrays.random(2, 5)
+        children = arrays.crossover(np.zeros(20, dtype=int),
+                                    np.ones(20, dtype=int))
+        self.assertEqual(len(children), 20)
+        for child in range(20):
+            from_first = [np.array_equal(children.next_states[child, s],
+                                         arrays.next_states[0, s])
+                          for s in range(5)]
+            # Children start with the states of the first parent
+            self.assertEqual(from_first, sorted(from_first, reverse=True))
+        self.assertEqual(set(children.initial_states.tolist()),
+                         {arrays.initial_states[0]})
+
+    def test_breed(self):
+        axl.seed(0)
+        survivors = FSMArrays.random(4, 3, .1)
+        # Mutants of the survivors and crossovers up to the size less the
+        # survivors, mutants and random variants, as evolve
+        offspring = survivors.breed(20, 2)
+        self.assertEqual(len(offspring), 14)
+        self.assertEqual(len(survivors.breed(5, 2)), 4)
+
+
+class TestHMMArrays(unittest.TestCase):
+    def test_params(self):
+        axl.seed(0)
+        population = [HMMParams(3) for _ in range(4)]
+        arrays = HMMArrays.from_params(population)
+        self.assertEqual(arrays.mutation_probability, 10 / 9)
+        self.assertEqual([repr(p) for p in arrays.to_params()],
+                         [repr(p) for p in population])
+
+    def test_mutate(self):
+        axl.seed(0)
+        arrays = HMMArrays.random(50, 3, mutation_probability=.5)
+        self.assertEqual(arrays.initial_actions.tolist(), [0] * 50)
+        arrays.mutate()
+        for matrices in (arrays.transitions_C, arrays.transitions_D):
+            self.assertTrue(np.allclose(matrices.sum(axis=-1), 1))
+        self.assertTrue((arrays.emission_probabilities >= 0).all())
+        self.assertTrue((arrays.emission_probabilities <= 1).all())
+
+    def test_crossover(self):
+        axl.seed(0)
+        arrays = HMMArrays.random(2, 4)
+        children = arrays.crossover([0, 1, 1], [1, 0, 1])
+        self.assertEqual(len(children), 3)
+        self.assertTrue(np.array_equal(children.transitions_C[2],
+                                       arrays.transitions_C[1]))
+        for child, first, second in [(0, 0, 1), (1, 1, 0)]:
+            for row in range(4):
+                self.assertTrue(any(np.array_equal(
+                    children.transitions_D[child, row],
+                    arrays.transitions_D[parent, row])
+                    for parent in (first, second)))
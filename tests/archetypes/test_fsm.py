@@ -1,6 +1,7 @@
 import axelrod as axl
 import unittest
 import random
+import time
 
 from axelrod_dojo import FSMParams
 
@@ -166,3 +167,51 @@ class TestFSMParams(unittest.TestCase):
         self.assertEqual(len(lb), len(fsm_params.rows) * 2 + 1)
         self.assertIsInstance(ub, list)
         self.assertEqual(len(ub), len(fsm_params.rows) * 2 + 1)
+
+    def test_canonical_form(self):
+        # State 2 is unreachable and states 0 and 1 are equivalent
+        rows = [[0, C, 1, C], [0, D, 1, D], [1, C, 0, C], [1, D, 0, D],
+                [2, C, 2, D], [2, D, 2, D]]
+        fsm_params = FSMParams(num_states=3, rows=rows)
+        canonical = fsm_params.canonical_form()
+        self.assertEqual(canonical.num_states, 1)
+        self.assertEqual(canonical.rows, [[0, C, 0, C], [0, D, 0, D]])
+        self.assertEqual(canonical.initial_action, C)
+
+    def test_canonical_form_relabels_states(self):
+        rows = [[0, C, 1, D], [0, D, 0, D], [1, C, 1, C], [1, D, 0, D]]
+        relabelled_rows = [[0, C, 0, C], [0, D, 1, D],
+                           [1, C, 0, D], [1, D, 1, D]]
+        fsm_params = FSMParams(num_states=2, rows=rows, initial_state=1)
+        relabelled = FSMParams(num_states=2, rows=relabelled_rows,
+                               initial_state=0)
+        self.assertEqual(repr(fsm_params.canonical_form()),
+                         repr(relabelled.canonical_form()))
+
+    def test_canonical_form_of_a_chain(self):
+        # Telling the states apart takes as many refinement rounds as states
+        num_states = 24
+        rows = []
+        for state in range(num_states):
+            action = D if state == num_states - 1 else C
+            rows += [[state, C, (state + 1) % num_states, action],
+                     [state, D, 0, action]]
+        fsm_params = FSMParams(num_states=num_states, rows=rows)
+        start = time.perf_counter()
+        canonical = fsm_params.canonical_form()
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(canonical.num_states, num_states)
+
+    def test_canonical_form_plays_the_same(self):
+        axl.seed(0)
+        for _ in range(20):
+            fsm_params = FSMParams(num_states=8)
+            canonical = fsm_params.canonical_form()
+            self.assertLessEqual(canonical.num_states, 8)
+            for opponent in [axl.Alternator(), axl.Random()]:
+                histories = []
+                for params in [fsm_params, canonical]:
+                    axl.seed(1)
+                    match = axl.Match((params.player(), opponent), turns=30)
+                    histories.append(match.play())
+                self.assertEqual(*histories)
@@ -50,6 +50,17 @@ class TestGamblerParams(unittest.TestCase):
 
         self.assertIsInstance(instance, axl.Gambler)
 
+    def test_chain_model(self):
+        gambler_params = GamblerParams(plays=1, op_plays=1, op_start_plays=1)
+        vector = [random.random() for _ in range(8)]
+        gambler_params.receive_vector(vector)
+        model, indices = gambler_params.chain_model()
+
+        self.assertEqual(model.num_states, len(indices))
+        for cooperation, index in zip(model.cooperation, indices):
+            if index >= 0:
+                self.assertEqual(cooperation, vector[index])
+
     def test_create_vector_bounds(self):
         plays = 1
         op_plays = 1
@@ -1,5 +1,6 @@
 import unittest
 import random
+import time
 import axelrod as axl
 from axelrod_dojo.archetypes.hmm import random_vector
 
@@ -241,3 +242,66 @@ class TestHMMParams(unittest.TestCase):
         self.assertEqual(len(lb), size)
         self.assertIsInstance(ub, list)
         self.assertEqual(len(ub), size)
+
+    def test_canonical_form(self):
+        # State 2 is unreachable and states 0 and 1 are lumpable
+        t_C = [[.5, .5, 0], [.2, .8, 0], [0, 0, 1]]
+        t_D = [[1, 0, 0], [0, 1, 0], [1, 0, 0]]
+        p = [.3, .3, .9]
+        hmm_params = HMMParams(num_states=3, transitions_C=t_C,
+                               transitions_D=t_D, emission_probabilities=p,
+                               initial_state=1, initial_action=D)
+        canonical = hmm_params.canonical_form()
+        self.assertEqual(canonical.num_states, 1)
+        self.assertEqual(canonical.transitions_C, [[1.0]])
+        self.assertEqual(canonical.transitions_D, [[1]])
+        self.assertEqual(canonical.emission_probabilities, [.3])
+        self.assertEqual(canonical.initial_state, 0)
+        self.assertEqual(canonical.initial_action, D)
+
+    def test_canonical_form_of_a_chain(self):
+        num_states = 24
+        t = [[0] * num_states for _ in range(num_states)]
+        for state in range(num_states):
+            t[state][(state + 1) % num_states] = 1
+        p = [.5] * (num_states - 1) + [1]
+        hmm_params = HMMParams(num_states=num_states, transitions_C=t,
+                               transitions_D=t, emission_probabilities=p,
+                               initial_state=0)
+        start = time.perf_counter()
+        canonical = hmm_params.canonical_form()
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(canonical.num_states, num_states)
+
+    def test_canonical_form_breaks_ties(self):
+        # From state 0 states 1 and 2 are equally likely and emit the same,
+        # but only state 2 leads to state 3
+        t = [[0, .5, .5, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 0, 1]]
+        p = [.1, .5, .5, .9]
+        hmm_params = HMMParams(num_states=4, transitions_C=t,
+                               transitions_D=t, emission_probabilities=p,
+                               initial_state=0)
+        swap = [0, 2, 1, 3]
+        swapped_t = [[t[swap[i]][swap[j]] for j in range(4)]
+                     for i in range(4)]
+        swapped = HMMParams(num_states=4, transitions_C=swapped_t,
+                            transitions_D=swapped_t,
+                            emission_probabilities=[p[i] for i in swap],
+                            initial_state=0)
+        self.assertEqual(repr(hmm_params.canonical_form()),
+                         repr(swapped.canonical_form()))
+
+    def test_canonical_form_relabels_states(self):
+        t_C = [[.1, .9], [.6, .4]]
+        t_D = [[.3, .7], [1, 0]]
+        p = [.2, .7]
+        hmm_params = HMMParams(num_states=2, transitions_C=t_C,
+                               transitions_D=t_D, emission_probabilities=p,
+                               initial_state=0)
+        swapped = HMMParams(num_states=2,
+                            transitions_C=[[.4, .6], [.9, .1]],
+                            transitions_D=[[0, 1], [.7, .3]],
+                            emission_probabilities=[.7, .2],
+                            initial_state=1)
+        self.assertEqual(repr(hmm_params.canonical_form()),
+                         repr(swapped.canonical_form()))
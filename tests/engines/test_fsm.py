@@ -0,0 +1,188 @@
+import unittest
+
+import axelrod as axl
+
+import axelrod_dojo.utils as utils
+from axelrod_dojo import FSMArrays, FSMParams
+from axelrod_dojo.engines.fsm import (FSMBatch, TraceStore,
+                                      encode_transitions, is_traceable,
+                                      opponent_tables, score_fsm_opponents,
+                                      score_fsm_population)
+
+C, D = axl.Action.C, axl.Action.D
+
+
+class TestEncodeTransitions(unittest.TestCase):
+    def test_relabels_states(self):
+        transitions = ((1, C, 2, D), (1, D, 1, C), (2, C, 1, C), (2, D, 2, D))
+        next_states, actions, initial_state = encode_transitions(
+            transitions, initial_state=2)
+        self.assertEqual(next_states.tolist(), [[1, 0], [0, 1]])
+        self.assertEqual(actions.tolist(), [[1, 0], [0, 1]])
+        self.assertEqual(initial_state, 1)
+
+
+class TestOpponentTables(unittest.TestCase):
+    def test_fsm_player(self):
+        tables = opponent_tables(axl.Fortress3())
+        self.assertIsNotNone(tables)
+        self.assertEqual(tables[0].shape, (3, 2))
+
+    def test_known_opponent(self):
+        self.assertIsNotNone(opponent_tables(axl.TitForTat()))
+
+    def test_unknown_opponent(self):
+        self.assertIsNone(opponent_tables(axl.Alternator()))
+
+
+class TestFSMBatch(unittest.TestCase):
+    def test_play_matches_axelrod(self):
+        axl.seed(0)
+        population = [FSMParams(num_states=4) for _ in range(5)]
+        batch = FSMBatch(population)
+        for opponent in [axl.Fortress3(), axl.Grudger(), axl.Defector()]:
+            my_total, their_total = batch.play(opponent_tables(opponent),
+                                               turns=20)
+            for g, params in enumerate(population):
+                match = axl.Match((params.player(), opponent), turns=20)
+                match.play()
+                my_score, their_score = match.final_score()
+                self.assertEqual(my_total[g, 0], my_score)
+                self.assertEqual(their_total[g, 0], their_score)
+
+    def test_play_with_noise(self):
+        axl.seed(0)
+        population = [FSMParams(num_states=2) for _ in range(3)]
+        batch = FSMBatch(population)
+        my_total, _ = batch.play(opponent_tables(axl.Cooperator()), turns=10,
+                                 noise=.5, repetitions=4)
+        self.assertEqual(my_total.shape, (3, 4))
+
+
+class TestScoreFSMPopulation(unittest.TestCase):
+    opponents_information = [
+        utils.PlayerInfo(s, {}) for s in axl.demo_strategies] + [
+        utils.PlayerInfo(axl.Fortress4, {}),
+        utils.PlayerInfo(axl.Alternator, {})]
+
+    def test_same_scores_for_deterministic_opponents(self):
+        opponents_information = [
+            info for info in self.opponents_information
+            if not info.strategy.classifier['stochastic']]
+        weights = list(range(1, len(opponents_information) + 1))
+        axl.seed(0)
+        population = [FSMParams(num_states=8) for _ in range(10)]
+        for name in ["score", "score_diff"]:
+            objective = utils.prepare_objective(name=name, turns=50)
+            expected = [utils.score_params(params, objective,
+                                           opponents_information,
+                                           weights=weights)
+                        for params in population]
+            scores = score_fsm_population(population, objective,
+                                          opponents_information,
+                                          weights=weights)
+            self.assertEqual(scores, expected)
+
+    def test_arrays(self):
+        axl.seed(0)
+        arrays = FSMArrays.random(10, 4)
+        population = arrays.to_params()
+        for name in ["score", "score_diff", "moran"]:
+            objective = utils.prepare_objective(name=name, turns=20,
+                                                repetitions=1)
+            scores = []
+            for genomes in [arrays, population]:
+                axl.seed(1)
+                scores.append(score_fsm_population(
+                    genomes, objective, self.opponents_information))
+            self.assertEqual(scores[0], scores[1])
+
+    def test_stochastic_opponent_falls_back(self):
+        objective = utils.prepare_objective(name="score", turns=10,
+                                            repetitions=2)
+        opponents_information = [utils.PlayerInfo(axl.Random, {"p": 1})]
+        population = [FSMParams(num_states=2) for _ in range(3)]
+        scores = score_fsm_population(population, objective,
+                                      opponents_information)
+        expected = [utils.score_params(params, objective,
+                                       opponents_information)
+                    for params in population]
+        self.assertEqual(scores, expected)
+
+    def test_sample_count(self):
+        objective = utils.prepare_objective(name="score", turns=10)
+        population = [FSMParams(num_states=2) for _ in range(4)]
+        scores = score_fsm_population(population, objective,
+                                      self.opponents_information,
+                                      sample_count=2)
+        self.assertEqual(len(scores), 4)
+
+    def test_moran_falls_back(self):
+        objective = utils.prepare_objective(name="moran", turns=5,
+                                            repetitions=1)
+        population = [FSMParams(num_states=2) for _ in range(2)]
+        scores = score_fsm_population(population, objective,
+                                      self.opponents_information[:2])
+        self.assertEqual(len(scores), 2)
+
+
+class TestTraces(unittest.TestCase):
+    opponents_information = [utils.PlayerInfo(axl.Defector, {}),
+                             utils.PlayerInfo(axl.Fortress3, {}),
+                             utils.PlayerInfo(axl.Random, {"p": .5})]
+
+    def test_is_traceable(self):
+        self.assertTrue(is_traceable(utils.prepare_objective("score")))
+        self.assertTrue(is_traceable(utils.prepare_objective("score_diff")))
+        self.assertFalse(is_traceable(utils.prepare_objective("score",
+                                                              noise=.1)))
+        self.assertFalse(is_traceable(utils.prepare_objective("moran")))
+
+    def test_score_fsm_opponents(self):
+        objective = utils.prepare_objective(name="score_diff", turns=20)
+        axl.seed(0)
+        params = FSMParams(num_states=4)
+        results = score_fsm_opponents(params, objective,
+                                      self.opponents_information, [0, 1, 2])
+        for info, (score, visited) in zip(self.opponents_information[:2],
+                                          results):
+            self.assertEqual(score, utils.score_params(params, objective,
+                                                       [info]))
+        self.assertIsNone(results[2][1])
+        self.assertTrue(results[0][1].issubset(
+            {(row[0], row[1]) for row in params.rows}))
+
+    def test_mind_readers_are_not_traced(self):
+        objective = utils.prepare_objective(name="score", turns=20)
+        opponents_information = [utils.PlayerInfo(axl.MindReader, {}),
+                                 utils.PlayerInfo(axl.MirrorMindReader, {})]
+        axl.seed(0)
+        params = FSMParams(num_states=4)
+        results = score_fsm_opponents(params, objective,
+                                      opponents_information, [0, 1])
+        for info, (score, visited) in zip(opponents_information, results):
+            self.assertIsNone(visited)
+            self.assertEqual(score, utils.score_params(params, objective,
+                                                       [info]))
+
+    def test_inherited(self):
+        objective = utils.prepare_objective(name="score", turns=20)
+        # Against the Defector only the D row of state 0 is visited
+        rows = [[0, C, 1, C], [0, D, 0, D], [1, C, 1, C], [1, D, 0, C]]
+        params = FSMParams(num_states=2, rows=rows)
+        store = TraceStore()
+        store.add(params, score_fsm_opponents(
+            params, objective, self.opponents_information, [0, 1, 2]))
+        self.assertEqual(set(store.inherited(params)), {0, 1})
+
+        mutant = params.copy()
+        mutant.rows[3][3] = D
+        self.assertIn(0, store.inherited(mutant))
+
+        mutant = params.copy()
+        mutant.rows[1][3] = C
+        self.assertNotIn(0, store.inherited(mutant))
+
+        mutant = params.copy()
+        mutant.initial_action = D
+        self.assertEqual(store.inherited(mutant), {})
@@ -0,0 +1,222 @@
+import unittest
+from statistics import mean
+
+import axelrod as axl
+import numpy as np
+
+from axelrod.strategies.lookerup import Plays, create_lookup_table_keys
+
+from axelrod_dojo import FSMParams, HMMParams
+from axelrod_dojo.engines.markov import (ChainModel, expected_final_scores,
+                                         expected_final_scores_per_turn,
+                                         expected_payoff_gradient, fsm_model,
+                                         gambler_model, hmm_model, lookup_model,
+                                         lookup_states, memory_one_model,
+                                         payoff_matrices, player_model)
+
+C, D = axl.Action.C, axl.Action.D
+
+
+def simulated_scores_per_turn(me, other, turns, noise, repetitions):
+    match = axl.Match((me, other), turns=turns, noise=noise)
+    scores = []
+    for _ in range(repetitions):
+        match.play()
+        scores.append(match.final_score_per_turn())
+    return (mean(s[0] for s in scores), mean(s[1] for s in scores))
+
+
+class TestModels(unittest.TestCase):
+    def test_fsm_model(self):
+        model = fsm_model(((0, C, 0, C), (0, D, 0, D)), 0, C)
+        self.assertIsInstance(model, ChainModel)
+        self.assertEqual(model.num_states, 2)
+        self.assertEqual(model.initial.tolist(), [1, 0])
+        self.assertEqual(model.cooperation.tolist(), [1, 0])
+        for own in (0, 1):
+            self.assertEqual(model.transitions[own, 0].tolist(),
+                             [[1, 0], [1, 0]])
+            self.assertEqual(model.transitions[own, 1].tolist(),
+                             [[0, 1], [0, 1]])
+
+    def test_memory_one_model(self):
+        model = memory_one_model({(C, C): 1, (C, D): 0, (D, C): 0, (D, D): 1},
+                                 D)
+        self.assertEqual(model.num_states, 5)
+        self.assertEqual(model.cooperation.tolist(), [0, 1, 0, 0, 1])
+        self.assertTrue(np.allclose(model.transitions.sum(axis=3), 1))
+
+    def test_hmm_model(self):
+        t_C = [[.5, .5], [0, 1]]
+        t_D = [[1, 0], [.2, .8]]
+        model = hmm_model(t_C, t_D, [.3, .9], 1, D)
+        self.assertEqual(model.num_states, 3)
+        self.assertEqual(model.initial.tolist(), [1, 0, 0])
+        self.assertEqual(model.cooperation.tolist(), [0, .3, .9])
+        for own in (0, 1):
+            self.assertEqual(model.transitions[own, 0].tolist(),
+                             [[0, 0, 1], [0, .5, .5], [0, 0, 1]])
+            self.assertEqual(model.transitions[own, 1].tolist(),
+                             [[0, .2, .8], [0, 1, 0], [0, .2, .8]])
+
+    def test_lookup_states(self):
+        states, matrices = lookup_states(1, 1, 0)
+        # The opening state followed by the four outcomes of the last turn
+        self.assertEqual(len(states), 5)
+        self.assertEqual(states[0], (0, (), (), ()))
+        self.assertTrue(np.allclose(matrices.sum(axis=3), 1))
+        self.assertIs(lookup_states(1, 1, 0), lookup_states(1, 1, 0))
+
+    def test_lookup_model(self):
+        # Tit For Tat as a lookup table
+        lookup_dict = {Plays((), (C,), ()): C, Plays((), (D,), ()): D}
+        model = lookup_model(lookup_dict, [D])
+        self.assertEqual(model.num_states, 3)
+        self.assertEqual(model.initial.tolist(), [1, 0, 0])
+        self.assertEqual(model.cooperation.tolist(), [0, 1, 0])
+
+        keys = create_lookup_table_keys(1, 1, 1)
+        lookup_dict = dict(zip(keys, np.linspace(0, 1, len(keys))))
+        model = lookup_model(lookup_dict, [C])
+        self.assertEqual(model.cooperation[0], 1)
+        self.assertEqual(set(model.cooperation[1:]),
+                         set(lookup_dict.values()))
+
+    def test_gambler_model(self):
+        pattern = np.linspace(0, 1, 64)
+        model, indices = gambler_model(pattern, 2, 2, 2)
+        player = axl.Gambler(pattern=list(pattern), parameters=Plays(2, 2, 2))
+        self.assertTrue(np.allclose(model.cooperation,
+                                    player_model(player).cooperation))
+        self.assertEqual(indices[0], -1)
+        self.assertEqual(set(indices[indices >= 0]), set(range(64)))
+
+    def test_player_model(self):
+        for player in [axl.EvolvedHMM5(), axl.Fortress3(), axl.Cooperator(),
+                       axl.TitForTat(), axl.EvolvedLookerUp2_2_2(),
+                       axl.Winner12(), axl.PSOGambler2_2_2(),
+                       axl.Grudger(), axl.Random(), axl.Alternator(),
+                       axl.WinStayLoseShift(), axl.GTFT()]:
+            self.assertIsNotNone(player_model(player))
+        for player in [axl.Tester(), axl.HardTitForTat()]:
+            self.assertIsNone(player_model(player))
+
+
+class TestExpectedScores(unittest.TestCase):
+    def test_deterministic_matches_are_exact(self):
+        axl.seed(0)
+        opponents = [axl.Fortress3(), axl.Cooperator(), axl.Defector(),
+                     axl.TitForTat(), axl.Grudger(), axl.Alternator(),
+                     axl.WinStayLoseShift()]
+        for _ in range(5):
+            player = FSMParams(num_states=4).player()
+            for opponent in opponents:
+                match = axl.Match((player, opponent), turns=25)
+                match.play()
+                self.assertEqual(
+                    expected_final_scores_per_turn(player, opponent, 25),
+                    match.final_score_per_turn())
+
+    def test_noisy_matches(self):
+        axl.seed(0)
+        turns, noise = 10, .1
+        for player, opponent in [(axl.Fortress4(), axl.TitForTat()),
+                                 (axl.Grudger(), axl.GTFT()),
+                                 (axl.Alternator(), axl.Random(.3))]:
+            expected = expected_final_scores_per_turn(player, opponent,
+                                                      turns, noise)
+            simulated = simulated_scores_per_turn(player, opponent, turns,
+                                                  noise, 3000)
+            self.assertTrue(np.allclose(expected, simulated, atol=.05))
+
+    def test_unknown_player(self):
+        self.assertIsNone(expected_final_scores_per_turn(
+            axl.Tester(), axl.Cooperator(), 10))
+
+    def test_expected_final_scores(self):
+        cooperator = fsm_model(((0, C, 0, C), (0, D, 0, C)), 0, C)
+        defector = fsm_model(((0, C, 0, D), (0, D, 0, D)), 0, D)
+        self.assertEqual(expected_final_scores(cooperator, defector, 4),
+                         (0, 20))
+        my_total, their_total = expected_final_scores(cooperator, defector,
+                                                      4, noise=.5)
+        self.assertAlmostEqual(my_total, 4 * 9 / 4)
+        self.assertAlmostEqual(their_total, 4 * 9 / 4)
+
+    def test_expected_payoff_gradient(self):
+        axl.seed(0)
+        model, _ = gambler_model(np.random.random(8), 1, 1, 1)
+        other = player_model(axl.EvolvedHMM5())
+        my_payoffs, their_payoffs = payoff_matrices()
+        for noise, payoffs in [(0, None), (.1, my_payoffs - their_payoffs)]:
+            total, gradient = expected_payoff_gradient(model, other, 12,
+                                                       noise, payoffs)
+            my_total, their_total = expected_final_scores(model, other, 12,
+                                                          noise)
+            if payoffs is None:
+                self.assertAlmostEqual(total, my_total)
+            else:
+                self.assertAlmostEqual(total, my_total - their_total)
+
+            epsilon = 1e-6
+            for state in range(model.num_states):
+                cooperation = model.cooperation.copy()
+                cooperation[state] += epsilon
+                shifted = ChainModel(model.initial, cooperation,
+                                     model.transitions)
+                shifted_total, _ = expected_payoff_gradient(
+                    shifted, other, 12, noise, payoffs)
+                self.assertAlmostEqual((shifted_total - total) / epsilon,
+                                       gradient[state], places=4)
+
+    def test_deterministic_hmm_is_exact(self):
+        # Tit For Tat as a hidden Markov model
+        params = HMMParams(num_states=2, transitions_C=[[1, 0], [1, 0]],
+                           transitions_D=[[0, 1], [0, 1]],
+                           emission_probabilities=[1, 0])
+        player = params.player()
+        for opponent in [axl.Alternator(), axl.Fortress4(), axl.Defector()]:
+            match = axl.Match((player, opponent), turns=15)
+            match.play()
+            self.assertEqual(
+                expected_final_scores_per_turn(player, opponent, 15),
+                match.final_score_per_turn())
+
+    def test_hmm_matches(self):
+        axl.seed(0)
+        turns = 8
+        for noise in [0, .05]:
+            for opponent in [axl.TitForTat(), axl.Fortress3(),
+                             axl.EvolvedHMM5()]:
+                player = HMMParams(num_states=3).player()
+                expected = expected_final_scores_per_turn(player, opponent,
+                                                          turns, noise)
+                simulated = simulated_scores_per_turn(player, opponent,
+                                                      turns, noise, 3000)
+                self.assertTrue(np.allclose(expected, simulated, atol=.06))
+
+    def test_deterministic_lookup_is_exact(self):
+        opponents = [axl.Fortress3(), axl.TitForTat(), axl.Grudger(),
+                     axl.Alternator(), axl.EvolvedLookerUp2_2_2()]
+        for player in [axl.EvolvedLookerUp2_2_2(), axl.Winner12(),
+                       axl.EvolvedLookerUp1_1_1()]:
+            for opponent in opponents:
+                match = axl.Match((player, opponent), turns=20)
+                match.play()
+                self.assertEqual(
+                    expected_final_scores_per_turn(player, opponent, 20),
+                    match.final_score_per_turn())
+
+    def test_gambler_matches(self):
+        axl.seed(0)
+        turns = 8
+        for noise in [0, .05]:
+            for player, opponent in [
+                    (axl.PSOGambler2_2_2(), axl.TitForTat()),
+                    (axl.PSOGambler1_1_1(), axl.Fortress3()),
+                    (axl.PSOGamblerMem1(), axl.PSOGambler2_2_2())]:
+                expected = expected_final_scores_per_turn(player, opponent,
+                                                          turns, noise)
+                simulated = simulated_scores_per_turn(player, opponent,
+                                                      turns, noise, 3000)
+                self.assertTrue(np.allclose(expected, simulated, atol=.06))
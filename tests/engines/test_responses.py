@@ -0,0 +1,167 @@
+import os
+import tempfile
+import unittest
+
+import axelrod as axl
+
+import axelrod_dojo.utils as utils
+from axelrod_dojo import FSMParams
+from axelrod_dojo.engines import responses
+from axelrod_dojo.engines.responses import (ResponseTrie, TrieOpponent,
+                                            clear_response_tries,
+                                            load_response_tries,
+                                            merge_response_tries,
+                                            response_trie,
+                                            save_response_tries,
+                                            uses_response_trie)
+
+C, D = axl.Action.C, axl.Action.D
+
+
+class CountingGradual(axl.Gradual):
+    calls = 0
+
+    def strategy(self, opponent):
+        CountingGradual.calls += 1
+        return super().strategy(opponent)
+
+
+class TestUsesResponseTrie(unittest.TestCase):
+    def test_uses_response_trie(self):
+        self.assertTrue(uses_response_trie(axl.Gradual()))
+        self.assertTrue(uses_response_trie(axl.TitForTat()))
+        self.assertFalse(uses_response_trie(axl.Random()))
+        self.assertFalse(uses_response_trie(axl.Geller()))
+
+
+class TestResponseTrie(unittest.TestCase):
+    def test_child(self):
+        trie = ResponseTrie(max_nodes=2)
+        child = trie.child(trie.root, (C, D))
+        self.assertEqual(child, [None, {}])
+        self.assertIs(trie.child(trie.root, (C, D)), child)
+        self.assertIsNone(trie.child(trie.root, (D, D)))
+        self.assertEqual(trie.num_nodes, 2)
+
+    def test_nodes_of_the_process_are_bounded(self):
+        clear_response_tries()
+        max_nodes = responses.MAX_NODES
+        responses.MAX_NODES = 30
+        try:
+            for strategy in [axl.Gradual, axl.OmegaTFT]:
+                for player in [axl.Alternator(), axl.Cooperator()]:
+                    match = axl.Match((player, TrieOpponent(strategy())),
+                                      turns=10)
+                    expected = axl.Match((player, strategy()),
+                                         turns=10).play()
+                    self.assertEqual(match.play(), expected)
+            self.assertEqual(responses.NUM_NODES, 30)
+            self.assertEqual(sum(trie.num_nodes for trie in
+                                 responses.RESPONSE_TRIES.values()), 30)
+        finally:
+            responses.MAX_NODES = max_nodes
+            clear_response_tries()
+
+
+class TestTrieOpponent(unittest.TestCase):
+    def setUp(self):
+        clear_response_tries()
+
+    def test_same_matches(self):
+        axl.seed(0)
+        genomes = [FSMParams(num_states=4) for _ in range(4)]
+        for strategy in [axl.Gradual, axl.Shubik,
+                         axl.EvolvedLookerUp2_2_2, axl.OmegaTFT]:
+            for noise in [0, .1]:
+                for params in genomes:
+                    axl.seed(1)
+                    match = axl.Match((params.player(), strategy()),
+                                      turns=30, noise=noise)
+                    expected = match.play()
+                    axl.seed(1)
+                    match = axl.Match(
+                        (params.player(), TrieOpponent(strategy())),
+                        turns=30, noise=noise)
+                    self.assertEqual(match.play(), expected)
+
+    def test_moves_are_reused(self):
+        params = FSMParams(num_states=4)
+        match = axl.Match((params.player(), TrieOpponent(CountingGradual())),
+                          turns=20)
+        expected = match.play()
+        self.assertEqual(CountingGradual.calls, 20)
+        trie = response_trie(match.players[1].opponent)
+        num_nodes = trie.num_nodes
+
+        match = axl.Match((params.player(), TrieOpponent(CountingGradual())),
+                          turns=20)
+        self.assertEqual(match.play(), expected)
+        self.assertEqual(CountingGradual.calls, 20)
+        self.assertEqual(trie.num_nodes, num_nodes)
+
+    def test_tries_depend_on_match_attributes(self):
+        for turns in [5, 6]:
+            match = axl.Match((axl.Cooperator(), TrieOpponent(axl.Gradual())),
+                              turns=turns)
+            match.play()
+        self.assertEqual(len(responses.RESPONSE_TRIES), 2)
+
+    def test_save_and_load(self):
+        match = axl.Match((axl.Alternator(), TrieOpponent(axl.Gradual())),
+                          turns=10)
+        match.play()
+        directory = tempfile.TemporaryDirectory()
+        filename = os.path.join(directory.name, "tries.pickle")
+        save_response_tries(filename)
+        saved = responses.RESPONSE_TRIES.copy()
+
+        clear_response_tries()
+        load_response_tries(filename)
+        self.assertEqual(set(responses.RESPONSE_TRIES), set(saved))
+        trie = list(responses.RESPONSE_TRIES.values())[0]
+        self.assertEqual(trie.num_nodes, 10)
+        self.assertEqual(responses.NUM_NODES, 10)
+        directory.cleanup()
+
+    def test_merge(self):
+        directory = tempfile.TemporaryDirectory()
+        filename = os.path.join(directory.name, "tries.pickle")
+        # Tries saved by two workers
+        for turns in [10, 20]:
+            clear_response_tries()
+            axl.Match((axl.Alternator(), TrieOpponent(axl.Gradual())),
+                      turns=turns).play()
+            save_response_tries(filename + ".worker-{}".format(turns))
+        clear_response_tries()
+        axl.Match((axl.Alternator(), TrieOpponent(axl.TitForTat())),
+                  turns=10).play()
+        merge_response_tries(filename)
+        self.assertEqual(os.listdir(directory.name), ["tries.pickle"])
+
+        clear_response_tries()
+        load_response_tries(filename)
+        self.assertEqual(sorted(trie.num_nodes for trie in
+                                responses.RESPONSE_TRIES.values()),
+                         [10, 10, 20])
+        directory.cleanup()
+
+
+class TestScoreParams(unittest.TestCase):
+    def test_same_scores(self):
+        opponents_information = [utils.PlayerInfo(s, {}) for s in
+                                 [axl.Gradual, axl.Fortress3, axl.Random,
+                                  axl.Grofman, axl.OmegaTFT]]
+        axl.seed(0)
+        genomes = [FSMParams(num_states=4) for _ in range(4)]
+        for noise in [0, .1]:
+            objective = utils.prepare_objective("score_diff", turns=20,
+                                                noise=noise, repetitions=2)
+            for params in genomes:
+                axl.seed(1)
+                expected = utils.score_params(params, objective,
+                                              opponents_information)
+                axl.seed(1)
+                score = utils.score_params(params, objective,
+                                           opponents_information,
+                                           response_tries=True)
+                self.assertEqual(score, expected)
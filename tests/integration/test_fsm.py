@@ -1,9 +1,15 @@
 import unittest
 import tempfile
 import csv
+import itertools
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from statistics import mean, pstdev
 
 import axelrod as axl
 import axelrod_dojo as dojo
+from axelrod_dojo.engines.responses import clear_response_tries
 
 C, D = axl.Action.C, axl.Action.D
 
@@ -300,3 +306,753 @@ class TestFSMPopulation(unittest.TestCase):
         axl.seed(0)
         population.run(generations)
         self.assertEqual(population.generation, 1)
+
+    def test_score_with_batch_evaluator(self):
+        output_file = tempfile.NamedTemporaryFile()
+        name = "score"
+        turns = 10
+        noise = 0
+        repetitions = 5
+        num_states = 4
+        opponents = [axl.Cooperator(), axl.Defector(), axl.TitForTat(),
+                     axl.Grudger(), axl.Fortress3()]
+        size = 10
+
+        objective = dojo.prepare_objective(name=name,
+                                           turns=turns,
+                                           noise=noise,
+                                           repetitions=repetitions)
+
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": num_states},
+                                     size=size,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=opponents,
+                                     bottleneck=2,
+                                     mutation_probability = .01,
+                                     processes=1,
+                                     evaluator=dojo.score_fsm_population)
+
+        expected = [dojo.utils.score_params(params, objective,
+                                            population.opponents_information)
+                    for params in population.population]
+        self.assertEqual(population.score_all(), expected)
+
+        generations = 4
+        axl.seed(0)
+        population.run(generations)
+        self.assertEqual(population.generation, 4)
+
+    def test_score_all_scores_equivalent_individuals_once(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10,
+                                           repetitions=1)
+        rows = [[0, C, 1, C], [0, D, 1, D], [1, C, 0, C], [1, D, 0, D]]
+        tit_for_tat = dojo.FSMParams(num_states=2, rows=rows)
+        relabelled = dojo.FSMParams(num_states=2, rows=rows, initial_state=1)
+        scored = []
+
+        def evaluator(population, *args):
+            scored.extend(population)
+            return dojo.score_fsm_population(population, *args)
+
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 2},
+                                     size=3,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=[axl.Defector()],
+                                     population=[tit_for_tat, relabelled,
+                                                 tit_for_tat.copy()],
+                                     evaluator=evaluator,
+                                     deduplicate=True)
+        scores = population.score_all()
+        self.assertEqual(len(scored), 1)
+        self.assertEqual(scores, [0.9, 0.9, 0.9])
+
+        # Without deduplication only identical individuals are scored once
+        population.deduplicate = False
+        scores = population.score_all()
+        self.assertEqual(len(scored), 3)
+        self.assertEqual(scores, [0.9, 0.9, 0.9])
+
+    def test_score_with_traces(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=20)
+        opponents = [axl.Defector(), axl.TitForTat(), axl.Fortress3(),
+                     axl.Alternator(), axl.Grudger()]
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 4},
+                                     size=10,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=opponents,
+                                     bottleneck=2,
+                                     mutation_probability=.1,
+                                     reuse_traces=True)
+        axl.seed(0)
+        for _ in range(4):
+            population.evolve()
+            expected = [dojo.utils.score_params(
+                params, objective, population.opponents_information)
+                for params in population.population]
+            self.assertEqual(population.score_all(), expected)
+
+        with self.assertRaises(ValueError):
+            dojo.Population(params_class=dojo.HMMParams,
+                            params_kwargs={"num_states": 4}, size=10,
+                            objective=objective,
+                            output_filename=output_file.name,
+                            opponents=opponents, reuse_traces=True)
+
+    def test_score_with_cache(self):
+        output_file = tempfile.NamedTemporaryFile()
+        cache_directory = tempfile.TemporaryDirectory()
+        cache = dojo.FitnessCache(os.path.join(cache_directory.name,
+                                               "fitness.db"))
+        objective = dojo.prepare_objective(name="score", turns=10)
+        opponents = [axl.Defector(), axl.TitForTat(), axl.Fortress3()]
+        scored = []
+
+        def evaluator(population, *args):
+            scored.extend(population)
+            return dojo.score_fsm_population(population, *args)
+
+        axl.seed(0)
+        individuals = [dojo.FSMParams(num_states=4) for _ in range(5)]
+        expected = [dojo.utils.score_params(params, objective,
+                                            [dojo.PlayerInfo(type(p), {})
+                                             for p in opponents])
+                    for params in individuals]
+        for _ in range(2):
+            population = dojo.Population(params_class=dojo.FSMParams,
+                                         params_kwargs={"num_states": 4},
+                                         size=5,
+                                         objective=objective,
+                                         output_filename=output_file.name,
+                                         opponents=opponents,
+                                         population=list(individuals),
+                                         evaluator=evaluator,
+                                         cache=cache)
+            self.assertEqual(population.score_all(), expected)
+        # The second population is entirely scored from the cache
+        self.assertEqual(len(scored), 5)
+        cache_directory.cleanup()
+
+    def test_reevaluate(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10, noise=.1)
+        calls = []
+
+        def evaluator(population, *args):
+            calls.append(len(population))
+            return [len(calls)] * len(population)
+
+        axl.seed(0)
+        individuals = [dojo.FSMParams(num_states=4) for _ in range(4)]
+        expected = {"always": [2] * 4, "never": [1] * 4,
+                    "average": [1.5] * 4}
+        for reevaluate, scores in expected.items():
+            calls.clear()
+            population = dojo.Population(params_class=dojo.FSMParams,
+                                         params_kwargs={"num_states": 4},
+                                         size=4,
+                                         objective=objective,
+                                         output_filename=output_file.name,
+                                         opponents=[axl.TitForTat()],
+                                         population=list(individuals),
+                                         evaluator=evaluator,
+                                         reevaluate=reevaluate)
+            self.assertEqual(population.score_all(), [1] * 4)
+            self.assertEqual(population.score_all(), scores)
+
+        with self.assertRaises(ValueError):
+            dojo.Population(params_class=dojo.FSMParams,
+                            params_kwargs={"num_states": 4}, size=4,
+                            objective=objective,
+                            output_filename=output_file.name,
+                            reevaluate="sometimes")
+
+    def test_survivors_keep_their_scores(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10)
+        scored = []
+
+        def evaluator(population, *args):
+            scored.append(population)
+            return dojo.score_fsm_population(population, *args)
+
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 4},
+                                     size=10,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=[axl.TitForTat(),
+                                                axl.Fortress3()],
+                                     bottleneck=2,
+                                     evaluator=evaluator,
+                                     reevaluate="never")
+        axl.seed(0)
+        population.evolve()
+        survivors = population.population[:2]
+        scores = population.score_all()
+        self.assertFalse(any(params is survivor for params in scored[-1]
+                             for survivor in survivors))
+        self.assertEqual(scores, [dojo.utils.score_params(
+            params, objective, population.opponents_information)
+            for params in population.population])
+
+    def test_score_with_response_tries(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=20)
+        opponents = [axl.Gradual(), axl.OmegaTFT(), axl.Fortress3()]
+        axl.seed(0)
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 4},
+                                     size=6,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=opponents,
+                                     response_tries=True)
+        expected = [dojo.utils.score_params(params, objective,
+                                            population.opponents_information)
+                    for params in population.population]
+        self.assertEqual(population.score_all(), expected)
+
+    def test_response_tries_of_workers_are_saved(self):
+        output_file = tempfile.NamedTemporaryFile()
+        directory = tempfile.TemporaryDirectory()
+        filename = os.path.join(directory.name, "tries.pickle")
+        objective = dojo.prepare_objective(name="score", turns=20)
+        opponents = [axl.Gradual(), axl.OmegaTFT()]
+        # Workers start with the tries of this process
+        clear_response_tries()
+        with dojo.Population(params_class=dojo.FSMParams,
+                             params_kwargs={"num_states": 4},
+                             size=6,
+                             objective=objective,
+                             output_filename=output_file.name,
+                             opponents=opponents,
+                             processes=2,
+                             response_tries=filename) as population:
+            population.run(1)
+        # The tries built by the workers are merged into the file
+        self.assertEqual(os.listdir(directory.name), ["tries.pickle"])
+        with open(filename, "rb") as f:
+            tries = pickle.load(f)
+        self.assertEqual(len(tries), 2)
+        self.assertTrue(all(trie.num_nodes > 1 for trie in tries.values()))
+        directory.cleanup()
+
+    def test_racing(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10, noise=.05,
+                                           repetitions=40)
+        defector = dojo.FSMParams(num_states=1,
+                                  rows=[[0, C, 0, D], [0, D, 0, D]],
+                                  initial_action=D)
+        cooperator = dojo.FSMParams(num_states=1,
+                                    rows=[[0, C, 0, C], [0, D, 0, C]])
+        tit_for_tat = dojo.FSMParams(num_states=1,
+                                     rows=[[0, C, 0, C], [0, D, 0, D]])
+        repetitions = []
+
+        class CountingPool(object):
+            def starmap(self, function, iterable):
+                iterable = list(iterable)
+                repetitions.append([args[-1] for args in iterable])
+                return list(itertools.starmap(function, iterable))
+
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 1},
+                                     size=3,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=[axl.Cooperator(),
+                                                axl.Random()],
+                                     population=[defector, cooperator,
+                                                 tit_for_tat],
+                                     bottleneck=1,
+                                     racing=True)
+        population.pool = CountingPool()
+        axl.seed(0)
+        scores = population.score_all()
+        self.assertEqual(scores.index(max(scores)), 0)
+        # Some individuals stopped before all 40 repetitions
+        self.assertLess(sum(map(sum, repetitions)), 3 * 40)
+        self.assertLessEqual(sum(batch[0] for batch in repetitions), 40)
+
+        with self.assertRaises(ValueError):
+            dojo.Population(params_class=dojo.FSMParams,
+                            params_kwargs={"num_states": 1}, size=3,
+                            objective=objective,
+                            output_filename=output_file.name,
+                            racing=True, racing_batch=1)
+        with self.assertRaises(ValueError):
+            dojo.Population(params_class=dojo.FSMParams,
+                            params_kwargs={"num_states": 1}, size=3,
+                            objective=lambda *args: [0],
+                            output_filename=output_file.name,
+                            racing=True)
+
+    def test_racing_plays_deterministic_matches_once(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10,
+                                           repetitions=40)
+        opponents = []
+
+        class CountingPool(object):
+            def starmap(self, function, iterable):
+                iterable = list(iterable)
+                opponents.append([len(args[2]) for args in iterable])
+                return list(itertools.starmap(function, iterable))
+
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 1},
+                                     size=3,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=[axl.Cooperator(),
+                                                axl.Random()],
+                                     population=[
+                                         dojo.FSMParams(num_states=1,
+                                                        rows=rows)
+                                         for rows in (
+                                             [[0, C, 0, D], [0, D, 0, D]],
+                                             [[0, C, 0, C], [0, D, 0, C]],
+                                             [[0, C, 0, C], [0, D, 0, D]])],
+                                     bottleneck=1,
+                                     racing=True, racing_batch=5)
+        population.pool = CountingPool()
+        axl.seed(0)
+        population.score_all()
+        self.assertEqual(opponents[0], [2, 2, 2])
+        # Only the match against Random is played again
+        self.assertTrue(all(count == 1 for batch in opponents[1:]
+                            for count in batch))
+
+    def test_successive_halving(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=20)
+        calls = []
+
+        def evaluator(population, objective, *args):
+            calls.append((len(population), objective.keywords["turns"]))
+            return dojo.score_fsm_population(population, objective, *args)
+
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 4},
+                                     size=16,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=[axl.TitForTat(),
+                                                axl.Fortress3(),
+                                                axl.Alternator()],
+                                     bottleneck=3,
+                                     evaluator=evaluator,
+                                     fidelities=[{"turns": 5},
+                                                 {"turns": 10}],
+                                     promotion=.25)
+        axl.seed(0)
+        individuals = list(population.population)
+        scores = population.score_all()
+        self.assertEqual(calls, [(16, 5), (4, 10), (3, 20)])
+        levels = [level for _, _, level in population.known_scores]
+        self.assertEqual(sorted(levels), [0] * 12 + [1] + [2] * 3)
+        for params, score, level in zip(individuals, scores, levels):
+            if level == 2:
+                self.assertEqual(score, dojo.utils.score_params(
+                    params, objective, population.opponents_information))
+
+        # The survivors are the individuals scored at full fidelity
+        survivors = [params for params, level in zip(individuals, levels)
+                     if level == 2]
+        population.evolve()
+        self.assertCountEqual(map(repr, population.population[:3]),
+                              map(repr, survivors))
+        # The output row summarises the scores at full fidelity
+        with open(output_file.name) as f:
+            row = list(csv.reader(f))[-1]
+        full_scores = [score for score, level in zip(scores, levels)
+                       if level == 2]
+        self.assertAlmostEqual(float(row[1]), mean(full_scores))
+        self.assertAlmostEqual(float(row[2]), pstdev(full_scores))
+
+    def test_checkpoint_and_resume(self):
+        directory = tempfile.TemporaryDirectory()
+        checkpoint = os.path.join(directory.name, "checkpoint")
+        objective = dojo.prepare_objective(name="score", turns=10, noise=.1,
+                                           repetitions=2)
+
+        def population(output_filename):
+            return dojo.Population(params_class=dojo.FSMParams,
+                                   params_kwargs={"num_states": 2},
+                                   size=8,
+                                   objective=objective,
+                                   output_filename=os.path.join(
+                                       directory.name, output_filename),
+                                   opponents=[axl.TitForTat(),
+                                              axl.Alternator()],
+                                   bottleneck=3,
+                                   common_random_numbers=True,
+                                   checkpoint=checkpoint,
+                                   checkpoint_interval=2)
+
+        axl.seed(0)
+        uninterrupted = population("uninterrupted.csv")
+        uninterrupted.run(4)
+        # The third generation is lost
+        axl.seed(0)
+        population("interrupted.csv").run(3)
+        axl.seed(1)
+        resumed = population("interrupted.csv")
+        resumed.resume(checkpoint)
+        self.assertEqual(resumed.generation, 2)
+        resumed.run(2)
+
+        self.assertEqual([repr(params) for params in resumed.population],
+                         [repr(params) for params in uninterrupted.population])
+        self.assertEqual(resumed.known_scores, uninterrupted.known_scores)
+        outputs = []
+        for output_filename in ["uninterrupted.csv", "interrupted.csv"]:
+            with open(os.path.join(directory.name, output_filename)) as f:
+                outputs.append(f.read())
+        self.assertEqual(len(outputs[0].splitlines()), 4)
+        self.assertEqual(outputs[0], outputs[1])
+
+        with self.assertRaises(ValueError):
+            dojo.Population(dojo.HMMParams, {"num_states": 2}, 4, objective,
+                            os.path.join(directory.name, "hmm.csv")
+                            ).resume(checkpoint)
+        with self.assertRaises(ValueError):
+            resumed.run_steady_state(8)
+        directory.cleanup()
+
+    def test_common_random_numbers(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10, noise=.1,
+                                           repetitions=4)
+        individuals = [dojo.FSMParams(num_states=2) for _ in range(4)]
+        scores = []
+        for processes in [1, 2]:
+            population = dojo.Population(params_class=dojo.FSMParams,
+                                         params_kwargs={"num_states": 2},
+                                         size=4,
+                                         objective=objective,
+                                         output_filename=output_file.name,
+                                         opponents=[axl.Random(),
+                                                    axl.TitForTat()],
+                                         population=list(individuals),
+                                         processes=processes,
+                                         common_random_numbers=True,
+                                         antithetic=True)
+            axl.seed(0)
+            scores.append(population.score_all())
+            seed = population.generation_seed
+            self.assertEqual(scores[-1], [dojo.utils.score_params(
+                params, objective, population.opponents_information,
+                seed=seed, antithetic=True) for params in individuals])
+        # Reproducible whichever processes score the individuals
+        self.assertEqual(scores[0], scores[1])
+
+        # Threads share the random state that the random streams replace
+        executor = ThreadPoolExecutor(2)
+        for backend in ["threads", executor]:
+            with self.assertRaises(ValueError):
+                dojo.Population(dojo.FSMParams, {"num_states": 2}, 4,
+                                objective, output_file.name, processes=2,
+                                common_random_numbers=True, backend=backend)
+        executor.shutdown()
+
+    def test_score_in_chunks(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10, noise=.1,
+                                           repetitions=2)
+        opponents = [axl.TitForTat(), axl.Random(), axl.Alternator(),
+                     axl.Grudger(), axl.Cooperator()]
+        weights = [1, 2, 3, 4, 5]
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 2},
+                                     size=3,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=opponents,
+                                     weights=weights,
+                                     processes=2,
+                                     common_random_numbers=True,
+                                     chunk_time=1e-6)
+        num_tasks = []
+
+        class RecordingPool(object):
+            def __init__(self, pool):
+                self.pool = pool
+                self.processes = pool.processes
+
+            def starmap(self, function, iterable, chunksize=None):
+                iterable = list(iterable)
+                num_tasks.append(len(iterable))
+                return self.pool.starmap(function, iterable, chunksize)
+
+        population.pool = RecordingPool(population.pool)
+        individuals = list(population.population)
+        for _ in range(2):
+            scores = population.score_all()
+            for params, score in zip(individuals, scores):
+                self.assertAlmostEqual(score, dojo.utils.score_params(
+                    params, objective, population.opponents_information,
+                    weights=weights, seed=population.generation_seed))
+        # The first call leaves two tasks per process, then tasks are sized
+        # from their measured time
+        self.assertEqual(num_tasks, [3 * 2, 3 * 5])
+        self.assertEqual(population.chunk_size, 1)
+
+        population.chunk_time = 60
+        population.score_all()
+        population.score_all()
+        self.assertGreater(population.chunk_size, 5)
+        self.assertEqual(num_tasks[-1], 3 * 2)
+
+    def test_workers_hold_objective_and_opponents(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10)
+        functions = []
+
+        class RecordingPool(object):
+            def __init__(self, pool):
+                self.pool = pool
+                self.processes = pool.processes
+
+            def starmap(self, function, iterable, chunksize=None):
+                functions.append(function)
+                return self.pool.starmap(function, iterable, chunksize)
+
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 2},
+                                     size=4,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=[axl.TitForTat(),
+                                                axl.Alternator()],
+                                     processes=2)
+        population.pool = RecordingPool(population.pool)
+        expected = [dojo.utils.score_params(params, objective,
+                                            population.opponents_information)
+                    for params in population.population]
+        self.assertEqual(population.score_all(), expected)
+
+        # Scoring with other opponents falls back to sending them
+        opponents_information = population.opponents_information
+        population.opponents_information = opponents_information[:1]
+        population.score_all()
+        self.assertEqual(functions, [dojo.utils.score_params_in_worker,
+                                     dojo.utils.score_params])
+
+    def test_batched(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10)
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 2},
+                                     size=12,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=[axl.TitForTat(),
+                                                axl.Alternator()],
+                                     bottleneck=4,
+                                     batched=True)
+        scores = population.score_all()
+        best = sorted(scores, reverse=True)[:4]
+        population.known_scores = []
+        population.evolve()
+        # Survivors, their mutants and crossovers, as in evolve
+        self.assertIsInstance(population.population, dojo.FSMArrays)
+        self.assertEqual(len(population.population), 10)
+        self.assertEqual([score for score, _, _ in population.known_scores],
+                         best)
+        for params in population.population:
+            self.assertIsInstance(params, dojo.FSMParams)
+            self.assertEqual(params.mutation_probability, .1)
+
+        with self.assertRaises(ValueError):
+            dojo.Population(dojo.GamblerParams, {}, 4, objective,
+                            output_file.name, batched=True)
+
+    def test_batched_evaluator(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10)
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 3},
+                                     size=12,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=[axl.Fortress3(),
+                                                axl.Fortress4()],
+                                     bottleneck=4,
+                                     evaluator=dojo.score_fsm_population,
+                                     batched=True)
+        population.run(2)
+        genomes = population.population
+        expected = dojo.score_fsm_population(
+            genomes.to_params(), objective, population.opponents_information)
+        # The arrays are scored as they are
+        genomes.to_params = None
+        self.assertEqual(population.score_all(), expected)
+
+        with self.assertRaises(ValueError):
+            population.run_steady_state(4)
+
+    def test_breed_in_workers(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10)
+        functions = []
+
+        class RecordingPool(object):
+            def __init__(self, pool):
+                self.pool = pool
+                self.processes = pool.processes
+
+            def starmap(self, function, iterable, chunksize=None):
+                functions.append(function)
+                return self.pool.starmap(function, iterable, chunksize)
+
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 2},
+                                     size=8,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=[axl.TitForTat(),
+                                                axl.Alternator()],
+                                     bottleneck=3,
+                                     processes=2,
+                                     breed_in_workers=True)
+        owned_pool = population.pool
+        population.pool = RecordingPool(owned_pool)
+        population.evolve()
+        # Survivors, their mutants and a crossover, as in evolve
+        self.assertEqual(len(population.population), 7)
+        self.assertEqual(population.parents, population.population[:3])
+        for params in population.population:
+            _, recipe = population.recipes[id(params)]
+            self.assertEqual(repr(dojo.utils.breed_offspring(
+                population.parents, recipe, dojo.FSMParams,
+                population.params_kwargs)), repr(params))
+
+        # Immigrants are sent to the workers
+        population.population[-1] = dojo.FSMParams(num_states=2)
+        expected = [dojo.utils.score_params(params, objective,
+                                            population.opponents_information)
+                    for params in population.population]
+        self.assertEqual(population.score_all(), expected)
+        self.assertEqual(functions, [dojo.utils.score_params_in_worker,
+                                     dojo.utils.score_offspring_in_worker,
+                                     dojo.utils.score_params_in_worker])
+        owned_pool.close()
+
+        with self.assertRaises(ValueError):
+            dojo.Population(dojo.FSMParams, {"num_states": 2}, 4, objective,
+                            output_file.name, breed_in_workers=True,
+                            chunk_time=1)
+
+    def test_backends(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10)
+        opponents = [axl.TitForTat(), axl.Alternator(), axl.Grudger()]
+        individuals = [dojo.FSMParams(num_states=2) for _ in range(4)]
+        executor = ThreadPoolExecutor(2)
+        for backend in ["serial", "multiprocessing", "process_pool",
+                        "threads", executor]:
+            with dojo.Population(params_class=dojo.FSMParams,
+                                 params_kwargs={"num_states": 2},
+                                 size=4,
+                                 objective=objective,
+                                 output_filename=output_file.name,
+                                 opponents=opponents,
+                                 population=list(individuals),
+                                 processes=2,
+                                 backend=backend) as population:
+                expected = [dojo.utils.score_params(
+                    params, objective, population.opponents_information)
+                    for params in individuals]
+                self.assertEqual(population.score_all(), expected)
+        # A supplied executor is left open
+        self.assertEqual(executor.submit(sum, [1, 2]).result(), 3)
+        executor.shutdown()
+
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 2},
+                                     size=4,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=opponents)
+        self.assertIsInstance(population.pool, dojo.SerialBackend)
+        population.close()
+
+        # A backend created by the population is closed at the end of a run
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 2},
+                                     size=4,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=opponents,
+                                     processes=2)
+        pool = population.pool
+        population.run(1)
+        with self.assertRaises(ValueError):
+            pool.starmap(sum, [([1, 2],)])
+        self.assertEqual(len(population.score_all()), 4)
+
+    def test_speculative_immigrants(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10, noise=.1,
+                                           repetitions=2)
+        population = dojo.Population(params_class=dojo.FSMParams,
+                                     params_kwargs={"num_states": 2},
+                                     size=8,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=[axl.TitForTat(),
+                                                axl.Alternator()],
+                                     bottleneck=3,
+                                     common_random_numbers=True,
+                                     immigrants=2)
+        population.evolve()
+        self.assertEqual(len(population.population), 8)
+        immigrants = population.population[-2:]
+        self.assertEqual(
+            [population.speculative[id(params)][0] for params in immigrants],
+            immigrants)
+
+        # The immigrants were scored ahead of time on the streams of their
+        # generation
+        scores = population.score_all()
+        self.assertEqual(population.speculative, {})
+        self.assertEqual(scores, [dojo.utils.score_params(
+            params, objective, population.opponents_information,
+            seed=population.generation_seed)
+            for params in population.population])
+
+    def test_steady_state(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10)
+        opponents = [axl.TitForTat(), axl.Alternator(), axl.Grudger()]
+        for processes in [1, 2]:
+            with dojo.Population(params_class=dojo.FSMParams,
+                                 params_kwargs={"num_states": 2},
+                                 size=6,
+                                 objective=objective,
+                                 output_filename=output_file.name,
+                                 opponents=opponents,
+                                 bottleneck=2,
+                                 processes=processes) as population:
+                population.run_steady_state(20)
+                self.assertEqual(len(population.population), 6)
+                self.assertEqual(population.generation, 3)
+                scores = [score for score, _, _ in population.known_scores]
+                self.assertEqual(scores, sorted(scores, reverse=True))
+                self.assertEqual(scores, [dojo.utils.score_params(
+                    params, objective, population.opponents_information)
+                    for params in population.population])
+
+        with open(output_file.name, "r") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual([row[0] for row in rows[-3:]], ["1", "2", "3"])
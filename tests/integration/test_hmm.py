@@ -396,3 +396,28 @@ class TestHMM(unittest.TestCase):
         xopt, fopt = population.population[record_holder], record
 
         print(xopt)
+
+    def test_score_exact(self):
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10, noise=.05,
+                                           exact=True)
+        opponents = [s() for s in axl.demo_strategies]
+        population = dojo.Population(params_class=dojo.HMMParams,
+                                     params_kwargs={"num_states": 3},
+                                     size=10,
+                                     objective=objective,
+                                     output_filename=output_file.name,
+                                     opponents=opponents,
+                                     bottleneck=2,
+                                     mutation_probability=.01,
+                                     processes=1)
+        # Exact scores do not depend on the random seed
+        scores = []
+        for seed in range(2):
+            axl.seed(seed)
+            scores.append(population.score_all())
+        self.assertEqual(*scores)
+
+        axl.seed(0)
+        population.run(2)
+        self.assertEqual(population.generation, 2)
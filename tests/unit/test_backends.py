@@ -0,0 +1,83 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from operator import add
+
+from axelrod_dojo.backends import (Backend, ExecutorBackend,
+                                   MultiprocessingBackend, ProcessPoolBackend,
+                                   SerialBackend, ThreadBackend, make_backend)
+
+initialized = []
+
+
+def initialize(value):
+    initialized.append(value)
+
+
+def get_initialized():
+    return list(initialized)
+
+
+class TestBackends(unittest.TestCase):
+    def test_starmap_is_abstract(self):
+        with self.assertRaises(TypeError):
+            Backend()
+
+    def test_starmap(self):
+        for backend in [SerialBackend(), MultiprocessingBackend(2),
+                        ProcessPoolBackend(2), ThreadBackend(2),
+                        ExecutorBackend(ThreadPoolExecutor(2), 2)]:
+            with backend:
+                self.assertEqual(backend.starmap(add, [(1, 2), (3, 4)]),
+                                 [3, 7])
+                self.assertEqual(backend.starmap(add, [(5, 6)], 1), [11])
+                self.assertEqual(backend.starmap(add, []), [])
+
+    def test_submit(self):
+        for backend in [SerialBackend(), MultiprocessingBackend(2),
+                        ProcessPoolBackend(2), ThreadBackend(2)]:
+            with backend:
+                futures = [backend.submit(add, i, i) for i in range(4)]
+                self.assertEqual([future.result() for future in futures],
+                                 [0, 2, 4, 6])
+                with self.assertRaises(TypeError):
+                    backend.submit(add, 1).result()
+
+    def test_initializer(self):
+        for backend_class in [MultiprocessingBackend, ProcessPoolBackend]:
+            with backend_class(1, initialize, (3,)) as backend:
+                self.assertTrue(backend.resident)
+                self.assertEqual(backend.starmap(get_initialized, [()]),
+                                 [[3]])
+        self.assertEqual(initialized, [])
+        self.assertFalse(SerialBackend(initialize, (3,)).resident)
+        self.assertEqual(initialized, [])
+
+    def test_threaded(self):
+        for backend in [SerialBackend(), MultiprocessingBackend(1),
+                        ProcessPoolBackend(1)]:
+            with backend:
+                self.assertFalse(backend.threaded)
+        executor = ThreadPoolExecutor(1)
+        for backend in [ThreadBackend(1), ExecutorBackend(executor)]:
+            with backend:
+                self.assertTrue(backend.threaded)
+        executor.shutdown()
+
+    def test_supplied_executor_is_left_open(self):
+        executor = ThreadPoolExecutor(2)
+        with ExecutorBackend(executor) as backend:
+            backend.starmap(add, [(1, 2)])
+        self.assertEqual(executor.submit(add, 1, 1).result(), 2)
+        executor.shutdown()
+
+    def test_make_backend(self):
+        self.assertIsInstance(make_backend(), SerialBackend)
+        for processes, name, backend_class in [
+                (2, None, MultiprocessingBackend),
+                (2, "serial", SerialBackend),
+                (2, "process_pool", ProcessPoolBackend),
+                (2, "threads", ThreadBackend)]:
+            with make_backend(processes, name) as backend:
+                self.assertIsInstance(backend, backend_class)
+        with self.assertRaises(ValueError):
+            make_backend(2, "cluster")
@@ -0,0 +1,187 @@
+import os
+import pickle
+import tempfile
+import time
+import unittest
+from multiprocessing import Pool
+
+import axelrod as axl
+
+import axelrod_dojo as dojo
+import axelrod_dojo.utils as utils
+from axelrod_dojo.cache import FitnessCache, fitness_key, is_deterministic
+
+C, D = axl.Action.C, axl.Action.D
+
+
+def store_score(cache, key, score):
+    cache.set(key, score)
+    return cache.get(key)
+
+
+class TestIsDeterministic(unittest.TestCase):
+    deterministic_opponents = [utils.PlayerInfo(axl.TitForTat, {}),
+                               utils.PlayerInfo(axl.Fortress3, {})]
+
+    def test_is_deterministic(self):
+        params = dojo.FSMParams(num_states=2)
+        objective = utils.prepare_objective("score", turns=10)
+        self.assertTrue(is_deterministic(params, objective,
+                                         self.deterministic_opponents))
+        self.assertFalse(is_deterministic(params, objective,
+                                          self.deterministic_opponents,
+                                          sample_count=1))
+        self.assertFalse(is_deterministic(
+            params, objective, [utils.PlayerInfo(axl.Random, {})]))
+
+        objective = utils.prepare_objective("score", turns=10, noise=.1)
+        self.assertFalse(is_deterministic(params, objective,
+                                          self.deterministic_opponents))
+        self.assertFalse(is_deterministic(
+            params, utils.prepare_objective("moran", turns=10),
+            self.deterministic_opponents))
+
+    def test_exact_objective(self):
+        params = dojo.FSMParams(num_states=2)
+        objective = utils.prepare_objective("score", turns=10, noise=.1,
+                                            exact=True)
+        self.assertTrue(is_deterministic(
+            params, objective, [utils.PlayerInfo(axl.Random, {})]))
+        self.assertFalse(is_deterministic(
+            params, objective, [utils.PlayerInfo(axl.Tester, {})]))
+
+
+class TestFitnessKey(unittest.TestCase):
+    opponents_information = [utils.PlayerInfo(axl.TitForTat, {}),
+                             utils.PlayerInfo(axl.Random, {"p": .2})]
+    objective = utils.prepare_objective("score", turns=10)
+
+    def test_equivalent_genomes_share_a_key(self):
+        rows = [[0, C, 0, C], [0, D, 0, D], [1, C, 1, D], [1, D, 0, C]]
+        params = dojo.FSMParams(num_states=2, rows=rows)
+        equivalent = dojo.FSMParams(num_states=1,
+                                    rows=[[0, C, 0, C], [0, D, 0, D]])
+        self.assertEqual(
+            fitness_key(params, self.objective, self.opponents_information),
+            fitness_key(equivalent, self.objective,
+                        self.opponents_information))
+
+    def test_key_depends_on_evaluation(self):
+        params = dojo.FSMParams(num_states=2)
+        key = fitness_key(params, self.objective, self.opponents_information)
+        other_keys = [
+            fitness_key(params, utils.prepare_objective("score", turns=11),
+                        self.opponents_information),
+            fitness_key(params, self.objective,
+                        self.opponents_information[:1]),
+            fitness_key(params, self.objective,
+                        [self.opponents_information[0],
+                         utils.PlayerInfo(axl.Random, {"p": .3})]),
+            fitness_key(params, self.objective, self.opponents_information,
+                        weights=[1, 2]),
+        ]
+        self.assertNotIn(key, other_keys)
+
+
+class TestFitnessCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "fitness.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_and_set(self):
+        cache = FitnessCache(self.filename)
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", 2.5)
+        cache.set_many([("b", 1), (None, 3)])
+        self.assertEqual(cache.get_many(["a", "b", "c", None]),
+                         [2.5, 1, None, None])
+        self.assertEqual(len(cache), 2)
+        cache.close()
+
+        # The scores persist on disk
+        self.assertEqual(FitnessCache(self.filename).get("a"), 2.5)
+
+    def test_eviction(self):
+        cache = FitnessCache(self.filename, max_entries=3)
+        for i, key in enumerate("abc"):
+            cache.set(key, i)
+        cache.get("a")
+        cache.set("d", 3)
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get_many(["a", "c", "d"]), [0, 2, 3])
+
+    def test_reads_do_not_write(self):
+        cache = FitnessCache(self.filename)
+        cache.set("a", 1)
+        used = cache.connection.execute(
+            "SELECT used FROM fitness WHERE key = 'a'").fetchone()[0]
+        time.sleep(.01)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertFalse(cache.connection.in_transaction)
+        # The use is recorded on closing
+        cache.close()
+        cache = FitnessCache(self.filename)
+        self.assertGreater(cache.connection.execute(
+            "SELECT used FROM fitness WHERE key = 'a'").fetchone()[0], used)
+        cache.close()
+
+    def test_key(self):
+        cache = FitnessCache(self.filename)
+        params = dojo.FSMParams(num_states=2)
+        objective = utils.prepare_objective("score", turns=10, noise=.1)
+        opponents_information = [utils.PlayerInfo(axl.TitForTat, {})]
+        with self.assertWarns(UserWarning):
+            self.assertIsNone(cache.key(params, objective,
+                                        opponents_information))
+
+        cache = FitnessCache(self.filename, allow_stochastic=True)
+        self.assertEqual(cache.key(params, objective, opponents_information),
+                         fitness_key(params, objective,
+                                     opponents_information))
+
+    def test_opponents_are_built_once(self):
+        built = []
+
+        class Counted(axl.TitForTat):
+            def __init__(self):
+                built.append(self)
+                super().__init__()
+
+        cache = FitnessCache(self.filename)
+        objective = utils.prepare_objective("score", turns=10)
+        opponents_information = [utils.PlayerInfo(Counted, {})]
+        axl.seed(0)
+        keys = [cache.key(dojo.FSMParams(num_states=2), objective,
+                          opponents_information) for _ in range(5)]
+        self.assertNotIn(None, keys)
+        self.assertEqual(len(built), 1)
+
+    def test_shared_by_processes(self):
+        cache = FitnessCache(self.filename)
+        cache.get("a")
+        self.assertIsNone(pickle.loads(pickle.dumps(cache))._connection)
+        with Pool(processes=2) as pool:
+            results = pool.starmap(store_score,
+                                   [(cache, str(i), i) for i in range(10)])
+        self.assertEqual(results, list(range(10)))
+        self.assertEqual(cache.get_many([str(i) for i in range(10)]),
+                         list(range(10)))
+
+    def test_warm(self):
+        output = os.path.join(self.directory.name, "output.csv")
+        with open(output, "w") as f:
+            f.write("1,2.119,0.27,2.65,0:C:0_C_0_C:0_D_1_D:1_C_0_D:1_D_1_D\n"
+                    "2,2.46,0.27,2.8,0:C:0_C_0_C:0_D_1_D:1_C_1_D:1_D_1_D\n")
+        objective = utils.prepare_objective("score", turns=10)
+        opponents_information = [utils.PlayerInfo(axl.TitForTat, {})]
+        cache = FitnessCache(self.filename)
+        self.assertEqual(cache.warm(output, dojo.FSMParams, objective,
+                                    opponents_information), 2)
+        params = dojo.FSMParams.parse_repr(
+            "0:C:0_C_0_C:0_D_1_D:1_C_1_D:1_D_1_D")
+        self.assertEqual(cache.get(cache.key(params, objective,
+                                             opponents_information)), 2.8)
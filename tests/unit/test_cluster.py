@@ -0,0 +1,151 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from multiprocessing import Process
+from operator import add
+
+import axelrod as axl
+
+import axelrod_dojo as dojo
+from axelrod_dojo.cluster import ClusterBackend, run_worker
+
+
+def fail():
+    raise ValueError("failed")
+
+
+def exit_once(marker, value):
+    """Kill the worker process the first time it is called."""
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return value
+
+
+def sleep_once(marker, value):
+    """Hang the worker process the first time it is called."""
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        time.sleep(3)
+    return value
+
+
+def start_worker(backend):
+    worker = Process(target=run_worker, args=(backend.address,
+                                              backend.authkey))
+    worker.start()
+    return worker
+
+
+class TestClusterBackend(unittest.TestCase):
+    def setUp(self):
+        self.backend = ClusterBackend()
+        self.workers = []
+
+    def tearDown(self):
+        self.backend.close()
+        for worker in self.workers:
+            worker.join(10)
+            self.assertFalse(worker.is_alive())
+
+    def test_starmap(self):
+        self.workers = [start_worker(self.backend) for _ in range(2)]
+        tasks = [(i, i) for i in range(20)]
+        self.assertEqual(self.backend.starmap(add, tasks),
+                         [2 * i for i in range(20)])
+        self.assertEqual(self.backend.starmap(add, []), [])
+        self.assertEqual(self.backend.processes, 2)
+
+    def test_submit(self):
+        self.workers = [start_worker(self.backend) for _ in range(2)]
+        futures = [self.backend.submit(add, i, 1) for i in range(5)]
+        self.assertEqual([future.result(30) for future in futures],
+                         [1, 2, 3, 4, 5])
+        future = self.backend.submit(fail)
+        with self.assertRaises(ValueError):
+            future.result(30)
+
+    def test_errors_are_raised(self):
+        self.workers = [start_worker(self.backend)]
+        with self.assertRaises(ValueError):
+            self.backend.starmap(fail, [()])
+        # The worker can still be used
+        self.assertEqual(self.backend.starmap(add, [(1, 2)]), [3])
+
+    def test_workers_join_during_a_call(self):
+        results = []
+        call = threading.Thread(target=lambda: results.append(
+            self.backend.starmap(add, [(1, 2), (3, 4)])))
+        call.start()
+        self.workers = [start_worker(self.backend)]
+        call.join(30)
+        self.assertEqual(results, [[3, 7]])
+
+    def test_tasks_of_dead_workers_are_retried(self):
+        directory = tempfile.TemporaryDirectory()
+        marker = os.path.join(directory.name, "marker")
+        self.workers = [start_worker(self.backend) for _ in range(2)]
+        tasks = [(marker, i) for i in range(6)]
+        self.assertEqual(self.backend.starmap(exit_once, tasks),
+                         list(range(6)))
+        self.assertEqual(self.backend.processes, 1)
+        directory.cleanup()
+
+    def test_tasks_of_slow_workers_are_retried(self):
+        directory = tempfile.TemporaryDirectory()
+        marker = os.path.join(directory.name, "marker")
+        self.backend.task_timeout = .5
+        self.workers = [start_worker(self.backend) for _ in range(2)]
+        tasks = [(marker, i) for i in range(6)]
+        start = time.monotonic()
+        self.assertEqual(self.backend.starmap(sleep_once, tasks),
+                         list(range(6)))
+        self.assertLess(time.monotonic() - start, 3)
+        directory.cleanup()
+
+    def test_unauthenticated_workers_are_refused(self):
+        worker = Process(target=run_worker, args=(self.backend.address,
+                                                  b"wrong key"))
+        worker.start()
+        worker.join(10)
+        self.assertNotEqual(worker.exitcode, 0)
+        self.workers = [start_worker(self.backend)]
+        self.assertEqual(self.backend.starmap(add, [(1, 2)]), [3])
+
+    def test_population(self):
+        self.workers = [start_worker(self.backend) for _ in range(2)]
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10)
+        with dojo.Population(params_class=dojo.FSMParams,
+                             params_kwargs={"num_states": 2},
+                             size=4,
+                             objective=objective,
+                             output_filename=output_file.name,
+                             opponents=[axl.TitForTat(), axl.Grudger()],
+                             backend=self.backend) as population:
+            expected = [dojo.utils.score_params(
+                params, objective, population.opponents_information)
+                for params in population.population]
+            self.assertEqual(population.score_all(), expected)
+
+    def test_steady_state(self):
+        self.workers = [start_worker(self.backend) for _ in range(2)]
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10)
+        with dojo.Population(params_class=dojo.FSMParams,
+                             params_kwargs={"num_states": 2},
+                             size=4,
+                             objective=objective,
+                             output_filename=output_file.name,
+                             opponents=[axl.TitForTat(), axl.Grudger()],
+                             bottleneck=2,
+                             backend=self.backend) as population:
+            population.run_steady_state(12)
+            self.assertEqual(population.generation, 3)
+            self.assertEqual(
+                [score for score, _, _ in population.known_scores],
+                [dojo.utils.score_params(
+                    params, objective, population.opponents_information)
+                 for params in population.population])
@@ -0,0 +1,117 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from operator import add
+
+import axelrod as axl
+
+import axelrod_dojo as dojo
+from axelrod_dojo.shards import (MissingShardsError, ShardBackend,
+                                 current_batch, result_filename, score_shard,
+                                 write_atomically)
+
+worker_script = os.path.join(os.path.dirname(__file__), "..", "..", "bin",
+                             "shard_worker.py")
+
+
+def fail():
+    raise ValueError("failed")
+
+
+def score_shards(batch, shards):
+    for index in shards:
+        score_shard(batch, index)
+
+
+class TestShardBackend(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_starmap(self):
+        submitted = []
+
+        def submit(batch, shards):
+            submitted.append(shards)
+            score_shards(batch, shards)
+
+        backend = ShardBackend(self.directory.name, shard_size=3,
+                               submit_jobs=submit, poll_interval=.01)
+        tasks = [(i, i) for i in range(8)]
+        self.assertEqual(backend.starmap(add, tasks),
+                         [2 * i for i in range(8)])
+        self.assertEqual(submitted, [[0, 1, 2]])
+        self.assertEqual(backend.starmap(add, []), [])
+        # The batch directories are removed once merged
+        self.assertEqual(os.listdir(self.directory.name), ["current"])
+
+    def test_submit(self):
+        backend = ShardBackend(self.directory.name, submit_jobs=score_shards,
+                               poll_interval=.01)
+        self.assertEqual(backend.submit(add, 1, 2).result(), 3)
+
+    def test_errors_are_raised(self):
+        backend = ShardBackend(self.directory.name, submit_jobs=score_shards,
+                               poll_interval=.01)
+        with self.assertRaises(ValueError):
+            backend.starmap(fail, [()])
+
+    def test_missing_and_incomplete_shards(self):
+        def submit(batch, shards):
+            # Shard 0 is never scored and the results of shard 1 are
+            # truncated
+            score_shards(batch, [2])
+            write_atomically(result_filename(batch, 1), b"\x80\x04")
+
+        backend = ShardBackend(self.directory.name, shard_size=1,
+                               submit_jobs=submit, timeout=.05,
+                               poll_interval=.01)
+        with self.assertRaises(MissingShardsError) as context:
+            backend.starmap(add, [(1, 2), (3, 4), (5, 6)])
+        self.assertEqual(context.exception.shards, [0, 1])
+
+    def test_missing_shards_are_resubmitted(self):
+        submitted = []
+
+        def submit(batch, shards):
+            submitted.append(shards)
+            # Shard 0 is only scored when submitted again
+            score_shards(batch, shards[1:] if len(submitted) == 1 else shards)
+
+        backend = ShardBackend(self.directory.name, shard_size=1,
+                               submit_jobs=submit, timeout=.05, retries=1,
+                               poll_interval=.01)
+        self.assertEqual(backend.starmap(add, [(1, 2), (3, 4)]), [3, 7])
+        self.assertEqual(submitted, [[0, 1], [0]])
+
+    def test_worker_script(self):
+        def submit(batch, shards):
+            for index in shards:
+                subprocess.check_call([sys.executable, worker_script,
+                                       "--shard", str(index),
+                                       self.directory.name])
+
+        backend = ShardBackend(self.directory.name, shard_size=2,
+                               submit_jobs=submit, poll_interval=.01,
+                               keep_files=True)
+        output_file = tempfile.NamedTemporaryFile()
+        objective = dojo.prepare_objective(name="score", turns=10)
+        with dojo.Population(params_class=dojo.FSMParams,
+                             params_kwargs={"num_states": 2},
+                             size=3,
+                             objective=objective,
+                             output_filename=output_file.name,
+                             opponents=[axl.TitForTat(), axl.Grudger()],
+                             backend=backend) as population:
+            expected = [dojo.utils.score_params(
+                params, objective, population.opponents_information)
+                for params in population.population]
+            self.assertEqual(population.score_all(), expected)
+        batch = current_batch(self.directory.name)
+        self.assertEqual(sorted(os.listdir(batch)),
+                         ["result-00000.pickle", "result-00001.pickle",
+                          "shard-00000.pickle", "shard-00001.pickle"])
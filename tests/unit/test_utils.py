@@ -1,7 +1,9 @@
 import unittest
 
 import io
+import random
 import tempfile
+import threading
 import functools
 
 import axelrod as axl
@@ -55,6 +57,14 @@ class TestPrepareObjective(unittest.TestCase):
         self.assertIsInstance(objective, functools.partial)
         self.assertIn("objective_moran_win ", str(objective))
 
+    def test_exact(self):
+        objective = utils.prepare_objective(name="score", exact=True)
+        self.assertIn("objective_expected_score ", str(objective))
+        objective = utils.prepare_objective(name="score_diff", exact=True)
+        self.assertIn("objective_expected_score_diff ", str(objective))
+        with self.assertRaises(ValueError):
+            utils.prepare_objective(name="moran", exact=True)
+
 
 class TestObjectiveScore(unittest.TestCase):
     def test_deterministic_player_opponent(self):
@@ -92,6 +102,109 @@ class TestObjectiveScore(unittest.TestCase):
         # Cooperator should score 0 but noise implies it scores more
         self.assertNotEqual(max(scores), 0)
 
+    def test_seeded_repetitions(self):
+        player = axl.Cooperator()
+        opponent = axl.Random()
+        scores = utils.objective_score(player, opponent, turns=10,
+                                       repetitions=4, noise=.1, seed=3)
+        axl.seed(0)
+        draw = random.random()
+        axl.seed(0)
+        self.assertEqual(utils.objective_score(player, opponent, turns=10,
+                                               repetitions=4, noise=.1,
+                                               seed=3),
+                         scores)
+        # The random state of the process is left as it was
+        self.assertEqual(random.random(), draw)
+
+
+class TestRandomStream(unittest.TestCase):
+    def test_stream_seed(self):
+        self.assertEqual(utils.stream_seed(1, 2), utils.stream_seed(1, 2))
+        self.assertNotEqual(utils.stream_seed(1, 2), utils.stream_seed(2, 1))
+        self.assertLess(utils.stream_seed(1, 2), 2 ** 32)
+
+    def test_same_stream(self):
+        draws = []
+        for _ in range(2):
+            with utils.random_stream(5, 1):
+                draws.append([random.random() for _ in range(3)])
+        self.assertEqual(draws[0], draws[1])
+        with utils.random_stream(5, 2):
+            self.assertNotEqual(random.random(), draws[0][0])
+
+    def test_antithetic_pairs(self):
+        with utils.random_stream(5, 0, antithetic=True):
+            first = [random.random() for _ in range(3)]
+        with utils.random_stream(5, 1, antithetic=True):
+            second = [random.random() for _ in range(3)]
+        self.assertEqual([1 - u for u in first], second)
+        with utils.random_stream(5, 2, antithetic=True):
+            self.assertNotEqual(random.random(), first[0])
+
+    def test_threads_take_turns(self):
+        entered = threading.Event()
+
+        def play():
+            with utils.random_stream(5, 1, antithetic=True):
+                entered.set()
+
+        thread = threading.Thread(target=play)
+        with utils.random_stream(5, 0, antithetic=True):
+            thread.start()
+            self.assertFalse(entered.wait(.1))
+            draw = random.random()
+        thread.join()
+        self.assertTrue(entered.is_set())
+        with utils.random_stream(5, 0, antithetic=True):
+            self.assertEqual(random.random(), draw)
+
+    def test_without_seed(self):
+        axl.seed(0)
+        with utils.random_stream(None, 0):
+            draw = random.random()
+        axl.seed(0)
+        self.assertEqual(random.random(), draw)
+
+
+class TestCyclicFinalScores(unittest.TestCase):
+    def test_state_key(self):
+        self.assertEqual(utils.state_key(axl.Fortress3()), (1, 1))
+        self.assertEqual(utils.state_key(axl.Defector()), ((), 0))
+        self.assertIsNone(utils.state_key(axl.TitForTat()))
+
+    def test_same_scores_as_match(self):
+        axl.seed(0)
+        for turns in [1, 2, 10, 200, 1001]:
+            for player, opponent in [
+                (axl.EvolvedFSM16(), axl.Fortress4()),
+                (axl.Fortress3(), axl.Defector()),
+                (axl.Predator(), axl.Raider()),
+                (axl.Thumper(), axl.Cooperator())]:
+                match = axl.Match((player, opponent), turns=turns)
+                match.play()
+                expected = match.final_score()
+                self.assertEqual(utils.cyclic_final_scores(match), expected)
+
+    def test_ineligible_player(self):
+        match = axl.Match((axl.Fortress3(), axl.TitForTat()), turns=10)
+        self.assertIsNone(utils.cyclic_final_scores(match))
+
+    def test_objectives_use_cycles(self):
+        player = axl.EvolvedFSM16()
+        opponent = axl.Fortress4()
+        match = axl.Match((player, opponent), turns=10000)
+        match.play()
+        expected_scores = match.final_score_per_turn()
+        scores = utils.objective_score(player, opponent, turns=10000,
+                                       repetitions=5, noise=0)
+        self.assertEqual(scores, [expected_scores[0]])
+        score_diffs = utils.objective_score_diff(player, opponent,
+                                                 turns=10000, repetitions=5,
+                                                 noise=0)
+        self.assertEqual(score_diffs,
+                         [expected_scores[0] - expected_scores[1]])
+
 
 class TestObjectiveScoreDiff(unittest.TestCase):
     def test_deterministic_player_opponent(self):
@@ -131,6 +244,42 @@ class TestObjectiveScoreDiff(unittest.TestCase):
         self.assertNotEqual(max(score_diffs), -5)
 
 
+class TestObjectiveExpectedScore(unittest.TestCase):
+    def test_deterministic_player_opponent(self):
+        player = axl.TitForTat()
+        opponent = axl.Alternator()
+        for objective, exact_objective in [
+            (utils.objective_score, utils.objective_expected_score),
+            (utils.objective_score_diff,
+             utils.objective_expected_score_diff)]:
+            expected_scores = objective(player, opponent, turns=3,
+                                        repetitions=5, noise=0)
+            scores = exact_objective(player, opponent, turns=3,
+                                     repetitions=5, noise=0)
+            self.assertEqual(expected_scores, scores)
+
+    def test_noisy_match(self):
+        player = axl.Cooperator()
+        opponent = axl.Defector()
+        scores = utils.objective_expected_score(player, opponent, turns=2,
+                                                repetitions=3, noise=.5)
+        self.assertEqual(scores, [2.25])
+        score_diffs = utils.objective_expected_score_diff(
+            player, opponent, turns=2, repetitions=3, noise=.5)
+        self.assertEqual(score_diffs, [0])
+
+    def test_falls_back_to_simulation(self):
+        axl.seed(0)
+        player = axl.Cooperator()
+        opponent = axl.Tester()
+        scores = utils.objective_expected_score(player, opponent, turns=4,
+                                                repetitions=3, noise=.5)
+        self.assertEqual(len(scores), 3)
+        score_diffs = utils.objective_expected_score_diff(
+            player, opponent, turns=4, repetitions=3, noise=.5)
+        self.assertEqual(len(score_diffs), 3)
+
+
 class TestObjectiveMoran(unittest.TestCase):
     def test_deterministic_cooperator_never_fixes(self):
         player = axl.Cooperator()
@@ -176,6 +325,10 @@ class TestBaseParametersClass(unittest.TestCase):
         self.assertIsNone(parameters.vector_to_instance())
         self.assertIsNone(parameters.create_vector_bounds())
 
+    def test_canonical_form(self):
+        parameters = utils.Params()
+        self.assertIs(parameters.canonical_form(), parameters)
+
 
 class DummyParams(utils.Params):
     """
@@ -247,3 +400,93 @@ class TestScoreParams(unittest.TestCase):
                                    weights=[2, -.5, 0, 0, 0])
         expected_score = 4.0
         self.assertEqual(score, expected_score)
+
+    def test_common_random_numbers(self):
+        opponents_information = [utils.PlayerInfo(axl.Random, {}),
+                                 utils.PlayerInfo(axl.TitForTat, {})]
+        objective = utils.prepare_objective(turns=10, noise=.1,
+                                            repetitions=5)
+        params = DummyParams()
+        axl.seed(0)
+        score = utils.score_params(params, objective, opponents_information,
+                                   seed=7)
+        axl.seed(1)
+        self.assertEqual(utils.score_params(params, objective,
+                                            opponents_information, seed=7),
+                         score)
+        self.assertNotEqual(utils.score_params(params, objective,
+                                               opponents_information,
+                                               seed=8),
+                            score)
+
+
+class TestSampleParams(unittest.TestCase):
+    def test_sample_params(self):
+        axl.seed(0)
+        opponents_information = [utils.PlayerInfo(axl.Defector, {}),
+                                 utils.PlayerInfo(axl.Random, {})]
+        objective = utils.prepare_objective(turns=10, repetitions=20)
+        samples = utils.sample_params(DummyParams(), objective,
+                                      opponents_information, repetitions=3)
+        self.assertEqual(samples[0], [0])
+        self.assertEqual(len(samples[1]), 3)
+
+
+class TestWorker(unittest.TestCase):
+    def tearDown(self):
+        utils.WORKER.clear()
+
+    def test_score_params_in_worker(self):
+        opponents_information = [utils.PlayerInfo(axl.Random, {"p": .2}),
+                                 utils.PlayerInfo(axl.TitForTat, {}),
+                                 utils.PlayerInfo(axl.Grudger, {})]
+        objective = utils.prepare_objective(turns=10, noise=.1,
+                                            repetitions=3)
+        weights = [1, 2, 3]
+        utils.init_worker(objective, opponents_information, weights)
+        opponents = list(utils.WORKER["opponents"])
+        params = DummyParams()
+        for seed in [1, 2]:
+            self.assertEqual(
+                utils.score_params_in_worker(params, seed=seed),
+                utils.score_params(params, objective, opponents_information,
+                                   weights=weights, seed=seed))
+        self.assertEqual(
+            utils.score_opponents_in_worker(params, [2, 0], seed=1),
+            utils.score_opponents(params, objective, opponents_information,
+                                  [2, 0], seed=1))
+        # The opponents are reused
+        self.assertEqual(list(map(id, utils.WORKER["opponents"])),
+                         list(map(id, opponents)))
+
+    def test_score_offspring_in_worker(self):
+        from axelrod_dojo import FSMParams
+        opponents_information = [utils.PlayerInfo(axl.TitForTat, {}),
+                                 utils.PlayerInfo(axl.Alternator, {})]
+        objective = utils.prepare_objective(turns=10)
+        utils.init_worker(objective, opponents_information)
+        parents = [FSMParams(num_states=2) for _ in range(2)]
+        survivor = ("survivor", (1,), None)
+        mutant = ("mutant", (survivor,), 3)
+        recipes = [survivor, mutant,
+                   ("crossover", (mutant, ("random", (), 4)), 5)]
+        kwargs = {"num_states": 2, "mutation_probability": .5}
+
+        random.seed(0)
+        offspring = [utils.breed_offspring(parents, recipe, FSMParams,
+                                           kwargs)
+                     for recipe in recipes]
+        # Breeding does not draw from the random state of the process
+        self.assertEqual(random.random(), random.Random(0).random())
+        self.assertIs(offspring[0], parents[1])
+        self.assertEqual(
+            repr(utils.breed_offspring(parents, mutant, FSMParams, kwargs)),
+            repr(offspring[1]))
+        self.assertEqual(
+            utils.score_offspring_in_worker(parents, recipes, FSMParams,
+                                            kwargs),
+            [utils.score_params(params, objective, opponents_information)
+             for params in offspring])
+        with self.assertRaises(ValueError):
+            utils.breed_offspring(parents, ("clone", (survivor,), 1),
+                                  FSMParams, kwargs)